@@ -1,8 +1,15 @@
 import os
-from contextlib import contextmanager
+import json
+from datetime import datetime
+from contextlib import contextmanager, asynccontextmanager
+from sqlalchemy import event, inspect, text, cast, Integer, String
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
-from app.models import Article, UserEvent  # ✅ import models to register metadata
+from app.models import Article, UserEvent, AppState  # ✅ import models to register metadata
+from app.utils.geohash import article_geohash
 
 load_dotenv()
 DB_URL = os.getenv("DB_URL", "sqlite:///./news.db")
@@ -11,9 +18,225 @@ connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else
 engine = create_engine(DB_URL, echo=False, connect_args=connect_args)
 
 
+
+def _async_url(url: str) -> str:
+    """Same database through an asyncio driver (aiosqlite / psycopg 3 async mode)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg:" + url[len(prefix):]
+    return url
+
+
+# used by the async request path (`get_async_session`); ingest, migrations and
+# background writers keep the sync engine
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL") or _async_url(DB_URL)
+async_engine = create_async_engine(ASYNC_DB_URL, echo=False)
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL: readers don't block the event writer (and vice versa)
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_pragmas)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
+
 def init_db():
     """Create tables if not exist"""
     SQLModel.metadata.create_all(engine)
+    migrate_db()
+
+
+def migrate_db():
+    """
+    Bring an existing database up to date with the models.
+    `create_all` only creates missing tables, so columns and indexes added to
+    existing tables and data moved between tables are handled here. Idempotent.
+    """
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name not in existing:
+                    col_type = col.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+    insp = inspect(engine)
+
+    # category_json (JSON list in TEXT) → article_category rows
+    article_cols = {c["name"] for c in insp.get_columns("article")}
+    if "category_json" in article_cols:
+        print("🧱 Migrating article.category_json → article_category ...")
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, category_json FROM article WHERE category_json IS NOT NULL")
+            ).all()
+            links = []
+            for article_id, raw in rows:
+                try:
+                    names = json.loads(raw or "[]")
+                except Exception:
+                    names = []
+                links.extend(
+                    {"article_id": article_id, "position": i, "name": str(n)}
+                    for i, n in enumerate(names)
+                )
+            conn.execute(text("DELETE FROM article_category"))
+            if links:
+                conn.execute(
+                    text("INSERT INTO article_category (article_id, position, name) VALUES (:article_id, :position, :name)"),
+                    links,
+                )
+            conn.execute(text("ALTER TABLE article DROP COLUMN category_json"))
+
+    # geohash for spatial lookups on rows ingested before the column existed
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, latitude, longitude FROM article "
+            "WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+        )).all()
+        updates = [
+            {"id": article_id, "gh": article_geohash(lat, lon)}
+            for article_id, lat, lon in rows
+            if article_geohash(lat, lon)
+        ]
+        if updates:
+            conn.execute(text("UPDATE article SET geohash = :gh WHERE id = :id"), updates)
+
+    if engine.dialect.name == "sqlite":
+        _ensure_sqlite_fts()
+    elif engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            ensure_event_partitions(conn)
+
+
+def _ensure_sqlite_fts():
+    """
+    FTS5 index over article title/description, kept in sync by triggers.
+    External-content table: only the inverted index is stored, text is read
+    from `article` by rowid. If `article` is ever VACUUMed (which can renumber
+    rowids of tables without an INTEGER PRIMARY KEY), run
+    `INSERT INTO article_fts(article_fts) VALUES ('rebuild')`.
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_fts'")
+        ).first()
+        if exists:
+            return
+        try:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE article_fts USING fts5("
+                "title, description, content='article', content_rowid='rowid', "
+                "tokenize=\"unicode61 tokenchars '_'\")"
+            ))
+        except Exception as e:
+            print(f"[WARN] FTS5 unavailable, search falls back to the in-memory index: {e}")
+            return
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS article_fts_ai AFTER INSERT ON article BEGIN
+                INSERT INTO article_fts(rowid, title, description)
+                VALUES (new.rowid, new.title, new.description);
+            END"""))
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS article_fts_ad AFTER DELETE ON article BEGIN
+                INSERT INTO article_fts(article_fts, rowid, title, description)
+                VALUES ('delete', old.rowid, old.title, old.description);
+            END"""))
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS article_fts_au AFTER UPDATE OF title, description ON article BEGIN
+                INSERT INTO article_fts(article_fts, rowid, title, description)
+                VALUES ('delete', old.rowid, old.title, old.description);
+                INSERT INTO article_fts(rowid, title, description)
+                VALUES (new.rowid, new.title, new.description);
+            END"""))
+        conn.execute(text("INSERT INTO article_fts(article_fts) VALUES ('rebuild')"))
+
+
+def event_partitions(conn) -> dict:
+    """
+    Postgres only: {partition name: (start, end)} for the monthly partitions
+    of `userevent`, or {} if the table isn't partitioned (created before
+    partitioning was added; retention then falls back to plain DELETEs).
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'userevent' AND p.relkind = 'p'"
+    )).all()
+    parts = {}
+    for (name,) in rows:
+        if not name.startswith("userevent_p"):
+            continue  # the DEFAULT partition
+        y, m = int(name[-6:-2]), int(name[-2:])
+        parts[name] = (datetime(y, m, 1), _next_month(datetime(y, m, 1)))
+    return parts
+
+
+def ensure_event_partitions(conn, months_ahead: int = 2):
+    """Create this month's and the next `months_ahead` monthly partitions (plus a DEFAULT one)."""
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'userevent'")).scalar()
+    if kind != "p":
+        return
+    conn.execute(text("CREATE TABLE IF NOT EXISTS userevent_default PARTITION OF userevent DEFAULT"))
+    start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(months_ahead + 1):
+        end = _next_month(start)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS userevent_p{start:%Y%m} PARTITION OF userevent "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+        start = end
+
+
+def _next_month(dt: datetime) -> datetime:
+    return dt.replace(year=dt.year + 1, month=1) if dt.month == 12 else dt.replace(month=dt.month + 1)
+
+
+def upsert(model):
+    """Dialect-specific INSERT supporting `.on_conflict_do_update(...)`."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+DATA_VERSION_KEY = "data_version"
+
+
+def data_version() -> int:
+    """Counter of article data changes; read by the response cache."""
+    with engine.connect() as conn:
+        value = conn.execute(
+            text("SELECT value FROM app_state WHERE key = :k"), {"k": DATA_VERSION_KEY}
+        ).scalar()
+    return int(value) if value else 0
+
+
+def bump_data_version() -> int:
+    """Record that articles changed (call after committing them). Returns the new version."""
+    stmt = upsert(AppState).values(key=DATA_VERSION_KEY, value="1")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"value": cast(cast(AppState.value, Integer) + 1, String)},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt)
+    return data_version()
 
 
 @contextmanager
@@ -23,6 +246,13 @@ def get_session():
         yield session
 
 
+@asynccontextmanager
+async def get_async_session():
+    """Context-managed async DB session (for `async def` request handlers)"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 if __name__ == "__main__":
     print("🧱 Initializing database...")
     init_db()
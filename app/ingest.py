@@ -2,16 +2,36 @@
 """
 Ingest news JSON files into the local DB (SQLite by default; Postgres supported).
 Usage:
-    python ingest.py --input ./news_data.json
+    python -m app.ingest --input ./news_data.json
+    python -m app.ingest --input ./news_data.json --summarize   # also precompute LLM summaries
+    python -m app.ingest --input ./dumps/ --workers 4           # parse/normalize in 4 processes
+    python -m app.ingest --input ./dumps/ --incremental --changes-out changes.json
+    python -m app.ingest --input ./dumps/ --incremental --embed  # also update the semantic search index
+    python -m app.ingest --input ./dumps/ --snapshot             # also write the article snapshot the API maps
+
+Files (.json or .json.gz holding one JSON array) are streamed, so their size
+doesn't matter; rows are written with bulk INSERT ... ON CONFLICT DO UPDATE.
 """
-import argparse, json, glob, os, gzip
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse, glob, hashlib, json, os, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Iterable, List, Dict, Any
+from typing import Iterable, Iterator, List, Dict, Any, Optional
+
 
+from sqlalchemy import insert, text
+from sqlmodel import select, delete
+from app.database import init_db, get_session, bump_data_version, engine, upsert
+from app.models import Article, ArticleCategory, IngestFile
+from app.utils.geohash import article_geohash
+from app.utils.json_stream import iter_json_array
 
-from app.database import init_db, get_session
-from models import Article
+ARTICLE_COLUMNS = [c.name for c in Article.__table__.columns]
+# what `content_hash` covers: a record whose fields all match is skipped by --incremental
+CONTENT_FIELDS = (
+    "title", "description", "url", "publication_date", "source_name",
+    "relevance_score", "latitude", "longitude", "categories",
+)
 
 ISO_FORMATS = [
     "%Y-%m-%dT%H:%M:%S%z",
@@ -28,14 +48,6 @@ def iter_files(input_path: str) -> Iterable[str]:
     else:
         yield input_path
 
-def load_json_array(path: str) -> List[Dict[str, Any]]:
-    opener = gzip.open if path.endswith(".gz") else open
-    with opener(path, "rt", encoding="utf-8") as f:
-        data = json.load(f)
-        if not isinstance(data, list):
-            raise ValueError(f"File {path} does not contain a JSON array")
-        return data
-
 def parse_dt(val) -> datetime | None:
     if not val:
         return None
@@ -50,72 +62,410 @@ def parse_dt(val) -> datetime | None:
     except Exception:
         return None
 
-def normalize_article(obj: Dict[str, Any]) -> Article:
-    art = Article(
-        id=str(obj.get("id")),
-        title=str(obj.get("title") or "").strip(),
-        description=(obj.get("description") or None),
-        url=(obj.get("url") or None),
-        publication_date=parse_dt(obj.get("publication_date")),
-        source_name=(obj.get("source_name") or None),
-        relevance_score=(float(obj.get("relevance_score")) if obj.get("relevance_score") is not None else None),
-        latitude=(float(obj.get("latitude")) if obj.get("latitude") is not None else None),
-        longitude=(float(obj.get("longitude")) if obj.get("longitude") is not None else None),
-    )
+def normalize_article(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain `article` row (plus its `categories` list) for one JSON record."""
+    lat = float(obj.get("latitude")) if obj.get("latitude") is not None else None
+    lon = float(obj.get("longitude")) if obj.get("longitude") is not None else None
     cats = obj.get("category")
     if isinstance(cats, list):
-        art.categories = [str(c).strip() for c in cats if str(c).strip()]
+        categories = [str(c).strip() for c in cats if str(c).strip()]
     elif isinstance(cats, str) and cats.strip():
-        art.categories = [c.strip() for c in cats.split(",") if c.strip()]
+        categories = [c.strip() for c in cats.split(",") if c.strip()]
     else:
-        art.categories = []
-    return art
+        categories = []
+    row = {
+        "id": str(obj["id"]) if obj.get("id") is not None else "",
+        "title": str(obj.get("title") or "").strip(),
+        "description": (obj.get("description") or None),
+        "url": (obj.get("url") or None),
+        "publication_date": parse_dt(obj.get("publication_date")),
+        "source_name": (obj.get("source_name") or None),
+        "relevance_score": (float(obj.get("relevance_score")) if obj.get("relevance_score") is not None else None),
+        "latitude": lat,
+        "longitude": lon,
+        "geohash": article_geohash(lat, lon),
+        "categories": categories,
+    }
+    row["content_hash"] = content_hash(row)
+    return row
+
+def content_hash(row: Dict[str, Any]) -> str:
+    payload = json.dumps([row[k] for k in CONTENT_FIELDS], default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-def ingest_files(paths: List[str], batch_size: int = 1000) -> tuple[int, int]:
-    total_rows = 0
-    files_done = 0
+def normalize_batch(batch: List[Any]) -> tuple[List[Dict[str, Any]], int]:
+    """Worker side of the pipeline: (rows, bad record count). Runs in a child process."""
+    rows, bad = [], 0
+    for obj in batch:
+        try:
+            row = normalize_article(obj)
+        except Exception as e:
+            print(f"[WARN] Bad record: {e}")
+            bad += 1
+            continue
+        if row["id"]:
+            rows.append(row)
+    return rows, bad
+
+def file_fingerprint(path: str) -> tuple[int, float]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def unchanged_files(paths: List[str]) -> List[str]:
+    """Files whose recorded fingerprint still matches (size + mtime, else content hash)."""
+    skip = []
     with get_session() as s:
-        buf: List[Article] = []
         for p in paths:
-            try:
-                arr = load_json_array(p)
-            except Exception as e:
-                print(f"[WARN] Skipping {p}: {e}")
+            known = s.get(IngestFile, p)
+            if known is None:
                 continue
-            for obj in arr:
-                try:
-                    a = normalize_article(obj)
-                    if not a.id:
-                        continue
-                    buf.append(a)
-                    if len(buf) >= batch_size:
-                        for rec in buf:
-                            s.merge(rec)
-                        s.commit()
-                        total_rows += len(buf)
-                        buf.clear()
-                except Exception as e:
-                    print(f"[WARN] Bad record in {p}: {e}")
-            files_done += 1
-        if buf:
-            for rec in buf:
-                s.merge(rec)
-            s.commit()
-            total_rows += len(buf)
-    return total_rows, files_done
+            size, mtime = file_fingerprint(p)
+            if known.size == size and known.mtime == mtime:
+                skip.append(p)
+            elif known.size == size and known.sha256 == file_sha256(p):
+                known.mtime = mtime  # touched, not changed
+                s.add(known)
+                skip.append(p)
+        s.commit()
+    return skip
+
+def iter_batches(paths: List[str], batch_size: int) -> Iterator[tuple[str, List[Any], Optional[bool]]]:
+    """
+    (path, raw records, complete) in lists of up to `batch_size`, streamed file
+    by file. `complete` is None while a file is being read; its last batch
+    (possibly empty) carries True, or False if reading it failed.
+    """
+    for p in paths:
+        buf: List[Any] = []
+        try:
+            for obj in iter_json_array(p):
+                buf.append(obj)
+                if len(buf) >= batch_size:
+                    yield p, buf, None
+                    buf = []
+        except Exception as e:
+            print(f"[WARN] Stopped reading {p}: {e}")
+            yield p, buf, False
+            continue
+        yield p, buf, True
+
+class ChangeSet:
+    """Article ids inserted / updated / deleted by an ingest run, plus skipped files."""
+
+    def __init__(self):
+        self.inserted: List[str] = []
+        self.updated: List[str] = []
+        self.deleted: List[str] = []
+        self.unchanged = 0
+        self.files_ingested: List[str] = []
+        self.files_skipped: List[str] = []
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def to_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "unchanged": self.unchanged,
+            "files": {"ingested": self.files_ingested, "skipped": self.files_skipped},
+        }
+
+def classify_rows(conn, rows: List[Dict[str, Any]], changes: ChangeSet, incremental: bool) -> List[Dict[str, Any]]:
+    """
+    Compare rows with the stored content hashes and record them in `changes`.
+    Returns the rows to write: all of them, or only new / changed ones when
+    `incremental` (unchanged rows that moved to another file get their
+    `source_file` updated in place).
+    """
+    known = {}
+    for i in range(0, len(rows), 500):
+        ids = [r["id"] for r in rows[i:i + 500]]
+        known.update(
+            (a_id, (h, f)) for a_id, h, f in
+            conn.execute(select(Article.id, Article.content_hash, Article.source_file).where(Article.id.in_(ids)))
+        )
+    out, moved = [], []
+    for r in rows:
+        if r["id"] not in known:
+            changes.inserted.append(r["id"])
+        elif known[r["id"]][0] != r["content_hash"]:
+            changes.updated.append(r["id"])
+        else:
+            changes.unchanged += 1
+            if incremental:
+                if known[r["id"]][1] != r["source_file"]:
+                    moved.append({"a_id": r["id"], "f": r["source_file"]})
+                continue
+        out.append(r)
+    if moved:
+        conn.execute(text("UPDATE article SET source_file = :f WHERE id = :a_id"), moved)
+    return out
+
+def write_rows(conn, rows: List[Dict[str, Any]], stmt_rows: int = 500):
+    """Bulk upsert articles and replace their categories (one INSERT ... ON CONFLICT per chunk)."""
+    now = datetime.utcnow()
+    for i in range(0, len(rows), stmt_rows):
+        chunk = rows[i:i + stmt_rows]
+        ids = [r["id"] for r in chunk]
+        stmt = upsert(Article).values([
+            {**{k: v for k, v in r.items() if k != "categories"}, "updated_at": now} for r in chunk
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={c: getattr(stmt.excluded, c) for c in ARTICLE_COLUMNS if c != "id"},
+        )
+        conn.execute(stmt)
+        conn.execute(delete(ArticleCategory).where(ArticleCategory.article_id.in_(ids)))
+        links = [
+            {"article_id": r["id"], "position": pos, "name": name}
+            for r in chunk for pos, name in enumerate(r["categories"])
+        ]
+        if links:
+            conn.execute(insert(ArticleCategory), links)
+
+def delete_missing(conn, path: str, seen: set) -> List[str]:
+    """Delete articles last ingested from `path` that the file no longer contains."""
+    stale = [a_id for (a_id,) in conn.execute(select(Article.id).where(Article.source_file == path)) if a_id not in seen]
+    for i in range(0, len(stale), 500):
+        ids = stale[i:i + 500]
+        conn.execute(delete(ArticleCategory).where(ArticleCategory.article_id.in_(ids)))
+        conn.execute(delete(Article).where(Article.id.in_(ids)))
+    return stale
+
+def record_file(conn, path: str, rows: int):
+    size, mtime = file_fingerprint(path)
+    stmt = upsert(IngestFile).values(
+        path=path, size=size, mtime=mtime, sha256=file_sha256(path), rows=rows, ingested_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["path"],
+        set_={c: getattr(stmt.excluded, c) for c in ("size", "mtime", "sha256", "rows", "ingested_at")},
+    )
+    conn.execute(stmt)
+
+def ingest_files(
+    paths: List[str],
+    batch_size: int = 1000,
+    workers: int = 1,
+    commit_rows: int = 20000,
+    incremental: bool = False,
+) -> tuple[int, int, ChangeSet]:
+    """
+    Streaming pipeline: the reader decodes array elements one at a time,
+    `workers` processes normalize batches (inline when 1), and this process
+    is the single writer, committing bulk upserts every `commit_rows` rows.
+    At most 2 × workers batches are in flight, so memory stays flat.
+
+    Every row is classified against its stored content hash. With
+    `incremental`, files whose fingerprint is unchanged are not read, only
+    new / changed rows are written, and articles that disappeared from a
+    re-read file are deleted. Returns (rows written, files read, change set).
+    """
+    changes = ChangeSet()
+    paths = [os.path.abspath(p) for p in paths]
+    if incremental:
+        changes.files_skipped = unchanged_files(paths)
+        paths = [p for p in paths if p not in changes.files_skipped]
+
+    total_rows = bad_rows = 0
+    pending_rows: List[Dict[str, Any]] = []
+    seen: Dict[str, set] = {}
+    file_rows: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    def commit(rows, finished_file: Optional[str] = None):
+        nonlocal total_rows
+        deleted = []
+        with engine.begin() as conn:
+            # last record wins when an id repeats (Postgres rejects touching a row twice per statement)
+            rows = classify_rows(conn, list({r["id"]: r for r in rows}.values()), changes, incremental)
+            write_rows(conn, rows)
+            if finished_file is not None:
+                if incremental:
+                    deleted = delete_missing(conn, finished_file, seen.pop(finished_file, set()))
+                record_file(conn, finished_file, file_rows.pop(finished_file, 0))
+        if rows or deleted:
+            bump_data_version()
+        changes.deleted.extend(deleted)
+        if finished_file is not None:
+            changes.files_ingested.append(finished_file)
+        total_rows += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"  … {total_rows} rows written, {changes.unchanged} unchanged in {elapsed:.1f}s "
+              f"({(total_rows + changes.unchanged) / elapsed:,.0f} rows/s)")
+
+    def collect(path, result, complete):
+        nonlocal bad_rows, pending_rows
+        rows, bad = result
+        bad_rows += bad
+        for r in rows:
+            r["source_file"] = path
+        if incremental:
+            seen.setdefault(path, set()).update(r["id"] for r in rows)
+        file_rows[path] = file_rows.get(path, 0) + len(rows)
+        pending_rows.extend(rows)
+        if complete:
+            commit(pending_rows, finished_file=path)
+            pending_rows = []
+        elif len(pending_rows) >= commit_rows:
+            commit(pending_rows)
+            pending_rows = []
+        if complete is False:
+            # partially read: keep what was read, but no deletions and no fingerprint
+            seen.pop(path, None)
+            file_rows.pop(path, None)
+
+    batches = iter_batches(paths, batch_size)
+    if workers <= 1:
+        for path, batch, complete in batches:
+            collect(path, normalize_batch(batch), complete)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for path, batch, complete in batches:
+                in_flight.append((path, pool.submit(normalize_batch, batch), complete))
+                if len(in_flight) >= 2 * workers:
+                    path, future, complete = in_flight.popleft()
+                    collect(path, future.result(), complete)
+            while in_flight:
+                path, future, complete = in_flight.popleft()
+                collect(path, future.result(), complete)
+    if pending_rows:
+        commit(pending_rows)
+    if bad_rows:
+        print(f"[WARN] Skipped {bad_rows} bad record(s)")
+    return total_rows, len(paths), changes
+
+def iter_article_texts(ids: Optional[List[str]] = None, batch_size: int = 100) -> Iterator[List[tuple]]:
+    """(id, title, description) rows in batches: of `ids`, or of every article."""
+    if ids is not None:
+        for i in range(0, len(ids), batch_size):
+            with get_session() as s:
+                yield s.exec(
+                    select(Article.id, Article.title, Article.description)
+                    .where(Article.id.in_(ids[i:i + batch_size]))
+                    .order_by(Article.id)
+                ).all()
+        return
+    last_id = ""
+    while True:
+        # keyset scan by id: constant memory regardless of table size
+        with get_session() as s:
+            rows = s.exec(
+                select(Article.id, Article.title, Article.description)
+                .where(Article.id > last_id)
+                .order_by(Article.id)
+                .limit(batch_size)
+            ).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+def summarize_articles(
+    ids: Optional[List[str]] = None, batch_size: int = 100, workers: int = 4,
+) -> tuple[int, int]:
+    """
+    Precompute LLM summaries for the articles in `ids` (every article when
+    None) whose current (title, description) has no stored summary yet.
+    Summaries are content-addressed and persisted as each one completes, so
+    unchanged articles are skipped and an interrupted run resumes where it
+    stopped.
+    """
+    from app.services.llm_service import LLMService, SUMMARY_FAILED
+
+    llm = LLMService(max_concurrency=workers)
+    generated = skipped = 0
+    for rows in iter_article_texts(ids, batch_size):
+        if not rows:
+            continue
+        todo = {llm.cache_key(t, d): (t, d) for _, t, d in rows if d}
+        done = llm.cache.existing(todo.keys())
+        missing = [item for key, item in todo.items() if key not in done]
+        skipped += len(rows) - len(missing)
+        if missing:
+            results = llm.summarize_many(missing, deadline=None)
+            generated += sum(1 for r in results if r and r != SUMMARY_FAILED)
+        print(f"  … summaries: {generated} generated, {skipped} up to date (last id {rows[-1][0]})")
+    return generated, skipped
 
 def main():
     ap = argparse.ArgumentParser(description="Ingest news JSON into DB")
     ap.add_argument("--input", required=True, help="Path to directory OR .json file")
-    ap.add_argument("--batch-size", type=int, default=1000)
-    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--batch-size", type=int, default=1000, help="Records per parse/normalize task")
+    ap.add_argument("--workers", type=int, default=1, help="Processes for parse/normalize (1 = inline)")
+    ap.add_argument("--commit-rows", type=int, default=20000, help="Rows per write transaction")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Skip unchanged files and rows; delete articles removed from re-read files")
+    ap.add_argument("--changes-out", help="Write the change set (inserted/updated/deleted ids) to this JSON file")
+    ap.add_argument("--embed", action="store_true",
+                    help="Update the semantic search index for this run's changes (builds it if missing)")
+    ap.add_argument("--embed-rebuild", action="store_true", help="Refit the embedding model and re-embed every article")
+    ap.add_argument("--snapshot", action="store_true",
+                    help="Write the columnar article snapshot the API memory-maps (ARTICLE_SNAPSHOT_DIR)")
+    ap.add_argument("--summarize", action="store_true", help="Precompute LLM summaries for new/changed articles")
+    ap.add_argument("--summarize-all", action="store_true",
+                    help="Precompute LLM summaries for every article missing one (backfill)")
+    ap.add_argument("--summary-workers", type=int, default=4, help="Concurrent LLM calls for --summarize")
+    ap.add_argument("--summary-batch-size", type=int, default=100)
     args = ap.parse_args()
 
     init_db()
 
     paths = list(iter_files(args.input))
-    total, files_done = ingest_files(paths, batch_size=args.batch_size)
-    print(f"✅ Done. Upserted {total} records from {files_done} file(s).")
+    started = time.perf_counter()
+    total, files_done, changes = ingest_files(
+        paths, batch_size=args.batch_size, workers=args.workers,
+        commit_rows=args.commit_rows, incremental=args.incremental,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"✅ Done. Upserted {total} records from {files_done} file(s) in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/s).")
+    print(f"🔁 Changes: {len(changes.inserted)} inserted, {len(changes.updated)} updated, "
+          f"{len(changes.deleted)} deleted, {changes.unchanged} unchanged; "
+          f"{len(changes.files_skipped)} unchanged file(s) skipped.")
+    if args.changes_out:
+        with open(args.changes_out, "w", encoding="utf-8") as f:
+            json.dump(changes.to_dict(), f)
+
+    if args.embed or args.embed_rebuild:
+        from app.services.semantic_index import SemanticIndex
+
+        index = SemanticIndex()
+        started = time.perf_counter()
+        if args.embed_rebuild:
+            stats = index.build()
+        else:
+            stats = index.update(changes.inserted, changes.updated, changes.deleted)
+        bump_data_version()  # cached semantic / hybrid search results are stale now
+        print(f"✅ Semantic index: {stats.get('articles', 0)} articles, {stats.get('lists', 0)} IVF lists "
+              f"in {time.perf_counter() - started:.1f}s ({index.directory}).")
+
+    if args.snapshot:
+        # last: its data version must be the final one of this run
+        from app.services.article_snapshot import ArticleSnapshot, SnapshotStore
+
+        store = SnapshotStore()
+        started = time.perf_counter()
+        snap = ArticleSnapshot.from_db()
+        store.write(snap)
+        print(f"✅ Article snapshot v{snap.data_version}: {len(snap)} articles, {snap.nbytes() / 1e6:.1f} MB "
+              f"in {time.perf_counter() - started:.1f}s ({store.directory}).")
+
+    if args.summarize or args.summarize_all:
+        # only this run's new / changed articles can be missing a summary, unless backfilling
+        ids = None if args.summarize_all else changes.inserted + changes.updated
+        generated, skipped = summarize_articles(ids, args.summary_batch_size, args.summary_workers)
+        print(f"✅ Summaries: {generated} generated, {skipped} already up to date.")
 
 if __name__ == "__main__":
     main()
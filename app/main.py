@@ -1,10 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
+from app.database import init_db, async_engine
+
+init_db()  # before the router import: its services read the DB on construction
 from app.routes import news_router
 
-app = FastAPI(title="Contextual News Retrieval System", version="1.0")
-init_db()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # write out buffered events before the worker exits
+    news_router.service.events.close()
+    await news_router.service.geo.aclose()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Contextual News Retrieval System", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
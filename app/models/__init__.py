@@ -1,6 +1,15 @@
 # app/models/__init__.py
-from app.models.article import Article
-from app.models.user_event import UserEvent
+from app.models.article import Article, ArticleCategory
+from app.models.user_event import UserEvent, UserEventCreate, UserEventHourly
+from app.models.llm_summary import LLMSummary
+from app.models.trending import ArticleTrend, ArticleCellEngagement
+from app.models.app_state import AppState
+from app.models.intent_cache import IntentCacheEntry
+from app.models.geocode_cache import GeocodeCacheEntry
+from app.models.ingest_file import IngestFile
 
 
-__all__ = ["Article", "UserEvent"]
+__all__ = [
+    "Article", "ArticleCategory", "UserEvent", "UserEventCreate", "UserEventHourly", "LLMSummary",
+    "ArticleTrend", "ArticleCellEngagement", "AppState", "IntentCacheEntry", "GeocodeCacheEntry", "IngestFile",
+]
@@ -0,0 +1,9 @@
+# app/models/app_state.py
+from sqlmodel import SQLModel, Field
+
+class AppState(SQLModel, table=True):
+    """Small key/value table for service bookkeeping (epochs, counters, watermarks)."""
+    __tablename__ = "app_state"
+
+    key: str = Field(primary_key=True)
+    value: str
@@ -1,27 +1,55 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, func
 from typing import Optional, List
 from datetime import datetime
-import json
+
+class ArticleCategory(SQLModel, table=True):
+    """
+    One row per (article, category). Replaces the old JSON-in-TEXT
+    `category_json` column so a category lookup is an index seek.
+    """
+    __tablename__ = "article_category"
+
+    article_id: str = Field(foreign_key="article.id", primary_key=True)
+    position: int = Field(default=0, primary_key=True)  # keeps the original category order
+    name: str
+
 
 class Article(SQLModel, table=True):
     id: str = Field(primary_key=True)
     title: str
     description: Optional[str] = None
     url: Optional[str] = None
-    publication_date: Optional[datetime] = Field(default=None)
-    source_name: Optional[str] = None
-    category_json: Optional[str] = None
-    relevance_score: Optional[float] = None
+    publication_date: Optional[datetime] = Field(default=None, index=True)
+    source_name: Optional[str] = Field(default=None, index=True)
+    relevance_score: Optional[float] = Field(default=None, index=True)
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    geohash: Optional[str] = Field(default=None, index=True)  # precision 8, for spatial lookups
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow, index=True)
+    content_hash: Optional[str] = None  # of the ingested fields; unchanged rows are skipped on re-ingest
+    source_file: Optional[str] = Field(default=None, index=True)  # ingest file the row last came from
+
+    category_links: List[ArticleCategory] = Relationship(
+        sa_relationship_kwargs={
+            "lazy": "selectin",
+            "cascade": "all, delete-orphan",
+            "order_by": "ArticleCategory.position",
+        }
+    )
 
     @property
     def categories(self) -> List[str]:
-        try:
-            return json.loads(self.category_json or "[]")
-        except Exception:
-            return []
+        return [c.name for c in self.category_links]
 
     @categories.setter
     def categories(self, v: List[str]):
-        self.category_json = json.dumps(v or [])
+        self.category_links = [
+            ArticleCategory(article_id=self.id, position=i, name=name)
+            for i, name in enumerate(v or [])
+        ]
+
+
+# case-insensitive lookups: WHERE lower(col) = :value
+Index("ix_article_source_name_lower", func.lower(Article.source_name))
+Index("ix_article_category_name_lower", func.lower(ArticleCategory.name))
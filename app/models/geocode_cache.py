@@ -0,0 +1,17 @@
+# app/models/geocode_cache.py
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class GeocodeCacheEntry(SQLModel, table=True):
+    """
+    Persistent geocoding answers keyed by the normalized place name.
+    Rows with no coordinates are negative entries ("the geocoder knows no such
+    place") and are retried after `GEOCODE_NEGATIVE_TTL_HOURS`.
+    """
+    __tablename__ = "geocode_cache"
+
+    place: str = Field(primary_key=True)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
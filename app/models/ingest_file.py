@@ -0,0 +1,18 @@
+# app/models/ingest_file.py
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class IngestFile(SQLModel, table=True):
+    """
+    Fingerprint of every file `app.ingest` has read completely. An
+    incremental run skips a file whose size and mtime still match, or whose
+    sha256 still matches when only the mtime moved.
+    """
+    __tablename__ = "ingest_file"
+
+    path: str = Field(primary_key=True)  # absolute path
+    size: int
+    mtime: float
+    sha256: str
+    rows: int = 0
+    ingested_at: datetime = Field(default_factory=datetime.utcnow)
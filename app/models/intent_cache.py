@@ -0,0 +1,19 @@
+# app/models/intent_cache.py
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class IntentCacheEntry(SQLModel, table=True):
+    """
+    Persistent tier of the smart-query intent cache, keyed by a hash of
+    (model, prompt, normalized query). `failed` rows are negative entries:
+    the LLM answered with something unparseable, so the fallback intent is
+    served until the (shorter) negative TTL runs out.
+    """
+    __tablename__ = "intent_cache"
+
+    key: str = Field(primary_key=True)
+    query: str  # normalized query text, for inspection
+    intent_json: Optional[str] = None
+    failed: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
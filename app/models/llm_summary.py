@@ -0,0 +1,17 @@
+# app/models/llm_summary.py
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class LLMSummary(SQLModel, table=True):
+    """
+    Persistent, content-addressed store of LLM-generated article summaries.
+    `key` is a hash of (model name, prompt template, title, description), so an
+    edited article or a new model/prompt simply misses instead of going stale.
+    """
+    __tablename__ = "llm_summary"
+
+    key: str = Field(primary_key=True)
+    model: str
+    summary: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -0,0 +1,29 @@
+# app/models/trending.py
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class ArticleTrend(SQLModel, table=True):
+    """
+    Per-article engagement rollup, updated as events arrive.
+    `decayed_score` is Σ exp(λ·(t_event − epoch)) for the epoch stored in
+    `app_state` (key "trending_epoch"): adding an event is a plain increment,
+    and the current value is decayed_score · exp(−λ·(now − epoch)).
+    """
+    __tablename__ = "article_trend"
+
+    article_id: str = Field(primary_key=True)
+    event_count: int = 0
+    weighted_count: float = 0.0  # view=1, click=2, share=3
+    decayed_score: float = 0.0
+    last_event_at: Optional[datetime] = None
+
+
+class ArticleCellEngagement(SQLModel, table=True):
+    """Events per (article, geohash cell), for the proximity term of trending."""
+    __tablename__ = "article_cell_engagement"
+
+    article_id: str = Field(primary_key=True)
+    cell: str = Field(primary_key=True, index=True)
+    event_count: int = 0
+    weighted_count: float = 0.0
@@ -1,17 +1,51 @@
 # app/models/user_event.py
 from sqlmodel import SQLModel, Field
 from datetime import datetime
+from typing import Literal, Optional
 import uuid
 
 class UserEvent(SQLModel, table=True):
     """
     Stores user interaction events for computing trending news.
     Each record represents a single interaction (view, click, share).
+    On Postgres the table is range-partitioned by month on `timestamp` (which
+    is why it is part of the primary key); see `app.retention`.
     """
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     article_id: str = Field(index=True)
     user_id: str = Field(index=True)
     event_type: str = Field(index=True)  # e.g., "view", "click", "share"
     latitude: float = Field()
     longitude: float = Field()
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, primary_key=True, index=True)
+
+
+class UserEventCreate(SQLModel):
+    """Request body for recording an interaction via the events API."""
+    article_id: str
+    user_id: str
+    event_type: Literal["view", "click", "share"]
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    timestamp: Optional[datetime] = None  # defaults to the time the API received it
+
+
+class UserEventHourly(SQLModel, table=True):
+    """
+    Compacted history: raw events older than the retention horizon, summed per
+    (article, hour, geohash cell). Holds everything the trending rollups need,
+    so `TrendingService.rebuild` gives the same result before and after
+    compaction. `decay_sum` is Σ 2^((t_event − hour) / half-life), i.e. the
+    events' decayed weight relative to the start of their hour.
+    """
+    __tablename__ = "user_event_hourly"
+
+    article_id: str = Field(primary_key=True)
+    hour: datetime = Field(primary_key=True, index=True)
+    cell: str = Field(primary_key=True)
+    event_count: int = 0
+    weighted_count: float = 0.0
+    decay_sum: float = 0.0
+    last_event_at: Optional[datetime] = None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Event log retention: compact raw user events older than a horizon into hourly
+per-article aggregates (`user_event_hourly`) and drop the raw rows.
+Usage:
+    python -m app.retention                      # horizon from EVENT_RETENTION_HOURS (default 168)
+    python -m app.retention --horizon-hours 48
+
+The live trending rollups already contain every event, so compaction doesn't
+change them; `TrendingService.rebuild` reads the hourly aggregates plus the
+remaining raw events and produces the same rollups as before compaction.
+On Postgres the monthly partitions of `userevent` that end before the horizon
+are dropped once emptied, and upcoming months' partitions are created.
+"""
+import argparse, os, time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlmodel import select, delete, func
+from app.database import init_db, get_session, upsert, engine, event_partitions, ensure_event_partitions
+from app.models import UserEvent, UserEventHourly
+from app.services.trending_service import TrendingService, EVENT_WEIGHTS, CELL_PRECISION
+from app.utils import geohash
+
+
+def compact_events(horizon_hours: float, batch_size: int = 10000) -> dict:
+    """Fold raw events older than `horizon_hours` (whole hours only) into hourly aggregates."""
+    half_life = TrendingService().half_life_hours
+    cutoff = (datetime.utcnow() - timedelta(hours=horizon_hours)).replace(minute=0, second=0, microsecond=0)
+    compacted, buckets = 0, 0
+    started = time.perf_counter()
+
+    while True:
+        with get_session() as s:
+            batch = s.exec(
+                select(UserEvent).where(UserEvent.timestamp < cutoff).order_by(UserEvent.timestamp).limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            agg = {}
+            for e in batch:
+                hour = e.timestamp.replace(minute=0, second=0, microsecond=0)
+                cell = geohash.encode(e.latitude, e.longitude, CELL_PRECISION)
+                row = agg.setdefault((e.article_id, hour, cell), [0, 0.0, 0.0, e.timestamp])
+                row[0] += 1
+                row[1] += EVENT_WEIGHTS.get(e.event_type, 1)
+                row[2] += 2.0 ** ((e.timestamp - hour).total_seconds() / 3600 / half_life)
+                row[3] = max(row[3], e.timestamp)
+            rows = [
+                {"article_id": a, "hour": h, "cell": c, "event_count": n,
+                 "weighted_count": w, "decay_sum": d, "last_event_at": last}
+                for (a, h, c), (n, w, d, last) in agg.items()
+            ]
+            # aggregate + delete in one transaction: a crash never double counts
+            for i in range(0, len(rows), 500):
+                stmt = upsert(UserEventHourly).values(rows[i:i + 500])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["article_id", "hour", "cell"],
+                    set_={
+                        "event_count": UserEventHourly.event_count + stmt.excluded.event_count,
+                        "weighted_count": UserEventHourly.weighted_count + stmt.excluded.weighted_count,
+                        "decay_sum": UserEventHourly.decay_sum + stmt.excluded.decay_sum,
+                        "last_event_at": (
+                            func.max(UserEventHourly.last_event_at, stmt.excluded.last_event_at)
+                            if engine.dialect.name == "sqlite"
+                            else func.greatest(UserEventHourly.last_event_at, stmt.excluded.last_event_at)
+                        ),
+                    },
+                )
+                s.exec(stmt)
+            ids = [e.id for e in batch]
+            for i in range(0, len(ids), 500):
+                s.exec(delete(UserEvent).where(UserEvent.id.in_(ids[i:i + 500])))
+            s.commit()
+        compacted += len(batch)
+        buckets += len(rows)
+        print(f"  … compacted {compacted} events (through {batch[-1].timestamp:%Y-%m-%d %H:00})")
+
+    dropped = []
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for name, (_, end) in event_partitions(conn).items():
+                if end <= cutoff:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    dropped.append(name)
+            ensure_event_partitions(conn)
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "events_compacted": compacted,
+        "hourly_rows_written": buckets,
+        "partitions_dropped": dropped,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compact old user events into hourly aggregates")
+    ap.add_argument("--horizon-hours", type=float, default=float(os.getenv("EVENT_RETENTION_HOURS", "168")),
+                    help="Keep raw events newer than this; older ones are compacted")
+    ap.add_argument("--batch-size", type=int, default=10000)
+    args = ap.parse_args()
+
+    init_db()
+    result = compact_events(args.horizon_hours, batch_size=args.batch_size)
+    print(f"✅ Compacted {result['events_compacted']} events older than {result['cutoff']} "
+          f"into {result['hourly_rows_written']} hourly row updates in {result['elapsed_s']}s.")
+    if result["partitions_dropped"]:
+        print(f"🧹 Dropped partitions: {', '.join(result['partitions_dropped'])}")
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,255 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from sqlmodel import select
+from app.models import UserEventCreate
 from app.services.news_service import NewsService
 from app.services.intent_service import IntentService
+from app.services.response_cache import ResponseCache
+from app.utils.text_utils import tokenize
+from app.utils.cursor import decode_cursor, encode_cursor
+import asyncio
+import json
 import logging
 
 router = APIRouter(prefix="/api/news", tags=["News"])
 service = NewsService()
 intent_service = IntentService()
+# keyed by the version of the article snapshot the rankings run on
+response_cache = ResponseCache(version_source=service.snapshots.aversion if service.snapshots.enabled else None)
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
 )
 
+def render_options(
+    summaries: bool = Query(True, description="Include llm_summary (false: no LLM work at all)"),
+    fields: Optional[str] = Query(None, description="Comma-separated article fields to return, e.g. title,url"),
+) -> dict:
+    return {
+        "summaries": summaries,
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+    }
+
+def page_options(
+    limit: int = Query(5, ge=1, le=100, description="Articles per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+) -> dict:
+    return {"limit": limit, "cursor": cursor}
+
+def read_cursor(page: dict, scope: str) -> Optional[dict]:
+    """Keyset state of `cursor`; 400 if it is malformed or was issued for other parameters."""
+    try:
+        return decode_cursor(page["cursor"], scope)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+def paged(articles: list, after: Optional[dict], scope: str) -> dict:
+    return {"articles": articles, "count": len(articles), "next_cursor": encode_cursor(after, scope)}
+
+async def cached(request: Request, params: dict, compute) -> Response:
+    """Serve through the response cache, with ETag / If-None-Match revalidation."""
+    status, etag, body, cache = await response_cache.serve(
+        request.url.path, params, compute, request.headers.get("if-none-match")
+    )
+    headers = {"ETag": etag, "X-Cache": cache}
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cache_params(opts: dict, **params) -> dict:
+    return {**params, "summaries": opts["summaries"], "fields": tuple(opts["fields"]) if opts["fields"] else None}
+
+STREAM_TYPES = {"application/x-ndjson": "ndjson", "text/event-stream": "sse"}
+
+def stream_format(request: Request) -> Optional[str]:
+    """"ndjson" / "sse" when the client asked for a streamed response."""
+    accept = request.headers.get("accept", "")
+    return next((fmt for media, fmt in STREAM_TYPES.items() if media in accept), None)
+
+def streamed(fmt: str, events, end: dict) -> StreamingResponse:
+    """
+    One event per NDJSON line or SSE message, closed by
+    {"type": "end", "count": ..., "next_cursor": ...}. Not cached.
+    """
+    def encode(event: dict) -> bytes:
+        data = json.dumps(jsonable_encoder(event), ensure_ascii=False, separators=(",", ":"))
+        if fmt == "sse":
+            return f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8")
+        return (data + "\n").encode("utf-8")
+
+    async def body():
+        count = 0
+        async for event in events:
+            count += event["type"] == "article"
+            yield encode(event)
+        yield encode({"type": "end", "count": count, **end})
+
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/event-stream"
+    # no proxy buffering: each event should reach the client as it is written
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def respond(request: Request, params: dict, scope: str, opts: dict, page) -> Response:
+    """
+    A page of a ranking: streamed (articles first, summaries as they finish)
+    when the client accepts NDJSON or SSE, else JSON through the response cache.
+    `page()` returns (candidates, keyset of the next page).
+    """
+    fmt = stream_format(request)
+    if fmt:
+        candidates, after = await page()
+        return streamed(fmt, service.astream_render(candidates, **opts), {"next_cursor": encode_cursor(after, scope)})
+    async def compute():
+        candidates, after = await page()
+        return paged(await service.arender(candidates, **opts), after, scope)
+    return await cached(request, params, compute)
+
+# Cursors are scoped to the path + ranking parameters they were issued for.
+
 @router.get("/category")
-def by_category(category: str = Query(...)):
-    return {"articles": service.rank_category(category), "count": 5}
+async def by_category(
+    request: Request,
+    category: str = Query(...),
+    opts: dict = Depends(render_options),
+    page: dict = Depends(page_options),
+):
+    # category / source match case-insensitively
+    scope = f"category:{category.lower()}"
+    after = read_cursor(page, scope)
+    return await respond(request, cache_params(opts, category=category.lower(), **page), scope, opts,
+                         lambda: service.acategory_page(category, page["limit"], after))
 
 @router.get("/source")
-def by_source(source: str = Query(...)):
-    return {"articles": service.rank_source(source), "count": 5}
+async def by_source(
+    request: Request,
+    source: str = Query(...),
+    opts: dict = Depends(render_options),
+    page: dict = Depends(page_options),
+):
+    scope = f"source:{source.lower()}"
+    after = read_cursor(page, scope)
+    return await respond(request, cache_params(opts, source=source.lower(), **page), scope, opts,
+                         lambda: service.asource_page(source, page["limit"], after))
 
 @router.get("/score")
-def by_score(threshold: float = 0.7):
-    return {"articles": service.rank_score(threshold), "count": 5}
+async def by_score(
+    request: Request,
+    threshold: float = 0.7,
+    opts: dict = Depends(render_options),
+    page: dict = Depends(page_options),
+):
+    scope = f"score:{threshold!r}"
+    after = read_cursor(page, scope)
+    return await respond(request, cache_params(opts, threshold=threshold, **page), scope, opts,
+                         lambda: service.ascore_page(threshold, page["limit"], after))
 
 @router.get("/search")
-def search(query: str = Query(...)):
-    return {"articles": service.rank_search(query), "count": 5}
+async def search(
+    request: Request,
+    query: str = Query(...),
+    mode: Optional[Literal["lexical", "semantic", "hybrid"]] = Query(None, description="Default: SEARCH_MODE"),
+    opts: dict = Depends(render_options),
+    page: dict = Depends(page_options),
+):
+    # ranking only sees the query's tokens
+    tokens, mode = " ".join(tokenize(query)), mode or service.search_mode
+    scope = f"search:{mode}:{tokens}"
+    after = read_cursor(page, scope)
+    return await respond(request, cache_params(opts, query=tokens, mode=mode, **page), scope, opts,
+                         lambda: service.asearch_page(query, page["limit"], mode, after))
 
 @router.get("/nearby")
-def nearby(lat: float, lon: float, radius: float = 10.0):
-    return {"articles": service.rank_nearby(lat, lon, radius), "count": 5}
+async def nearby(
+    request: Request,
+    lat: float,
+    lon: float,
+    radius: float = 10.0,
+    nearest: bool = Query(False, description="Return the nearest articles, ignoring radius"),
+    opts: dict = Depends(render_options),
+    page: dict = Depends(page_options),
+):
+    # rounded for the cache key and cursor scope only: distances and the radius use the exact point
+    qlat, qlon = response_cache.quantize(lat), response_cache.quantize(lon)
+    scope = f"nearby:{qlat}:{qlon}:{radius}:{nearest}"
+    after = read_cursor(page, scope)
+    return await respond(request, cache_params(opts, lat=qlat, lon=qlon, radius=radius, nearest=nearest, **page), scope, opts,
+                         lambda: service.anearby_page(lat, lon, radius, page["limit"], nearest, after))
+
+@router.post("/events", status_code=202)
+def record_event(event: UserEventCreate):
+    """Record one interaction (view / click / share). Written asynchronously in batches."""
+    accepted = service.events.add([event.model_dump()])
+    return {"accepted": accepted}
+
+@router.post("/events/bulk", status_code=202)
+def record_events(events: List[UserEventCreate] = Body(..., max_length=10000)):
+    """Record up to 10k interactions in one request."""
+    accepted = service.events.add([e.model_dump() for e in events])
+    return {"accepted": accepted}
+
+@router.get("/events/stats")
+def event_stats():
+    return service.events.stats()
+
+@router.get("/cache/stats")
+def cache_stats():
+    return {
+        "summary_cache": service.llm.cache.stats(),
+        "intent_cache": intent_service.stats(),
+        "geocode_cache": service.geo.stats(),
+        "response_cache": response_cache.stats(),
+        "article_snapshot": service.snapshots.stats(),
+        "result_sets": service.result_sets.stats(),
+    }
+
+@router.get("/search-index/stats")
+def search_index_stats():
+    return {**service.search_index.stats(), "semantic": service.semantic_index.stats()}
+
+@router.post("/search-index/rebuild")
+def search_index_rebuild():
+    service.search_index.rebuild()
+    return service.search_index.stats()
 
 @router.post("/query")
-async def smart_query(req: dict):
+async def smart_query(req: dict, opts: dict = Depends(render_options)):
     user_query = req.get("query")
     if not user_query or not isinstance(user_query, str):
         return {"error": "Query text is required (string)"}
 
-    intent_info = intent_service.extract_intent(user_query)
-    intents = intent_info.get("intent", [])
-    entities = intent_info.get("entities", [])
-    location = intent_info.get("location")
-    source = intent_info.get("source")
-
-    logging.info(f"User Query: {user_query}")
-    logging.info(f"Detected Intent(s): {intents}")
-    logging.info(f"Detected Entities: {entities}")
-    logging.info(f"Detected Location: {location}")
-    logging.info(f"Detected Source: {source}")
-
-    logic_used = []
-    # Step 1: start with search
-    base = service.rank_search(user_query)
-    logic_used.append("Search")
-
-    # Step 2: filter by category if present
-    category = entities[0] if entities else None
-    if "category" in intents and category:
-        base = [a for a in base if any(category.lower() == c.lower() for c in a.get("category", []))]
-        logic_used.append(f"Category({category})")
-
-    # Step 3: filter by source if present (liberal filter)
-    source = next((e for e in entities if "news" in e.lower() or "times" in e.lower()), None)
-    if "source" in intents and source:
-        filtered_by_source = [a for a in base if a.get("source_name") and source.lower() in a["source_name"].lower()]
-        if filtered_by_source:
-            base = filtered_by_source
-            logic_used.append(f"Source({source})")
-        else:
-            # if no match by source, skip this filtering
-            logic_used.append(f"Source({source}) filter skipped (no match)")
-
-    # Step 4: if location asked, re-rank by nearby + recency using subset
-    if "nearby" in intents and location:
-        base = service.filter_based_on_nearby_location_and_recency_subset(
-            user_query, location, base_articles=base
-        )
-        logic_used.append(f"Nearby({location})")
-
-    # Build logic_used string
-    logic_str = " + ".join(logic_used)
-
-    logging.info(f"✅ Retrieval Logic Used: {logic_str}")
-
-    return {
-        "query": user_query,
-        "intent": intents,
-        "logic_used": logic_str,
-        "count": len(base),
-        "articles": base
-    }
-
+    return await service.asmart_query(user_query, intent_service.aextract_intent, **opts)
 
 
 @router.get("/trending")
 async def get_trending_news(
+    request: Request,
     lat: float = Query(..., description="User latitude"),
     lon: float = Query(..., description="User longitude"),
-    limit: int = Query(5, description="Max number of articles to return"),
-    simulate: bool = Query(False, description="Simulate events if no data")
+    limit: int = Query(5, ge=1, le=100, description="Max number of articles to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    simulate: bool = Query(False, description="Simulate events if no data"),
+    opts: dict = Depends(render_options),
 ):
     """
     Returns location-based trending news feed.
     If `simulate=true`, auto-generates sample user events when no data exists.
     """
     # 🧩 Optional simulation for first-time setup / dev
-    from app.database import get_session
-    from app.models import UserEvent
-    with get_session() as s:
-        total_events = s.query(UserEvent).count()
-
-    if simulate and total_events == 0:
-        service.simulate_user_events(num_events=500)
-
-    articles = service.compute_trending_feed(lat, lon, limit)
-    return {"count": len(articles), "articles": articles}
\ No newline at end of file
+    if simulate:
+        from app.database import get_async_session
+        from app.models import UserEvent
+        async with get_async_session() as s:
+            has_events = (await s.exec(select(UserEvent.id).limit(1))).first() is not None
+        if not has_events:
+            await asyncio.to_thread(service.simulate_user_events, num_events=500)
+
+    scope = f"trending:{lat}:{lon}"
+    after = read_cursor({"cursor": cursor}, scope)
+    fmt = stream_format(request)
+    if fmt:
+        top, nxt = await service.atrending_page(lat, lon, limit, after)
+        return streamed(fmt, service.astream_render(top, **opts), {"next_cursor": encode_cursor(nxt, scope)})
+    feed = await service.acompute_trending_feed(lat, lon, limit, after=after, **opts)
+    return paged(feed["articles"], feed["next"], scope)
\ No newline at end of file
@@ -0,0 +1,478 @@
+# app/services/article_snapshot.py
+
+import asyncio
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+from sqlmodel import select
+from app.database import engine, get_session, data_version
+from app.models import Article, ArticleCategory
+from app.utils import geohash
+
+NO_DATE = np.iinfo(np.int64).min
+
+# every column is one .npy file per generation
+COLUMNS = (
+    "ids", "published", "relevance", "latitude", "longitude", "source",
+    "source_names", "category_indptr", "category_codes", "category_names",
+    "by_date", "by_score", "neg_score",
+    "source_keys", "source_offsets", "source_rows",
+    "category_keys", "category_offsets", "category_rows",
+    "geohash_sorted", "geohash_rows",
+)
+
+
+def default_snapshot_dir() -> str:
+    """`ARTICLE_SNAPSHOT_DIR`, else `<db name>.snapshot/` next to a SQLite database."""
+    configured = os.getenv("ARTICLE_SNAPSHOT_DIR")
+    if configured:
+        return configured
+    if engine.dialect.name == "sqlite" and engine.url.database:
+        return os.path.splitext(os.path.abspath(engine.url.database))[0] + ".snapshot"
+    return os.path.abspath("article_snapshot")
+
+
+def epoch_of(iso: str) -> int:
+    """Epoch seconds of a cursor's ISO date (naive = UTC), floored like the snapshot's dates."""
+    dt = datetime.fromisoformat(iso)
+    if not dt.tzinfo:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return math.floor(dt.timestamp())
+
+
+def _postings(keys: np.ndarray, n_keys: int, rows: np.ndarray):
+    """Group `rows` (already in the wanted order) by key: (offsets, rows), stable within a key."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets, rows[order].astype(np.int32)
+
+
+def _lowered(names: np.ndarray):
+    """(distinct lower-cased names, key index of each name): lookups are case-insensitive."""
+    keys, key_of = np.unique(np.char.lower(names.astype(str)), return_inverse=True)
+    return keys, key_of.astype(np.int64)
+
+
+class IdView:
+    """Article ids of some snapshot rows, decoded only when indexed."""
+
+    __slots__ = ("ids", "rows")
+
+    def __init__(self, ids: np.ndarray, rows: np.ndarray):
+        self.ids, self.rows = ids, rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i) -> str:
+        return self.ids[self.rows[i]].decode("utf-8")
+
+
+class ArticleSnapshot:
+    """
+    Read-only columnar copy of what ranking needs from the article table.
+
+    One row per article, ordered by id (UTF-8 bytes, so an id lookup is a
+    binary search). Dates are int64 epoch seconds (`NO_DATE` when missing),
+    scores and coordinates float64 (NaN when missing), and source / category
+    are int codes into small name tables (articles have several categories:
+    CSR `category_indptr` / `category_codes`).
+
+    Next to the columns it keeps the orders the rankings walk: all rows by
+    date and by score, per lower-cased source / category the rows by date,
+    and the rows with coordinates by geohash. A ranking is then a slice or a
+    binary search plus a gather; no ORM objects, no queries.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: int, built_at: float):
+        self.columns = columns
+        self.data_version = version
+        self.built_at = built_at
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self._source_key = {str(k): i for i, k in enumerate(self.source_keys)}
+        self._category_key = {str(k): i for i, k in enumerate(self.category_keys)}
+        self.n_scored = int(np.searchsorted(self.neg_score, np.inf, side="right"))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- building -------------------------------------------------------------
+
+    @classmethod
+    def from_db(cls, batch_size: int = 20000) -> "ArticleSnapshot":
+        # read the version first: a commit during the scan bumps it again
+        version = data_version()
+        ids, published, relevance, lat, lon, sources, hashes = [], [], [], [], [], [], []
+        last_id = ""
+        while True:
+            with get_session() as s:
+                rows = s.exec(
+                    select(Article.id, Article.publication_date, Article.relevance_score, Article.latitude,
+                           Article.longitude, Article.source_name, Article.geohash)
+                    .where(Article.id > last_id).order_by(Article.id).limit(batch_size)
+                ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for a_id, date, score, a_lat, a_lon, source, gh in rows:
+                ids.append(a_id)
+                published.append(date)
+                relevance.append(score)
+                lat.append(a_lat)
+                lon.append(a_lon)
+                sources.append(source)
+                hashes.append(gh)
+
+        categories: Dict[str, List[str]] = {}
+        last_id = ""
+        while True:
+            with get_session() as s:
+                rows = s.exec(
+                    select(ArticleCategory.article_id, ArticleCategory.position, ArticleCategory.name)
+                    .where(ArticleCategory.article_id > last_id)
+                    .order_by(ArticleCategory.article_id, ArticleCategory.position).limit(batch_size)
+                ).all()
+            if not rows:
+                break
+            if len(rows) == batch_size and rows[0][0] != rows[-1][0]:
+                # the page may end inside an article's categories: read that article again next time
+                cut = rows[-1][0]
+                rows = [r for r in rows if r[0] != cut]
+            last_id = rows[-1][0]
+            for a_id, _, name in rows:
+                categories.setdefault(a_id, []).append(name)
+
+        return cls.from_records(ids, published, relevance, lat, lon, sources, hashes, categories, version)
+
+    @classmethod
+    def from_records(
+        cls,
+        ids: Sequence[str],
+        published: Sequence[Optional[datetime]],
+        relevance: Sequence[Optional[float]],
+        latitude: Sequence[Optional[float]],
+        longitude: Sequence[Optional[float]],
+        sources: Sequence[Optional[str]],
+        hashes: Sequence[Optional[str]],
+        categories: Dict[str, List[str]],
+        version: int = 0,
+    ) -> "ArticleSnapshot":
+        n = len(ids)
+        id_bytes = np.array([i.encode("utf-8") for i in ids], dtype="S") if n else np.array([], dtype="S1")
+        order = np.argsort(id_bytes, kind="stable")
+        take = lambda values: [values[i] for i in order]
+
+        c: Dict[str, np.ndarray] = {"ids": id_bytes[order]}
+        c["published"] = np.array(
+            [NO_DATE if d is None else int((d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp())
+             for d in take(published)], dtype=np.int64)
+        as_float = lambda values: np.array([np.nan if v is None else v for v in take(values)], dtype=np.float64)
+        c["relevance"], c["latitude"], c["longitude"] = as_float(relevance), as_float(latitude), as_float(longitude)
+
+        source_list = take(sources)
+        names = sorted({s for s in source_list if s is not None})
+        code = {s: i for i, s in enumerate(names)}
+        c["source"] = np.array([code.get(s, -1) for s in source_list], dtype=np.int32)
+        c["source_names"] = np.array(names, dtype=str)
+
+        per_article = [categories.get(i, []) for i in take(ids)]
+        cat_names = sorted({name for names_ in per_article for name in names_})
+        cat_code = {name: i for i, name in enumerate(cat_names)}
+        c["category_indptr"] = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.array([len(x) for x in per_article], dtype=np.int64), out=c["category_indptr"][1:])
+        c["category_codes"] = np.array([cat_code[name] for x in per_article for name in x], dtype=np.int32)
+        c["category_names"] = np.array(cat_names, dtype=str)
+
+        rows = np.arange(n, dtype=np.int32)
+        # newest first, undated last
+        date_key = np.where(c["published"] == NO_DATE, np.iinfo(np.int64).max, -c["published"])
+        c["by_date"] = np.argsort(date_key, kind="stable").astype(np.int32)
+        # best first, unscored last (NaN sorts last)
+        c["by_score"] = np.argsort(-c["relevance"], kind="stable").astype(np.int32)
+        c["neg_score"] = -c["relevance"][c["by_score"]]
+
+        # source: by-date rows grouped by lower-cased name
+        c["source_keys"], key_of = _lowered(c["source_names"])
+        src = c["source"][c["by_date"]]
+        known = src >= 0
+        c["source_offsets"], c["source_rows"] = _postings(key_of[src[known]], len(c["source_keys"]), c["by_date"][known])
+
+        # category: (article, category) pairs in by-date article order, grouped by lower-cased name
+        c["category_keys"], key_of = _lowered(c["category_names"])
+        n_keys = max(len(c["category_keys"]), 1)
+        pair_rows = np.repeat(rows.astype(np.int64), np.diff(c["category_indptr"]))
+        # an article listing a category twice (in different case) is in its list once
+        pairs = np.unique(pair_rows * n_keys + key_of[c["category_codes"]])
+        pair_rows, pair_keys = pairs // n_keys, pairs % n_keys
+        rank = np.empty(n, dtype=np.int64)
+        rank[c["by_date"]] = np.arange(n)
+        by_rank = np.argsort(rank[pair_rows], kind="stable")
+        c["category_offsets"], c["category_rows"] = _postings(
+            pair_keys[by_rank], len(c["category_keys"]), pair_rows[by_rank])
+
+        gh = np.array([(h or "").encode("ascii") for h in take(hashes)], dtype="S12") if n else np.array([], dtype="S12")
+        has_geo = (gh != b"") & ~np.isnan(c["latitude"]) & ~np.isnan(c["longitude"])
+        geo_rows = rows[has_geo]
+        geo_order = np.argsort(gh[has_geo], kind="stable")
+        c["geohash_sorted"] = gh[has_geo][geo_order]
+        c["geohash_rows"] = geo_rows[geo_order]
+        return cls(c, version, time.time())
+
+    # --- lookups --------------------------------------------------------------
+
+    def rows_of(self, ids: Sequence[str]) -> np.ndarray:
+        """Row of each id, -1 where the article isn't in the snapshot."""
+        if not len(ids) or not len(self.ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        wanted = np.array([i.encode("utf-8") for i in ids], dtype="S")
+        pos = np.searchsorted(self.ids, wanted)
+        clipped = np.minimum(pos, len(self.ids) - 1)
+        return np.where(self.ids[clipped] == wanted, clipped, -1)
+
+    def contains(self, ids: Sequence[str]) -> Set[str]:
+        rows = self.rows_of(ids)
+        return {i for i, r in zip(ids, rows.tolist()) if r >= 0}
+
+    def id_at(self, row: int) -> str:
+        return self.ids[row].decode("utf-8")
+
+    def date_at(self, row: int) -> Optional[datetime]:
+        # naive UTC, like the ORM rows
+        v = int(self.published[row])
+        return None if v == NO_DATE else datetime.fromtimestamp(v, timezone.utc).replace(tzinfo=None)
+
+    def epochs(self, rows: np.ndarray) -> np.ndarray:
+        """Publication dates as float epoch seconds, NaN when missing (the `to_epoch_seconds` convention)."""
+        p = self.published[rows]
+        return np.where(p == NO_DATE, np.nan, p.astype(np.float64))
+
+    def records(self, rows: Iterable[int]) -> List[tuple]:
+        """(id, relevance_score, publication_date, latitude, longitude, source_name) per row."""
+        nan_none = lambda v: None if v != v else v
+        out = []
+        for r in rows:
+            src = int(self.source[r])
+            out.append((
+                self.id_at(r),
+                nan_none(float(self.relevance[r])),
+                self.date_at(r),
+                nan_none(float(self.latitude[r])),
+                nan_none(float(self.longitude[r])),
+                str(self.source_names[src]) if src >= 0 else None,
+            ))
+        return out
+
+    # Keyset paging: the ordered row lists sort by (date or score, id), so the
+    # rows after a cursor's (value, id) start at a binary search.
+
+    def _date_key(self, row) -> tuple:
+        p = int(self.published[row])
+        return (p == NO_DATE, 0 if p == NO_DATE else -p, self.ids[row])
+
+    def _score_key(self, row) -> tuple:
+        v = float(self.relevance[row])
+        return (v != v, 0.0 if v != v else -v, self.ids[row])
+
+    def _page(self, rows: np.ndarray, limit: int, after: Optional[dict]) -> np.ndarray:
+        """Up to `limit` of a by-date row list, starting after the cursor's (date, id)."""
+        start = 0
+        if after:
+            d = after.get("d")
+            target = (d is None, 0 if d is None else -epoch_of(d), after["i"].encode("utf-8"))
+            start = bisect.bisect_right(rows, target, key=self._date_key)
+        return rows[start:start + limit]
+
+    def in_category(self, category: str, limit: int, after: Optional[dict] = None) -> np.ndarray:
+        """Newest `limit` articles in `category` (case-insensitive)."""
+        k = self._category_key.get(category.lower())
+        if k is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._page(self.category_rows[self.category_offsets[k]:self.category_offsets[k + 1]], limit, after)
+
+    def from_source(self, source: str, limit: int, after: Optional[dict] = None) -> np.ndarray:
+        """Newest `limit` articles from `source` (case-insensitive)."""
+        k = self._source_key.get(source.lower())
+        if k is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._page(self.source_rows[self.source_offsets[k]:self.source_offsets[k + 1]], limit, after)
+
+    def above_score(self, threshold: float, limit: int, after: Optional[dict] = None) -> np.ndarray:
+        """Best-scored `limit` articles with score >= threshold (a missing score counts as 0)."""
+        hi = int(np.searchsorted(self.neg_score, -threshold, side="right"))
+        start = 0
+        if after:
+            s = after.get("s")
+            target = (s is None, 0.0 if s is None else -float(s), after["i"].encode("utf-8"))
+            start = bisect.bisect_right(self.by_score, target, key=self._score_key)
+        rows = self.by_score[start:max(start, min(hi, start + limit))]
+        if threshold <= 0 and len(rows) < limit:
+            tail = max(start, self.n_scored)
+            rows = np.concatenate([rows, self.by_score[tail:tail + limit - len(rows)]])
+        return rows
+
+    def category_names_of(self, ids: Sequence[str]) -> Dict[str, List[str]]:
+        out: Dict[str, List[str]] = {}
+        for a_id, r in zip(ids, self.rows_of(ids).tolist()):
+            if r >= 0:
+                codes = self.category_codes[self.category_indptr[r]:self.category_indptr[r + 1]]
+                if len(codes):
+                    out[a_id] = [str(self.category_names[c]) for c in codes]
+        return out
+
+    def geohash_candidates(self, cells: Optional[Sequence[str]]) -> np.ndarray:
+        """Rows whose geohash starts with one of `cells` (None: every row with coordinates)."""
+        if cells is None:
+            return self.geohash_rows
+        parts = []
+        for cell in cells:
+            lo = np.searchsorted(self.geohash_sorted, cell.encode("ascii"), side="left")
+            hi = np.searchsorted(self.geohash_sorted, (cell + geohash.PREFIX_END).encode("ascii"), side="left")
+            parts.append(self.geohash_rows[lo:hi])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in self.columns.values()))
+
+
+class SnapshotStore:
+    """
+    Holds the current `ArticleSnapshot` and swaps in a new one when ingest
+    changes the data.
+
+    The data version (bumped by ingest) is re-read at most every
+    `ARTICLE_SNAPSHOT_CHECK_S` seconds. On a change the store first looks for
+    a snapshot file of that version in `ARTICLE_SNAPSHOT_DIR` (written by
+    `ingest --snapshot`; memory-mapped unless ARTICLE_SNAPSHOT_MMAP=0) and
+    otherwise rebuilds from the database; if a concurrent `write` removed the
+    file's arrays, the current snapshot stays until the next check. Readers
+    keep the snapshot object they got, so a swap never changes data under a
+    running ranking.
+    ARTICLE_SNAPSHOT=0 turns it off (rankings query the database).
+    """
+
+    def __init__(self, directory: Optional[str] = None, check_s: Optional[float] = None):
+        self.enabled = os.getenv("ARTICLE_SNAPSHOT", "1") not in ("0", "false", "off")
+        self.directory = directory or default_snapshot_dir()
+        self.mmap = os.getenv("ARTICLE_SNAPSHOT_MMAP", "1") not in ("0", "false", "off")
+        self.check_s = check_s if check_s is not None else float(os.getenv("ARTICLE_SNAPSHOT_CHECK_S", "2"))
+        self._snapshot: Optional[ArticleSnapshot] = None
+        self._source = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def _due(self) -> bool:
+        return self._snapshot is None or time.monotonic() - self._last_check >= self.check_s
+
+    def refresh(self, force: bool = False) -> Optional[ArticleSnapshot]:
+        """Swap in the snapshot of the current data version if it changed."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if not force and not self._due():
+                return self._snapshot
+            self._last_check = time.monotonic()
+            version = data_version()
+            if force or self._snapshot is None or self._snapshot.data_version != version:
+                started = time.perf_counter()
+                try:
+                    snap = self._load_file(version)
+                except FileNotFoundError as e:
+                    # a writer replaced the generation between the manifest and its arrays
+                    if self._snapshot is not None:
+                        print(f"[Snapshot] {e}; keeping v{self._snapshot.data_version} until the next check")
+                        return self._snapshot
+                    snap = None
+                self._source = "file" if snap is not None else "db"
+                if snap is None:
+                    snap = ArticleSnapshot.from_db()
+                self._snapshot = snap
+                print(f"📸 Article snapshot v{snap.data_version}: {len(snap)} articles from {self._source} "
+                      f"in {time.perf_counter() - started:.2f}s")
+            return self._snapshot
+
+    def current(self) -> Optional[ArticleSnapshot]:
+        if self.enabled and self._due():
+            self.refresh()
+        return self._snapshot
+
+    async def acurrent(self) -> Optional[ArticleSnapshot]:
+        if self.enabled and self._due():
+            await asyncio.to_thread(self.refresh)
+        return self._snapshot
+
+    async def aversion(self) -> int:
+        """Data version of the snapshot rankings are served from."""
+        snap = await self.acurrent()
+        return snap.data_version if snap is not None else 0
+
+    # --- files ----------------------------------------------------------------
+
+    def _load_file(self, version: int) -> Optional[ArticleSnapshot]:
+        """The snapshot file of `version`, if there is one; FileNotFoundError if its arrays were removed."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest.get("data_version") != version:
+            return None
+        gen = manifest["generation"]
+        columns = {
+            name: np.load(os.path.join(self.directory, f"{name}-{gen}.npy"), mmap_mode="r" if self.mmap else None)
+            for name in COLUMNS
+        }
+        return ArticleSnapshot(columns, version, manifest["built_at"])
+
+    def write(self, snap: ArticleSnapshot) -> str:
+        """Write `snap` as a new generation and point the manifest at it (atomic rename)."""
+        os.makedirs(self.directory, exist_ok=True)
+        gen = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+        for name in COLUMNS:
+            np.save(os.path.join(self.directory, f"{name}-{gen}.npy"), np.asarray(snap.columns[name]))
+        manifest = {
+            "generation": gen,
+            "data_version": snap.data_version,
+            "articles": len(snap),
+            "built_at": snap.built_at,
+        }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+        # older generations: processes that still map them keep their (unlinked) files
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy") and not name.endswith(f"-{gen}.npy"):
+                os.remove(os.path.join(self.directory, name))
+        return gen
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        if snap is None:
+            return {"enabled": self.enabled, "loaded": False, "directory": self.directory}
+        return {
+            "enabled": self.enabled,
+            "loaded": True,
+            "source": self._source,
+            "mmap": self._source == "file" and self.mmap,
+            "data_version": snap.data_version,
+            "articles": len(snap),
+            "sources": len(snap.source_names),
+            "categories": len(snap.category_names),
+            "bytes": snap.nbytes(),
+            "built_at": snap.built_at,
+            "directory": self.directory,
+        }
@@ -0,0 +1,125 @@
+# app/services/event_buffer.py
+
+import os
+import time
+import uuid
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from app.database import get_session
+from app.models import UserEvent
+
+
+class EventBuffer:
+    """
+    Write-behind buffer for user events.
+
+    The API appends events in memory and returns immediately; a background
+    thread writes them with one multi-row INSERT per flush (every
+    `flush_interval` seconds, or as soon as `max_batch` events are waiting)
+    and folds the same batch into the trending rollups in that transaction.
+    A failed flush keeps the batch for the next one.
+    If the writer falls behind by more than `max_pending` events, callers
+    flush inline (backpressure) instead of growing the buffer without bound.
+    """
+
+    def __init__(
+        self,
+        trending=None,
+        max_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.trending = trending
+        self.max_batch = max_batch or int(os.getenv("EVENT_BUFFER_BATCH", "1000"))
+        self.flush_interval = flush_interval or float(os.getenv("EVENT_BUFFER_FLUSH_S", "1.0"))
+        self.max_pending = max_pending or int(os.getenv("EVENT_BUFFER_MAX_PENDING", "100000"))
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._stats = {"accepted": 0, "written": 0, "flushes": 0, "failed_flushes": 0, "last_flush_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, events: Iterable[Dict]) -> int:
+        """Queue events (dicts with UserEvent fields); ids and timestamps are filled in."""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": e.get("id") or str(uuid.uuid4()),
+                "article_id": e["article_id"],
+                "user_id": e["user_id"],
+                "event_type": e["event_type"],
+                "latitude": e["latitude"],
+                "longitude": e["longitude"],
+                "timestamp": e.get("timestamp") or now,
+            }
+            for e in events
+        ]
+        with self._lock:
+            self._pending.extend(rows)
+            self._stats["accepted"] += len(rows)
+            backlog = len(self._pending)
+        if backlog >= self.max_pending:
+            self.flush()
+        elif backlog >= self.max_batch:
+            self._wakeup.set()
+        return len(rows)
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                # events and their rollup increments commit together: a failed
+                # rollup rolls the INSERT back too, so the retry can't double-count
+                with get_session() as s:
+                    for i in range(0, len(batch), self.max_batch):
+                        s.execute(insert(UserEvent), batch[i:i + self.max_batch])
+                    if self.trending is not None:
+                        self.trending.record(batch, session=s)
+                    s.commit()
+            except Exception as e:
+                print(f"[EventBuffer ERROR] {e}")
+                with self._lock:
+                    # keep the events for the next attempt
+                    self._pending[:0] = batch
+                    self._stats["failed_flushes"] += 1
+                return 0
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["flushes"] += 1
+                self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return len(batch)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # the writer must outlive any one bad flush
+                print(f"[EventBuffer ERROR] writer: {e}")
+                with self._lock:
+                    self._stats["failed_flushes"] += 1
+
+    def close(self):
+        """Stop the writer thread and flush what is left."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending)}
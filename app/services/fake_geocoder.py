@@ -0,0 +1,50 @@
+# app/services/fake_geocoder.py
+
+import asyncio
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+class FakeGeocoderTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Local stand-in for the OpenCage API, plugged into GeoService's HTTP
+    clients as a transport. Answers `?q=` in OpenCage's response format after
+    a configurable latency, so caching and pooling can be exercised (and
+    benchmarked) without network access or an API key.
+
+    With `places` only those names resolve (anything else gets an empty
+    result, i.e. a negative answer); without it every query resolves to a
+    deterministic point derived from its hash.
+    """
+
+    def __init__(self, latency_s: float = 0.05, places: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.latency_s = latency_s
+        self.places = places
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.calls += 1
+        q = request.url.params.get("q", "")
+        if self.places is not None:
+            coords = self.places.get(q)
+        else:
+            h = int(hashlib.sha1(q.encode("utf-8")).hexdigest()[:8], 16)
+            coords = (8.0 + (h % 27000) / 1000, 68.0 + (h // 27000 % 29000) / 1000)
+        results = [{"geometry": {"lat": coords[0], "lng": coords[1]}}] if coords else []
+        return httpx.Response(200, content=json.dumps({"results": results}).encode("utf-8"),
+                              headers={"content-type": "application/json"}, request=request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.latency_s)
+        return self._respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency_s)
+        return self._respond(request)
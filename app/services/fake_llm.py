@@ -0,0 +1,46 @@
+# app/services/fake_llm.py
+
+import asyncio
+import time
+import hashlib
+import threading
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Local stand-in for `genai.GenerativeModel` with configurable latency.
+    Returns a deterministic "summary" so cache and batching behaviour can be
+    exercised (and benchmarked) without network access or an API key.
+    """
+
+    def __init__(self, latency_s: float = 0.2, fail_every: int = 0):
+        self.latency_s = latency_s
+        self.fail_every = fail_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next_call(self) -> int:
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def _respond(self, prompt: str, call_no: int) -> FakeResponse:
+        if self.fail_every and call_no % self.fail_every == 0:
+            raise RuntimeError("fake model failure")
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return FakeResponse(f"Fake summary {digest}.")
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        call_no = self._next_call()
+        time.sleep(self.latency_s)
+        return self._respond(prompt, call_no)
+
+    async def generate_content_async(self, prompt: str) -> FakeResponse:
+        call_no = self._next_call()
+        await asyncio.sleep(self.latency_s)
+        return self._respond(prompt, call_no)
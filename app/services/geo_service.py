@@ -1,44 +1,207 @@
 # app/services/geo_service.py
 
 import os
-from functools import lru_cache
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import httpx
 from typing import Optional, Tuple
 
+from app.database import get_session
+from app.models import GeocodeCacheEntry
+from app.services.fake_geocoder import FakeGeocoderTransport
+from app.utils import gazetteer
+from app.utils.text_utils import normalize_query
+
 class GeoService:
     """
-    Convert location name strings to lat/long using an external geocoding API (e.g. OpenCage).
-    Use LRU cache to avoid repeated calls.
+    Convert location name strings to lat/long, cheapest source first:
+    1. in-process LRU (`GEOCODE_CACHE_MEMORY_SIZE`)
+    2. the bundled offline gazetteer (`app.utils.gazetteer`), no network
+    3. the persistent `geocode_cache` table, shared across processes and restarts
+    4. the geocoding API (OpenCage) over pooled keep-alive clients; its answers,
+       including "no such place", are written back to the table.
+    Place names are normalized first, so "New Delhi", " new delhi!" and
+    "NEW DELHI" share one entry. Network errors are not cached.
+
+    Without OPENCAGE_API_KEY only steps 1-3 are used. GEOCODER_PROVIDER=fake
+    answers misses from a local stub (`FakeGeocoderTransport`,
+    FAKE_GEOCODER_LATENCY_MS); GEOCODER_URL points the client at another
+    OpenCage-compatible endpoint.
+    `ageocode` is the non-blocking variant for async request handlers.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        transport=None,
+        memory_size: Optional[int] = None,
+        negative_ttl_hours: Optional[float] = None,
+    ):
         # Read from env or pass in
         self.api_key = api_key or os.getenv("OPENCAGE_API_KEY")
-        if not self.api_key:
-            raise RuntimeError("GeoService requires OPENCAGE_API_KEY environment variable")
+        if transport is None and os.getenv("GEOCODER_PROVIDER", "opencage") == "fake":
+            transport = FakeGeocoderTransport(latency_s=float(os.getenv("FAKE_GEOCODER_LATENCY_MS", "50")) / 1000)
+        self.transport = transport
+        if not self.api_key and transport is None:
+            print("⚠️ OPENCAGE_API_KEY not set: geocoding from the gazetteer and cache only")
+
+        self.endpoint = os.getenv("GEOCODER_URL", "https://api.opencagedata.com/geocode/v1/json")
+        self.timeout = float(os.getenv("GEOCODER_TIMEOUT_S", "5"))
+        self.memory_size = memory_size or int(os.getenv("GEOCODE_CACHE_MEMORY_SIZE", "4096"))
+        negative = negative_ttl_hours if negative_ttl_hours is not None else float(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "24"))
+        self.negative_ttl = timedelta(hours=negative)
+
+        self._limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # normalized place → coords, or None for a negative answer
+        self._lru: "OrderedDict[str, Optional[Tuple[float, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "gazetteer_hits": 0, "db_hits": 0, "api_calls": 0, "api_errors": 0}
 
-        self.endpoint = "https://api.opencagedata.com/geocode/v1/json"
+    @property
+    def online(self) -> bool:
+        return bool(self.api_key) or self.transport is not None
 
-    @lru_cache(maxsize=256)
     def geocode(self, place: str) -> Optional[Tuple[float, float]]:
         """
         Return (latitude, longitude) for the given place name, or None if failed.
         """
+        key = normalize_query(place or "")
+        if not key:
+            return None
+        hit, coords = self._local(key, place)
+        if hit:
+            return coords
+        hit, coords = self._from_db(key)
+        if hit or not self.online:
+            return coords
 
-        params = {
-            "q": place,
-            "key": self.api_key,
-            "limit": 1,
-            "no_annotations": 1
-        }
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout, limits=self._limits, transport=self.transport)
+        self._count("api_calls")
+        try:
+            resp = self._client.get(self.endpoint, params=self._params(place))
+            resp.raise_for_status()
+            coords = self._parse(resp.json())
+        except Exception as e:
+            self._count("api_errors")
+            print(f"[GeoService ERROR] {place!r}: {e}")
+            return None
+        self._store(key, coords)
+        return coords
+
+    async def ageocode(self, place: str) -> Optional[Tuple[float, float]]:
+        """Async `geocode`: same lookup order, DB tier in a worker thread, pooled AsyncClient."""
+        key = normalize_query(place or "")
+        if not key:
+            return None
+        hit, coords = self._local(key, place)
+        if hit:
+            return coords
+        hit, coords = await asyncio.to_thread(self._from_db, key)
+        if hit or not self.online:
+            return coords
+
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self._limits, transport=self.transport)
+        self._count("api_calls")
         try:
-            resp = httpx.get(self.endpoint, params=params, timeout=5.0)
+            resp = await self._async_client.get(self.endpoint, params=self._params(place))
             resp.raise_for_status()
+            coords = self._parse(resp.json())
         except Exception as e:
-            # Could log error
+            self._count("api_errors")
+            print(f"[GeoService ERROR] {place!r}: {e}")
             return None
+        await asyncio.to_thread(self._store, key, coords)
+        return coords
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, key: str, coords: Optional[Tuple[float, float]]):
+        with self._lock:
+            self._lru[key] = coords
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_size:
+                self._lru.popitem(last=False)
+
+    def _local(self, key: str, place: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+        """(hit, coords) from the LRU or the gazetteer."""
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return True, self._lru[key]
+        # "Mumbai, Maharashtra" → the leading component, if the rest is where it lies
+        coords = gazetteer.lookup(key) or gazetteer.lookup_qualified([normalize_query(p) for p in place.split(",")])
+        if coords is None:
+            return False, None
+        self._count("gazetteer_hits")
+        self._remember(key, coords)
+        return True, coords
+
+    def _from_db(self, key: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+        with get_session() as s:
+            row = s.get(GeocodeCacheEntry, key)
+        if row is None:
+            return False, None
+        if row.latitude is None:
+            if datetime.utcnow() - row.created_at > self.negative_ttl:
+                return False, None
+            coords = None
+        else:
+            coords = (row.latitude, row.longitude)
+        self._count("db_hits")
+        self._remember(key, coords)
+        return True, coords
+
+    def _store(self, key: str, coords: Optional[Tuple[float, float]]):
+        try:
+            with get_session() as s:
+                s.merge(GeocodeCacheEntry(
+                    place=key,
+                    latitude=coords[0] if coords else None,
+                    longitude=coords[1] if coords else None,
+                    created_at=datetime.utcnow(),
+                ))
+                s.commit()
+        except Exception as e:
+            print(f"[GeoService ERROR] cache write {key!r}: {e}")
+        self._remember(key, coords)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["memory_entries"] = len(self._lru)
+        counters["gazetteer_places"] = len(gazetteer.PLACES)
+        return counters
+
+    def _params(self, place: str) -> dict:
+        return {
+            "q": place,
+            "key": self.api_key or "",
+            "limit": 1,
+            "no_annotations": 1
+        }
 
-        data = resp.json()
+    @staticmethod
+    def _parse(data: dict) -> Optional[Tuple[float, float]]:
         results = data.get("results")
         if not results:
             return None
@@ -0,0 +1,143 @@
+# app/services/intent_cache.py
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlmodel import select, delete, func
+from app.database import get_session
+from app.models import IntentCacheEntry
+
+
+class IntentCache:
+    """
+    Two-tier cache for smart-query intents, same layout as `SummaryCache`:
+    an in-process LRU in front of the persistent `intent_cache` table.
+
+    Keys are built from the *normalized* query, so "Tech news!" and
+    "  tech NEWS" share an entry. Unlike summaries, an intent for a query can
+    change (new categories / sources, a better model), so entries expire after
+    `INTENT_CACHE_TTL_HOURS`. Failed parses are cached as negative entries for
+    `INTENT_CACHE_NEGATIVE_TTL_S` so a query the LLM can't handle doesn't pay
+    a round-trip on every request.
+    """
+
+    def __init__(
+        self,
+        memory_size: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        ttl_hours: Optional[float] = None,
+        negative_ttl_s: Optional[float] = None,
+    ):
+        self.memory_size = memory_size or int(os.getenv("INTENT_CACHE_MEMORY_SIZE", "4096"))
+        self.max_rows = max_rows or int(os.getenv("INTENT_CACHE_MAX_ROWS", "20000"))
+        ttl = ttl_hours if ttl_hours is not None else float(os.getenv("INTENT_CACHE_TTL_HOURS", "24"))
+        negative = negative_ttl_s if negative_ttl_s is not None else float(os.getenv("INTENT_CACHE_NEGATIVE_TTL_S", "300"))
+        self.ttl = timedelta(hours=ttl)
+        self.negative_ttl = timedelta(seconds=negative)
+
+        # key → (intent or None for a negative entry, created_at)
+        self._lru: "OrderedDict[str, Tuple[Optional[dict], datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._counters = {"memory_hits": 0, "db_hits": 0, "negative_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(model: str, template: str, normalized_query: str) -> str:
+        payload = json.dumps([model, template, normalized_query], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: datetime, failed: bool) -> bool:
+        return datetime.utcnow() - created_at > (self.negative_ttl if failed else self.ttl)
+
+    def _remember(self, key: str, intent: Optional[dict], created_at: datetime):
+        with self._lock:
+            self._lru[key] = (intent, created_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_size:
+                self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[bool, Optional[dict]]:
+        """(hit, intent). A hit with intent None is a negative entry."""
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit and not self._expired(hit[1], hit[0] is None):
+                self._lru.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                if hit[0] is None:
+                    self._counters["negative_hits"] += 1
+                return True, hit[0]
+            self._lru.pop(key, None)
+
+        with get_session() as s:
+            row = s.get(IntentCacheEntry, key)
+        if row is None or self._expired(row.created_at, row.failed):
+            with self._lock:
+                self._counters["misses"] += 1
+            return False, None
+
+        intent = None if row.failed else json.loads(row.intent_json)
+        self._remember(key, intent, row.created_at)
+        with self._lock:
+            self._counters["db_hits"] += 1
+            if intent is None:
+                self._counters["negative_hits"] += 1
+        return True, intent
+
+    def put(self, key: str, query: str, intent: Optional[dict]):
+        """Store an intent, or a negative entry when `intent` is None."""
+        now = datetime.utcnow()
+        with get_session() as s:
+            s.merge(IntentCacheEntry(
+                key=key,
+                query=query,
+                intent_json=json.dumps(intent) if intent is not None else None,
+                failed=intent is None,
+                created_at=now,
+            ))
+            s.commit()
+        self._remember(key, intent, now)
+
+        with self._lock:
+            self._counters["writes"] += 1
+            self._writes_since_evict += 1
+            run_eviction = self._writes_since_evict >= 100
+            if run_eviction:
+                self._writes_since_evict = 0
+        if run_eviction:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired rows (both TTLs), then the oldest rows above `max_rows`."""
+        now = datetime.utcnow()
+        removed = 0
+        with get_session() as s:
+            removed += s.exec(delete(IntentCacheEntry).where(IntentCacheEntry.created_at < now - self.ttl)).rowcount or 0
+            removed += s.exec(delete(IntentCacheEntry).where(
+                IntentCacheEntry.failed, IntentCacheEntry.created_at < now - self.negative_ttl
+            )).rowcount or 0
+
+            total = s.exec(select(func.count()).select_from(IntentCacheEntry)).one()
+            excess = total - self.max_rows
+            if excess > 0:
+                oldest = s.exec(
+                    select(IntentCacheEntry.key).order_by(IntentCacheEntry.created_at).limit(excess)
+                ).all()
+                removed += s.exec(delete(IntentCacheEntry).where(IntentCacheEntry.key.in_(oldest))).rowcount or 0
+            s.commit()
+
+        with self._lock:
+            self._counters["evictions"] += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["memory_entries"] = len(self._lru)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        counters["hit_rate"] = round((counters["memory_hits"] + counters["db_hits"]) / lookups, 3) if lookups else 0.0
+        return counters
@@ -1,19 +1,189 @@
 import google.generativeai as genai
-import os, json, re
+import asyncio
+import os, json, re, time
+from typing import Dict, Optional, Tuple
+from sqlmodel import select
+from app.database import get_session
+from app.models import Article, ArticleCategory
+from app.services.fake_llm import FakeGenerativeModel
+from app.services.intent_cache import IntentCache
+from app.utils.text_utils import normalize_query
+
+# Default fallback
+FALLBACK_INTENT = {"intent": ["search"], "entities": [], "location": None, "source": None}
+
+# words that don't change what a query asks for; anything else that isn't a
+# known category / source sends the query to the LLM
+FILLER_WORDS = frozenset("""
+    a about all an and any are article articles by coverage current find for from get give
+    headline headlines in is latest me new news of on please recent related report reported
+    reports s show stories story the today todays update updates what whats
+""".split())
+
+
+class IntentRules:
+    """
+    Local fast path for obvious queries: if a normalized query is only known
+    category / source names (from the `Article` table) plus filler words,
+    the intent is resolved here without an LLM call. "technology news",
+    "latest from reuters" and "sports news by times now" resolve locally;
+    anything with other words (a place, a topic, a person) does not.
+    Names are reloaded every `INTENT_RULES_REFRESH_S` seconds.
+    """
+
+    def __init__(self, refresh_s: Optional[float] = None):
+        self.refresh_s = refresh_s if refresh_s is not None else float(os.getenv("INTENT_RULES_REFRESH_S", "300"))
+        self._phrases: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        self._max_len = 0
+        self._loaded_at: Optional[float] = None
+
+    def due(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_s
+
+    def refresh(self):
+        with get_session() as s:
+            categories = s.exec(select(ArticleCategory.name).distinct()).all()
+            sources = s.exec(select(Article.source_name).where(Article.source_name.is_not(None)).distinct()).all()
+        phrases: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        # categories last: a name that is both resolves as a category
+        for kind, names in (("source", sources), ("category", categories)):
+            for name in names:
+                tokens = tuple(normalize_query(name).split())
+                if tokens and not all(t in FILLER_WORDS for t in tokens):
+                    phrases[tokens] = (kind, name)
+        self._phrases = phrases
+        self._max_len = max((len(p) for p in phrases), default=0)
+        self._loaded_at = time.monotonic()
+
+    def resolve(self, normalized: str) -> Optional[dict]:
+        """Intent for a normalized query, or None if the LLM has to decide."""
+        if self.due():
+            self.refresh()
+        tokens = normalized.split()
+        found = {"category": None, "source": None}
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self._max_len, len(tokens) - i), 0, -1):
+                hit = self._phrases.get(tuple(tokens[i:i + n]))
+                if hit:
+                    kind, name = hit
+                    if found[kind] not in (None, name):
+                        return None  # two categories (or sources): not obvious
+                    found[kind] = name
+                    i += n
+                    break
+            else:
+                if tokens[i] not in FILLER_WORDS:
+                    return None
+                i += 1
+        category, source = found["category"], found["source"]
+        if not category and not source:
+            return None
+        return {
+            "intent": [k for k in ("category", "source") if found[k]],
+            "entities": [e for e in (category, source) if e],
+            "location": None,
+            "source": source,
+        }
+
 
 class IntentService:
-    def __init__(self):
+    """
+    Query → intent, cheapest first:
+    1. `IntentRules` (known category / source names, no LLM)
+    2. `IntentCache`, keyed on the normalized query (memory, then DB)
+    3. Gemini; the parsed answer is cached, an unparseable one is cached as
+       a negative entry. Transport errors are not cached.
+    """
+
+    def __init__(self, cache: IntentCache | None = None, rules: IntentRules | None = None):
+        self.cache = cache or IntentCache()
+        self.rules = rules or IntentRules()
+        self._counters = {"rule_hits": 0, "llm_calls": 0}
+        if os.getenv("LLM_PROVIDER", "gemini") == "fake":
+            # no JSON from the fake model: every query takes the fallback intent
+            self.model_name = "fake"
+            self.model = FakeGenerativeModel(latency_s=float(os.getenv("FAKE_LLM_LATENCY_MS", "200")) / 1000)
+            return
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise RuntimeError("❌ GEMINI_API_KEY not found.")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+        self.model_name = "gemini-2.5-flash"
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def cache_key(self, normalized: str) -> str:
+        return IntentCache.make_key(self.model_name, self._prompt("{query}"), normalized)
 
     def extract_intent(self, query: str) -> dict:
         """
         Use Gemini to extract structured information about the user's intent and entities.
         """
-        prompt = f"""
+        normalized = normalize_query(query)
+        fast = self.rules.resolve(normalized)
+        if fast is not None:
+            self._counters["rule_hits"] += 1
+            return fast
+        key = self.cache_key(normalized)
+        hit, intent = self.cache.get(key)
+        if hit:
+            return intent if intent is not None else dict(FALLBACK_INTENT)
+
+        self._counters["llm_calls"] += 1
+        try:
+            resp = self.model.generate_content(self._prompt(query))
+        except Exception as e:
+            print(f"[Intent ERROR] {e}")
+            return dict(FALLBACK_INTENT)
+        return self._store(key, normalized, resp.text)
+
+    async def aextract_intent(self, query: str) -> dict:
+        """`extract_intent` without blocking the event loop (DB tiers in a thread, Gemini awaited)."""
+        normalized = normalize_query(query)
+        if self.rules.due():
+            await asyncio.to_thread(self.rules.refresh)
+        fast = self.rules.resolve(normalized)
+        if fast is not None:
+            self._counters["rule_hits"] += 1
+            return fast
+        key = self.cache_key(normalized)
+        hit, intent = await asyncio.to_thread(self.cache.get, key)
+        if hit:
+            return intent if intent is not None else dict(FALLBACK_INTENT)
+
+        self._counters["llm_calls"] += 1
+        try:
+            resp = await self.model.generate_content_async(self._prompt(query))
+        except Exception as e:
+            print(f"[Intent ERROR] {e}")
+            return dict(FALLBACK_INTENT)
+        return await asyncio.to_thread(self._store, key, normalized, resp.text)
+
+    def _store(self, key: str, normalized: str, text: str) -> dict:
+        try:
+            intent = self._parse(text)
+        except Exception as e:
+            print(f"[Intent ERROR] unparseable response: {e}")
+            self.cache.put(key, normalized, None)
+            return dict(FALLBACK_INTENT)
+        self.cache.put(key, normalized, intent)
+        return intent
+
+    def stats(self) -> dict:
+        return {**self._counters, **self.cache.stats()}
+
+    @staticmethod
+    def _parse(text: str) -> dict:
+        # Clean and parse JSON safely
+        text = re.sub(r"```(json)?", "", text.strip())
+        result = json.loads(text)
+        if not isinstance(result, dict):
+            raise ValueError(f"expected a JSON object, got {type(result).__name__}")
+        return result
+
+    @staticmethod
+    def _prompt(query: str) -> str:
+        return f"""
         You are an intelligent intent extraction assistant for a contextual news retrieval system.
 
         Each article in the database has the following fields:
@@ -58,15 +228,3 @@ class IntentService:
         Now analyze this query:
         "{query}"
         """
-
-        try:
-            resp = self.model.generate_content(prompt)
-            text = resp.text.strip()
-            # Clean and parse JSON safely
-            text = re.sub(r"```(json)?", "", text)
-            result = json.loads(text)
-            return result
-        except Exception as e:
-            print(f"[Intent ERROR] {e}")
-            # Default fallback
-            return {"intent": ["search"], "entities": [], "location": None, "source": None}
@@ -1,21 +1,187 @@
 import google.generativeai as genai
+import asyncio
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from app.services.summary_cache import SummaryCache
+from app.services.fake_llm import FakeGenerativeModel
+
+MODEL_NAME = "gemini-2.5-flash"
+SUMMARY_PROMPT = "Summarize this news article in 2 sentences:\n\nTitle: {title}\n\nDescription: {description}"
+SUMMARY_FAILED = "Summary generation failed."
 
 class LLMService:
-    def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise RuntimeError("GEMINI_API_KEY not set in environment variables")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+    """
+    Gemini-backed summarizer.
+    Cache misses are fanned out on a bounded thread pool; identical in-flight
+    requests share one call (single-flight), and `summarize_many` can return
+    before slow calls finish (those come back as None = summary pending and
+    land in the cache when they complete).
 
-    def summarize(self, title: str, description: str) -> str:
-        if not description:
-            return f"{title}. No description available."
-        prompt = f"Summarize this news article in 2 sentences:\n\nTitle: {title}\n\nDescription: {description}"
+    Set LLM_PROVIDER=fake to use a local fake model (FAKE_LLM_LATENCY_MS).
+    """
+
+    def __init__(self, cache: SummaryCache | None = None, model=None, max_concurrency: int | None = None):
+        provider = os.getenv("LLM_PROVIDER", "gemini")
+        if model is not None:
+            self.model_name = getattr(model, "model_name", MODEL_NAME)
+            self.model = model
+        elif provider == "fake":
+            self.model_name = "fake"
+            self.model = FakeGenerativeModel(latency_s=float(os.getenv("FAKE_LLM_LATENCY_MS", "200")) / 1000)
+        else:
+            self.api_key = os.getenv("GEMINI_API_KEY")
+            if not self.api_key:
+                raise RuntimeError("GEMINI_API_KEY not set in environment variables")
+            genai.configure(api_key=self.api_key)
+            self.model_name = MODEL_NAME
+            self.model = genai.GenerativeModel(self.model_name)
+
+        self.cache = cache or SummaryCache()
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        # seconds a request waits for missing summaries; 0 → wait for all
+        self.deadline = float(os.getenv("LLM_SUMMARY_DEADLINE_S", "5")) or None
+        # streamed responses already sent the articles, so they can wait longer
+        self.stream_deadline = float(os.getenv("LLM_STREAM_DEADLINE_S", "30")) or None
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        self._inflight: Dict[str, Future] = {}
+        # re-entrant: a done-callback may fire synchronously inside `_submit`
+        self._lock = threading.RLock()
+
+    def cache_key(self, title: str, description: str) -> str:
+        return SummaryCache.make_key(self.model_name, SUMMARY_PROMPT, title, description)
+
+    def _generate(self, key: str, title: str, description: str) -> str:
+        prompt = SUMMARY_PROMPT.format(title=title, description=description)
         try:
             response = self.model.generate_content(prompt)
-            return response.text.strip()
+            summary = response.text.strip()
         except Exception as e:
             print(f"[Gemini ERROR] {e}")
-            return "Summary generation failed."
+            # failures are not cached, so the next request retries
+            return SUMMARY_FAILED
+        try:
+            self.cache.put(key, self.model_name, summary)
+        except Exception as e:
+            # the summary is still good for everyone waiting on it; the next miss regenerates it
+            print(f"[SummaryCache ERROR] {e}")
+        return summary
+
+    def _submit(self, key: str, title: str, description: str) -> Future:
+        """Start a generation for `key`, or join the one already in flight."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = self._pool.submit(self._generate, key, title, description)
+                self._inflight[key] = fut
+                fut.add_done_callback(lambda _f, k=key: self._release(k))
+            return fut
+
+    def _release(self, key: str):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def summarize(self, title: str, description: str) -> str:
+        return self.summarize_many([(title, description)], deadline=None)[0]
+
+    def _start(self, items: Sequence[Tuple[str, Optional[str]]]) -> Tuple[List[Optional[str]], Dict[int, Future]]:
+        """Cached / trivial results, plus generations started (or joined) for the rest."""
+        results: List[Optional[str]] = [None] * len(items)
+        keys: Dict[int, str] = {}
+        for i, (title, description) in enumerate(items):
+            if not description:
+                results[i] = f"{title}. No description available."
+            else:
+                keys[i] = self.cache_key(title, description)
+
+        cached = self.cache.get_many(keys.values())
+        futures: Dict[int, Future] = {}
+        for i, key in keys.items():
+            if key in cached:
+                results[i] = cached[key]
+            else:
+                title, description = items[i]
+                futures[i] = self._submit(key, title, description)
+        return results, futures
+
+    @staticmethod
+    def _collect(results: List[Optional[str]], futures: Dict[int, Future], started: float, deadline: Optional[float]):
+        for i, fut in futures.items():
+            if fut.done():
+                results[i] = fut.result()
+        if deadline is not None and not all(f.done() for f in futures.values()):
+            pending = sum(1 for f in futures.values() if not f.done())
+            print(f"[LLM] {pending} summaries pending after {time.monotonic() - started:.2f}s")
+        return results
+
+    def summarize_many(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[float] = None,
+    ) -> List[Optional[str]]:
+        """
+        Summarize (title, description) pairs concurrently.
+        With a `deadline` (seconds), summaries not ready in time are returned as
+        None; their generation keeps running and fills the cache.
+        """
+        started = time.monotonic()
+        results, futures = self._start(items)
+        if futures:
+            wait(futures.values(), timeout=deadline)
+        return self._collect(results, futures, started, deadline)
+
+    async def asummarize_many(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[float] = None,
+    ) -> List[Optional[str]]:
+        """
+        `summarize_many` for async callers: the cache lookup runs in a worker
+        thread and the wait for generations is awaited, so the event loop keeps
+        serving other requests while Gemini is slow.
+        """
+        started = time.monotonic()
+        results, futures = await asyncio.to_thread(self._start, items)
+        if futures:
+            await asyncio.wait([asyncio.wrap_future(f) for f in set(futures.values())], timeout=deadline)
+        return self._collect(results, futures, started, deadline)
+
+    async def astream_summaries(
+        self,
+        items: Sequence[Tuple[str, Optional[str]]],
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        (index, summary) pairs as summaries become available: cached and
+        trivial ones first, then generations in completion order. Whatever is
+        still running after `deadline` seconds is yielded as None (pending; it
+        keeps running and fills the cache).
+        """
+        started = time.monotonic()
+        results, futures = await asyncio.to_thread(self._start, items)
+        for i, summary in enumerate(results):
+            if i not in futures:
+                yield i, summary
+        # single-flight: items with the same key share one future
+        indices: Dict[Future, List[int]] = {}
+        for i, fut in futures.items():
+            indices.setdefault(fut, []).append(i)
+        waiting = {asyncio.wrap_future(fut): fut for fut in indices}
+        pending = set(waiting)
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - (time.monotonic() - started))
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for w in done:
+                for i in indices[waiting[w]]:
+                    yield i, w.result()
+        if pending:
+            print(f"[LLM] {sum(len(indices[waiting[w]]) for w in pending)} streamed summaries pending after "
+                  f"{time.monotonic() - started:.2f}s")
+        for w in pending:
+            for i in indices[waiting[w]]:
+                yield i, None
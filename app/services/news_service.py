@@ -1,67 +1,457 @@
-from sqlmodel import select
-from app.utils.geo_utils import haversine
-from app.utils.text_utils import text_match_score, recency_boost
+from sqlalchemy import and_, or_, true
+from sqlmodel import select, func
+from app.utils.text_utils import tokenize
+from app.utils.vector_kernels import (
+    haversine_many, to_epoch_seconds, recency_boost_many, blend_scores,
+)
 from app.services.llm_service import LLMService
+from app.services.article_snapshot import SnapshotStore
+from app.services.result_sets import RankedResultSets
 from app.services.geo_service import GeoService
-from app.database import get_session
+from app.services.search_index import build_search_index
+from app.services.semantic_index import SemanticIndex
+from app.services.spatial_index import GeohashSpatialIndex
+from app.services.trending_service import TrendingService
+from app.services.event_buffer import EventBuffer
+from app.database import get_session, get_async_session
 from datetime import datetime, timedelta
-from typing import List
-from app.database import get_session
-from app.models import Article, UserEvent
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import logging
+import os
+import numpy as np
+from app.models import Article, ArticleCategory
+
+# keys of a rendered article; `fields=` projections pick from these plus the
+# per-ranking extras (distance_km, trending_score)
+ARTICLE_FIELDS = (
+    "title", "description", "url", "publication_date", "source_name", "category",
+    "relevance_score", "latitude", "longitude", "llm_summary", "summary_pending",
+)
+
+
+class Candidate(NamedTuple):
+    """
+    A ranked article before enrichment: just what ranking, filtering and
+    re-ranking need. Full rows and summaries are only loaded for the final
+    candidates, by `NewsService.render`.
+    """
+    id: str
+    score: Optional[float] = None
+    publication_date: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    source_name: Optional[str] = None
+    extra: Optional[dict] = None  # response fields the ranking adds (distance_km, trending_score)
+
+
+CANDIDATE_COLUMNS = (
+    Article.id, Article.relevance_score, Article.publication_date,
+    Article.latitude, Article.longitude, Article.source_name,
+)
+
 
 class NewsService:
+    """
+    Rankings run in two phases: `*_candidates` methods return compact
+    `Candidate` records, and `render` turns the final ones into response
+    dicts (one row lookup, summaries only if asked for). The `rank_*`
+    methods do both, one page at a time.
+
+    Paging: `rank_*` return (articles, after), where `after` is the keyset
+    of the next page (None on the last one). Category / source / score walk
+    an index in (date or score, id) order and continue after the cursor's
+    values. Search, nearby and trending rank a pool once and serve later
+    pages from `RankedResultSets`; a page past the end of the pool ranks a
+    larger one, so `after` is None only when the matches run out.
+    """
+
     def __init__(self):
         self.llm = LLMService()
         self.geo = GeoService()
-
-    def rank_category(self, category: str, limit=5):
+        self.search_index = build_search_index()
+        self.semantic_index = SemanticIndex()
+        self.search_mode = os.getenv("SEARCH_MODE", "lexical")
+        self.semantic_min_similarity = float(os.getenv("SEMANTIC_MIN_SIMILARITY", "0.35"))
+        self.semantic_weight = float(os.getenv("SEMANTIC_WEIGHT", "0.5"))
+        self.snapshots = SnapshotStore()
+        self.snapshots.refresh()
+        self.spatial_index = GeohashSpatialIndex(self.snapshots)
+        self.trending = TrendingService(snapshots=self.snapshots)
+        self.events = EventBuffer(self.trending)
+        self.result_sets = RankedResultSets()
+
+    # The steps the router awaits (candidates, pages, render) have an
+    # `a`-prefixed async twin; both share the statement building and scoring.
+    # With an article snapshot loaded (the default) candidates come from its
+    # arrays; the statements are the fallback when ARTICLE_SNAPSHOT=0.
+
+    # --- phase 1: candidates ------------------------------------------------
+
+    @staticmethod
+    def _after(column, after: Optional[dict], value):
+        """Rows after the cursor in (column DESC NULLS LAST, id) order."""
+        if not after:
+            return true()
+        if value is None:
+            return and_(column.is_(None), Article.id > after["i"])
+        return or_(column < value, and_(column == value, Article.id > after["i"]), column.is_(None))
+
+    def _after_date(self, after: Optional[dict]):
+        d = after.get("d") if after else None
+        return self._after(Article.publication_date, after, datetime.fromisoformat(d) if d else None)
+
+    def _category_stmt(self, category: str, limit: int, after: Optional[dict] = None):
+        in_category = select(ArticleCategory.article_id).where(
+            func.lower(ArticleCategory.name) == category.lower()
+        )
+        return (
+            select(*CANDIDATE_COLUMNS)
+            .where(Article.id.in_(in_category), self._after_date(after))
+            .order_by(Article.publication_date.desc().nulls_last(), Article.id)
+            .limit(limit)
+        )
+
+    def _source_stmt(self, source: str, limit: int, after: Optional[dict] = None):
+        return (
+            select(*CANDIDATE_COLUMNS)
+            .where(func.lower(Article.source_name) == source.lower(), self._after_date(after))
+            .order_by(Article.publication_date.desc().nulls_last(), Article.id)
+            .limit(limit)
+        )
+
+    def _score_stmt(self, threshold: float, limit: int, after: Optional[dict] = None):
+        score = Article.relevance_score
+        if threshold <= 0:
+            # a missing score counts as 0
+            score = func.coalesce(Article.relevance_score, 0)
+        return (
+            select(*CANDIDATE_COLUMNS)
+            .where(score >= threshold, self._after(Article.relevance_score, after, after.get("s") if after else None))
+            .order_by(Article.relevance_score.desc().nulls_last(), Article.id)
+            .limit(limit)
+        )
+
+    def _fetch(self, stmt) -> list:
         with get_session() as s:
-            rows = s.exec(select(Article)).all()
-        filtered = [a for a in rows if any(category.lower() == c.lower() for c in a.categories)]
-        filtered.sort(key=lambda x: x.publication_date or datetime.min, reverse=True)
-        return self._enrich(filtered[:limit])
+            return s.exec(stmt).all()
+
+    async def _afetch(self, stmt) -> list:
+        async with get_async_session() as s:
+            return (await s.exec(stmt)).all()
+
+    @staticmethod
+    def _to_candidates(rows) -> List[Candidate]:
+        # CANDIDATE_COLUMNS rows; the relevance score doubles as the candidate score
+        return [Candidate(r[0], r[1], r[2], r[3], r[4], r[5]) for r in rows]
+
+    def category_candidates(self, category: str, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = self.snapshots.current()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.in_category(category, limit, after)))
+        return self._to_candidates(self._fetch(self._category_stmt(category, limit, after)))
+
+    async def acategory_candidates(self, category: str, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = await self.snapshots.acurrent()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.in_category(category, limit, after)))
+        return self._to_candidates(await self._afetch(self._category_stmt(category, limit, after)))
+
+    def source_candidates(self, source: str, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = self.snapshots.current()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.from_source(source, limit, after)))
+        return self._to_candidates(self._fetch(self._source_stmt(source, limit, after)))
+
+    async def asource_candidates(self, source: str, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = await self.snapshots.acurrent()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.from_source(source, limit, after)))
+        return self._to_candidates(await self._afetch(self._source_stmt(source, limit, after)))
+
+    def score_candidates(self, threshold=0.7, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = self.snapshots.current()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.above_score(threshold, limit, after)))
+        return self._to_candidates(self._fetch(self._score_stmt(threshold, limit, after)))
+
+    async def ascore_candidates(self, threshold=0.7, limit=5, after: Optional[dict] = None) -> List[Candidate]:
+        snap = await self.snapshots.acurrent()
+        if snap is not None:
+            return self._to_candidates(snap.records(snap.above_score(threshold, limit, after)))
+        return self._to_candidates(await self._afetch(self._score_stmt(threshold, limit, after)))
+
+    # the search index picks the top-K candidates with their text-match
+    # score; the relevance/recency blend is only computed for those
+
+    @staticmethod
+    def _search_candidates_stmt(hits: dict):
+        return select(*CANDIDATE_COLUMNS).where(Article.id.in_(hits))
+
+    @staticmethod
+    def _blend_top(hits: dict, rows, limit: int) -> List[Candidate]:
+        final = blend_scores(
+            np.array([hits[r[0]] for r in rows], dtype=np.float64),
+            np.array([r[1] for r in rows], dtype=np.float64),
+            recency_boost_many(to_epoch_seconds(r[2] for r in rows)),
+        )
+        order = [i for i in np.argsort(-final, kind="stable") if final[i] > 0]
+        return [
+            Candidate(rows[i][0], float(final[i]), rows[i][2], rows[i][3], rows[i][4], rows[i][5])
+            for i in order[:limit]
+        ]
 
-    def rank_source(self, source: str, limit=5):
-        with get_session() as s:
-            rows = s.exec(select(Article)).all()
-        filtered = [a for a in rows if a.source_name and a.source_name.lower() == source.lower()]
-        filtered.sort(key=lambda x: x.publication_date or datetime.min, reverse=True)
-        return self._enrich(filtered[:limit])
+    @staticmethod
+    def _blend_top_snapshot(snap, hits: dict, limit: int) -> List[Candidate]:
+        """`_blend_top` straight off the snapshot columns; records are only built for the winners."""
+        ids = list(hits)
+        rows = snap.rows_of(ids)
+        # in row (= id) order, so ties break like the IN (...) query's rows
+        known = np.flatnonzero(rows >= 0)
+        known = known[np.argsort(rows[known], kind="stable")]
+        rows = rows[known]
+        final = blend_scores(
+            np.array([hits[ids[i]] for i in known], dtype=np.float64),
+            snap.relevance[rows],
+            recency_boost_many(snap.epochs(rows)),
+        )
+        order = [i for i in np.argsort(-final, kind="stable") if final[i] > 0][:limit]
+        return [
+            Candidate(r[0], float(final[i]), r[2], r[3], r[4], r[5])
+            for i, r in zip(order, snap.records(rows[order]))
+        ]
 
-    def rank_score(self, threshold=0.7, limit=5):
-        with get_session() as s:
-            rows = s.exec(select(Article)).all()
-        filtered = [a for a in rows if (a.relevance_score or 0) >= threshold]
-        filtered.sort(key=lambda x: x.relevance_score or 0, reverse=True)
-        return self._enrich(filtered[:limit])
+    # mode: "lexical" (search index only), "semantic" (embeddings only) or
+    # "hybrid" (both). Without a built semantic index every mode is lexical.
 
-    def rank_search(self, query: str, limit=5):
-        with get_session() as s:
-            rows = s.exec(select(Article)).all()
-        scored = []
-        for a in rows:
-            tm = text_match_score(query, a.title, a.description)
-            rs = a.relevance_score or 0
-            final = (0.6 * tm + 0.4 * rs) * recency_boost(a.publication_date)
-            if final > 0:
-                scored.append((a, final))
-        scored.sort(key=lambda t: t[1], reverse=True)
-        return self._enrich([a for a, _ in scored[:limit]])
-
-    def rank_nearby(self, lat, lon, radius=10.0, limit=5):
-        with get_session() as s:
-            rows = s.exec(select(Article)).all()
-        filtered = [
-            (a, haversine(lat, lon, a.latitude, a.longitude))
-            for a in rows if a.latitude and a.longitude
-        ]
-        nearby = [a for a, d in filtered if d <= radius]
-        nearby.sort(key=lambda x: haversine(lat, lon, x.latitude, x.longitude))
-        return self._enrich(nearby[:limit])
+    def _merge_hits(self, query: str, lexical: List, semantic: List) -> dict:
+        """
+        Candidate → text-match score. A cosine similarity is put on the
+        text-match scale: a perfect match counts like `SEMANTIC_WEIGHT` of the
+        query tokens appearing in the title, so in hybrid mode token matches
+        still lead and embeddings fill in articles without shared words.
+        Hybrid keeps the better of the two scores.
+        """
+        hits = dict(lexical)
+        scale = (2 * len(set(tokenize(query))) or 2) * self.semantic_weight
+        for article_id, sim in semantic:
+            if sim >= self.semantic_min_similarity:
+                hits[article_id] = max(hits.get(article_id, 0.0), sim * scale)
+        return hits
+
+    def _capped(self, k: int, lexical: List, semantic: List) -> bool:
+        """True when an index returned all `k` hits it was asked for, so more articles may match."""
+        # semantic hits come most similar first: once below the floor, deeper ones wouldn't count either
+        return len(lexical) >= k or (len(semantic) >= k and semantic[-1][1] >= self.semantic_min_similarity)
+
+    def _search_hits(self, query: str, k: int, mode: Optional[str]) -> Tuple[dict, bool]:
+        """(hits, capped); see `_capped`."""
+        mode = mode or self.search_mode
+        if mode == "lexical" or not self.semantic_index.available():
+            lexical = self.search_index.search(query, k)
+            return dict(lexical), self._capped(k, lexical, [])
+        lexical = self.search_index.search(query, k) if mode == "hybrid" else []
+        semantic = self.semantic_index.search(query, k)
+        return self._merge_hits(query, lexical, semantic), self._capped(k, lexical, semantic)
+
+    async def _asearch_hits(self, query: str, k: int, mode: Optional[str]) -> Tuple[dict, bool]:
+        mode = mode or self.search_mode
+        if mode == "lexical" or not self.semantic_index.available():
+            lexical = await self.search_index.asearch(query, k)
+            return dict(lexical), self._capped(k, lexical, [])
+        if mode == "hybrid":
+            lexical, semantic = await asyncio.gather(
+                self.search_index.asearch(query, k), self.semantic_index.asearch(query, k)
+            )
+        else:
+            lexical, semantic = [], await self.semantic_index.asearch(query, k)
+        return self._merge_hits(query, lexical, semantic), self._capped(k, lexical, semantic)
+
+    def _search_pool(self, query: str, k: int, mode: Optional[str], n: Optional[int] = None) -> Tuple[List[Candidate], bool]:
+        """The best `n` (default: all) blended results of the top `k` index hits, and whether those were every match."""
+        hits, capped = self._search_hits(query, k, mode)
+        if not hits:
+            return [], True
+        snap = self.snapshots.current()
+        if snap is not None:
+            return self._blend_top_snapshot(snap, hits, n or len(hits)), not capped
+        return self._blend_top(hits, self._fetch(self._search_candidates_stmt(hits)), n or len(hits)), not capped
+
+    async def _asearch_pool(self, query: str, k: int, mode: Optional[str], n: Optional[int] = None) -> Tuple[List[Candidate], bool]:
+        hits, capped = await self._asearch_hits(query, k, mode)
+        if not hits:
+            return [], True
+        snap = await self.snapshots.acurrent()
+        if snap is not None:
+            return self._blend_top_snapshot(snap, hits, n or len(hits)), not capped
+        return self._blend_top(hits, await self._afetch(self._search_candidates_stmt(hits)), n or len(hits)), not capped
+
+    def search_candidates(self, query: str, limit=5, mode: Optional[str] = None) -> List[Candidate]:
+        """Top search results; `score` is the blended search score over the best max(20 × limit, 100) index hits."""
+        return self._search_pool(query, max(limit * 20, 100), mode, limit)[0]
+
+    async def asearch_candidates(self, query: str, limit=5, mode: Optional[str] = None) -> List[Candidate]:
+        return (await self._asearch_pool(query, max(limit * 20, 100), mode, limit))[0]
+
+    @staticmethod
+    def _distance_candidates(hits) -> List[Candidate]:
+        return [Candidate(i, extra={"distance_km": round(dist, 3)}) for i, dist in hits]
+
+    def nearby_candidates(self, lat, lon, radius=10.0, limit=5, nearest=False) -> List[Candidate]:
+        """
+        Articles within `radius` km, nearest first. With `nearest=True` the
+        radius is ignored and the `limit` nearest articles are returned.
+        Each article carries its `distance_km`.
+        """
+        if nearest:
+            hits = self.spatial_index.nearest(lat, lon, limit)
+        else:
+            hits = self.spatial_index.within(lat, lon, radius)[:limit]
+        return self._distance_candidates(hits)
+
+    def _nearby_pool(self, lat, lon, radius, size: int, nearest: bool) -> Tuple[List[Candidate], bool]:
+        """The first `size` nearby candidates, and whether those were all of them."""
+        if nearest:
+            hits = self.spatial_index.nearest(lat, lon, size)
+            return self._distance_candidates(hits), len(hits) < size
+        hits = self.spatial_index.within(lat, lon, radius)
+        return self._distance_candidates(hits[:size]), len(hits) <= size
+
+    async def _anearby_pool(self, lat, lon, radius, size: int, nearest: bool) -> Tuple[List[Candidate], bool]:
+        if nearest:
+            hits = await self.spatial_index.anearest(lat, lon, size)
+            return self._distance_candidates(hits), len(hits) < size
+        hits = await self.spatial_index.awithin(lat, lon, radius)
+        return self._distance_candidates(hits[:size]), len(hits) <= size
+
+    def trending_candidates(self, lat: float, lon: float, limit: int = 10) -> List[Candidate]:
+        """
+        Location-aware trending with realistic user-event weighting.
+        Factors considered:
+        - Engagement volume (views, clicks, shares)
+        - Recency of interactions
+        - Geographical proximity (boosts local relevance)
+        Served from TrendingService's per-region top-K lists (caller's geohash
+        region and its neighbours), which are built from the event rollups.
+        """
+        return self._trending_pool(lat, lon, limit)[0]
 
-    def _enrich(self, articles: List[Article]):
-        return [
-            {
+    def _trending_pool(self, lat: float, lon: float, size: int, exhaustive: bool = False) -> Tuple[List[Candidate], bool]:
+        """
+        The first `size` trending candidates, and whether those were all of
+        them. The region top-K lists only prove that when they weren't full;
+        `exhaustive` scores every article with engagement instead.
+        """
+        top = self.trending.feed(lat, lon, size, exhaustive=exhaustive)
+        bound = size if exhaustive else min(size, self.trending.region_top_k)
+        return [Candidate(i, score, extra={"trending_score": round(score, 3)}) for i, score in top], len(top) < bound
+
+    def category_names(self, ids: Sequence[str]) -> Dict[str, List[str]]:
+        snap = self.snapshots.current()
+        if snap is not None:
+            return snap.category_names_of(ids)
+        return self._group_categories(self._fetch(self._category_names_stmt(ids)))
+
+    async def acategory_names(self, ids: Sequence[str]) -> Dict[str, List[str]]:
+        snap = await self.snapshots.acurrent()
+        if snap is not None:
+            return snap.category_names_of(ids)
+        return self._group_categories(await self._afetch(self._category_names_stmt(ids)))
+
+    @staticmethod
+    def _category_names_stmt(ids: Sequence[str]):
+        return (
+            select(ArticleCategory.article_id, ArticleCategory.name)
+            .where(ArticleCategory.article_id.in_(ids))
+            .order_by(ArticleCategory.article_id, ArticleCategory.position)
+        )
+
+    @staticmethod
+    def _group_categories(rows) -> Dict[str, List[str]]:
+        names: Dict[str, List[str]] = {}
+        for article_id, name in rows:
+            names.setdefault(article_id, []).append(name)
+        return names
+
+    # --- phase 2: rendering -------------------------------------------------
+
+    def _by_ids(self, ids: List[str]) -> List[Optional[Article]]:
+        """Full rows for `ids`, in that order (None where the article no longer exists)."""
+        by_id = {a.id: a for a in self._fetch(select(Article).where(Article.id.in_(ids)))}
+        return [by_id.get(i) for i in ids]
+
+    async def _aby_ids(self, ids: List[str]) -> List[Optional[Article]]:
+        by_id = {a.id: a for a in await self._afetch(select(Article).where(Article.id.in_(ids)))}
+        return [by_id.get(i) for i in ids]
+
+    @staticmethod
+    def _existing(candidates: List[Candidate], articles: List[Optional[Article]]):
+        # trending rollups / events can still name articles an incremental ingest deleted
+        kept = [(c, a) for c, a in zip(candidates, articles) if a is not None]
+        return [c for c, _ in kept], [a for _, a in kept]
+
+    @staticmethod
+    def _wants_summaries(summaries: bool, fields: Optional[Sequence[str]]) -> bool:
+        return summaries and (fields is None or "llm_summary" in fields or "summary_pending" in fields)
+
+    def render(self, candidates: List[Candidate], summaries: bool = True, fields: Optional[Sequence[str]] = None):
+        """
+        Response dicts for the final candidates. `summaries=False` skips the
+        LLM entirely; `fields` keeps only the named keys.
+        """
+        if not candidates:
+            return []
+        candidates, articles = self._existing(candidates, self._by_ids([c.id for c in candidates]))
+        texts = None
+        if self._wants_summaries(summaries, fields):
+            texts = self.llm.summarize_many(
+                [(a.title, a.description) for a in articles], deadline=self.llm.deadline
+            )
+        return self._to_dicts(candidates, articles, texts, fields)
+
+    async def arender(self, candidates: List[Candidate], summaries: bool = True, fields: Optional[Sequence[str]] = None):
+        if not candidates:
+            return []
+        candidates, articles = self._existing(candidates, await self._aby_ids([c.id for c in candidates]))
+        texts = None
+        if self._wants_summaries(summaries, fields):
+            texts = await self.llm.asummarize_many(
+                [(a.title, a.description) for a in articles], deadline=self.llm.deadline
+            )
+        return self._to_dicts(candidates, articles, texts, fields)
+
+    async def astream_render(self, candidates: List[Candidate], summaries: bool = True, fields: Optional[Sequence[str]] = None):
+        """
+        `arender` as a stream of events for NDJSON / SSE responses: every
+        article in ranked order as soon as the rows are loaded, then each
+        summary as it completes (cached ones first), so the first bytes don't
+        wait for the LLM:
+            {"type": "article", "index": i, "article": {...}}
+            {"type": "summary", "index": i, "llm_summary": ..., "summary_pending": ...}
+        Summaries still running after `LLM_STREAM_DEADLINE_S` come as pending.
+        """
+        if not candidates:
+            return
+        candidates, articles = self._existing(candidates, await self._aby_ids([c.id for c in candidates]))
+        meta_fields = None if fields is None else [f for f in fields if f not in ("llm_summary", "summary_pending")]
+        for i, item in enumerate(self._to_dicts(candidates, articles, None, meta_fields)):
+            yield {"type": "article", "index": i, "article": item}
+        if self._wants_summaries(summaries, fields):
+            async for i, text in self.llm.astream_summaries(
+                [(a.title, a.description) for a in articles], deadline=self.llm.stream_deadline
+            ):
+                yield {"type": "summary", "index": i, "llm_summary": text, "summary_pending": text is None}
+
+    @staticmethod
+    def _to_dicts(
+        candidates: List[Candidate],
+        articles: List[Article],
+        summaries: Optional[List[Optional[str]]],
+        fields: Optional[Sequence[str]],
+    ):
+        out = []
+        for i, (c, a) in enumerate(zip(candidates, articles)):
+            item = {
                 "title": a.title,
                 "description": a.description,
                 "url": a.url,
@@ -71,170 +461,340 @@ class NewsService:
                 "relevance_score": a.relevance_score,
                 "latitude": a.latitude,
                 "longitude": a.longitude,
-                "llm_summary": self.llm.summarize(a.title, a.description),
             }
-            for a in articles
-        ]
-    
+            if summaries is not None:
+                item["llm_summary"] = summaries[i]
+                item["summary_pending"] = summaries[i] is None
+            if c.extra:
+                item.update(c.extra)
+            if fields is not None:
+                item = {k: item[k] for k in fields if k in item}
+            out.append(item)
+        return out
+
+    # --- paging -------------------------------------------------------------
+
+    @staticmethod
+    def _date_keyset(c: Candidate) -> dict:
+        return {"d": c.publication_date.isoformat() if c.publication_date else None, "i": c.id}
+
+    @staticmethod
+    def _score_keyset(c: Candidate) -> dict:
+        return {"s": c.score, "i": c.id}
+
+    @staticmethod
+    def _keyset_page(candidates: List[Candidate], limit: int, keyset) -> Tuple[List[Candidate], Optional[dict]]:
+        """`candidates` were fetched with `limit + 1`: the extra one only tells that a next page exists."""
+        if len(candidates) > limit:
+            return candidates[:limit], keyset(candidates[limit - 1])
+        return candidates, None
+
+    @staticmethod
+    def _start(ranked: List[Candidate], after: Optional[dict]) -> int:
+        """Position after the cursor's article; its offset if the pool no longer holds it."""
+        if not after:
+            return 0
+        return next((i + 1 for i, c in enumerate(ranked) if c.id == after["i"]), int(after.get("o", 0)))
+
+    @staticmethod
+    def _extend(ranked: List[Candidate], fresh: List[Candidate]) -> List[Candidate]:
+        """`ranked` followed by what a larger ranking adds to it: pages already served never move."""
+        seen = {c.id for c in ranked}
+        return ranked + [c for c in fresh if c.id not in seen]
+
+    def _slice_after(self, ranked: List[Candidate], limit: int, after: Optional[dict], complete: bool = True):
+        """
+        The page of a ranked pool after the cursor's article. The last page of
+        an incomplete pool (more matches exist) still gets a cursor.
+        """
+        start = self._start(ranked, after)
+        page = ranked[start:start + limit]
+        end = start + len(page)
+        if not page or (end >= len(ranked) and complete):
+            return page, None
+        last = page[-1]
+        value = last.score if last.score is not None else (last.extra or {}).get("distance_km")
+        return page, {"s": value, "i": last.id, "o": end}
+
+    def _ranked_page(self, kind: str, limit: int, after: Optional[dict], compute, **params):
+        """
+        Page of a computed ranking. `compute(size)` returns (the best `size`
+        candidates, whether that was all of them). The first page ranks a pool
+        of `RankedResultSets.pool(limit)` and keeps it for the next ones. A page
+        past the end of an incomplete pool ranks again at twice the size and
+        appends the new candidates, so `next` is None only at the real end.
+        """
+        key = self.result_sets.make_key(kind, limit=limit, **params)
+        ranked, size, complete = (self.result_sets.get(key) if after else None) or ([], 0, False)
+        grown = False
+        while not complete and len(ranked) <= self._start(ranked, after) + limit:
+            size = size * 2 if size else self.result_sets.pool(limit)
+            fresh, complete = compute(size)
+            ranked, grown = self._extend(ranked, fresh), True
+        if grown and len(ranked) > limit:
+            self.result_sets.put(key, ranked, size, complete)
+        return self._slice_after(ranked, limit, after, complete)
+
+    async def _aranked_page(self, kind: str, limit: int, after: Optional[dict], compute, **params):
+        key = self.result_sets.make_key(kind, limit=limit, **params)
+        ranked, size, complete = (self.result_sets.get(key) if after else None) or ([], 0, False)
+        grown = False
+        while not complete and len(ranked) <= self._start(ranked, after) + limit:
+            size = size * 2 if size else self.result_sets.pool(limit)
+            fresh, complete = await compute(size)
+            ranked, grown = self._extend(ranked, fresh), True
+        if grown and len(ranked) > limit:
+            self.result_sets.put(key, ranked, size, complete)
+        return self._slice_after(ranked, limit, after, complete)
+
+    # pages: (candidates, keyset of the next page or None)
+
+    def category_page(self, category: str, limit=5, after=None):
+        return self._keyset_page(self.category_candidates(category, limit + 1, after), limit, self._date_keyset)
+
+    async def acategory_page(self, category: str, limit=5, after=None):
+        return self._keyset_page(await self.acategory_candidates(category, limit + 1, after), limit, self._date_keyset)
+
+    def source_page(self, source: str, limit=5, after=None):
+        return self._keyset_page(self.source_candidates(source, limit + 1, after), limit, self._date_keyset)
+
+    async def asource_page(self, source: str, limit=5, after=None):
+        return self._keyset_page(await self.asource_candidates(source, limit + 1, after), limit, self._date_keyset)
+
+    def score_page(self, threshold=0.7, limit=5, after=None):
+        return self._keyset_page(self.score_candidates(threshold, limit + 1, after), limit, self._score_keyset)
+
+    async def ascore_page(self, threshold=0.7, limit=5, after=None):
+        return self._keyset_page(await self.ascore_candidates(threshold, limit + 1, after), limit, self._score_keyset)
+
+    def search_page(self, query: str, limit=5, mode=None, after=None):
+        mode = mode or self.search_mode
+        return self._ranked_page(
+            "search", limit, after, lambda size: self._search_pool(query, size, mode),
+            query=" ".join(tokenize(query)), mode=mode,
+        )
+
+    async def asearch_page(self, query: str, limit=5, mode=None, after=None):
+        mode = mode or self.search_mode
+        return await self._aranked_page(
+            "search", limit, after, lambda size: self._asearch_pool(query, size, mode),
+            query=" ".join(tokenize(query)), mode=mode,
+        )
+
+    def nearby_page(self, lat, lon, radius=10.0, limit=5, nearest=False, after=None):
+        return self._ranked_page(
+            "nearby", limit, after, lambda size: self._nearby_pool(lat, lon, radius, size, nearest),
+            lat=lat, lon=lon, radius=None if nearest else radius,
+        )
+
+    async def anearby_page(self, lat, lon, radius=10.0, limit=5, nearest=False, after=None):
+        return await self._aranked_page(
+            "nearby", limit, after, lambda size: self._anearby_pool(lat, lon, radius, size, nearest),
+            lat=lat, lon=lon, radius=None if nearest else radius,
+        )
+
+    def trending_page(self, lat: float, lon: float, limit: int = 10, after=None):
+        first = self.result_sets.pool(limit)  # the region lists serve the first pool; deeper ones score everything
+        return self._ranked_page(
+            "trending", limit, after,
+            lambda size: self._trending_pool(lat, lon, size, exhaustive=size > first), lat=lat, lon=lon,
+        )
+
+    async def atrending_page(self, lat: float, lon: float, limit: int = 10, after=None):
+        first = self.result_sets.pool(limit)
+        return await self._aranked_page(
+            "trending", limit, after,
+            lambda size: asyncio.to_thread(self._trending_pool, lat, lon, size, size > first), lat=lat, lon=lon,
+        )
+
+    # --- rankings (both phases) ---------------------------------------------
+    # each returns (articles, keyset of the next page or None)
+
+    def rank_category(self, category: str, limit=5, summaries=True, fields=None, after=None):
+        page, nxt = self.category_page(category, limit, after)
+        return self.render(page, summaries, fields), nxt
+
+    def rank_source(self, source: str, limit=5, summaries=True, fields=None, after=None):
+        page, nxt = self.source_page(source, limit, after)
+        return self.render(page, summaries, fields), nxt
+
+    def rank_score(self, threshold=0.7, limit=5, summaries=True, fields=None, after=None):
+        page, nxt = self.score_page(threshold, limit, after)
+        return self.render(page, summaries, fields), nxt
+
+    def rank_search(self, query: str, limit=5, summaries=True, fields=None, mode=None, after=None):
+        page, nxt = self.search_page(query, limit, mode, after)
+        return self.render(page, summaries, fields), nxt
+
+    def rank_nearby(self, lat, lon, radius=10.0, limit=5, nearest=False, summaries=True, fields=None, after=None):
+        page, nxt = self.nearby_page(lat, lon, radius, limit, nearest, after)
+        return self.render(page, summaries, fields), nxt
+
     def simulate_user_events(self, num_events=1000):
         """Simulate random user interactions with articles for testing trending feed."""
         from random import choice, uniform, randint
-        from sqlalchemy import select
-        
 
         with get_session() as s:
-            articles = s.exec(select(Article)).scalars().all()
-
-            if not articles:
-                print("⚠️ No articles found in DB to simulate events.")
-                return
-
-            for _ in range(num_events):
-                art = choice(articles)
-                e = UserEvent(
-                    article_id=art.id,
-                    user_id=str(randint(1, 1000)),
-                    event_type=choice(["view", "click", "share"]),
-                    latitude=(art.latitude or 20.0) + uniform(-0.3, 0.3),
-                    longitude=(art.longitude or 78.0) + uniform(-0.3, 0.3),
-                    timestamp=datetime.utcnow() - timedelta(minutes=randint(0, 720))
-                )
-                s.add(e)
-            s.commit()
+            articles = s.exec(select(Article.id, Article.latitude, Article.longitude)).all()
+
+        if not articles:
+            print("⚠️ No articles found in DB to simulate events.")
+            return
+
+        events = []
+        for _ in range(num_events):
+            art_id, art_lat, art_lon = choice(articles)
+            events.append({
+                "article_id": art_id,
+                "user_id": str(randint(1, 1000)),
+                "event_type": choice(["view", "click", "share"]),
+                "latitude": (art_lat or 20.0) + uniform(-0.3, 0.3),
+                "longitude": (art_lon or 78.0) + uniform(-0.3, 0.3),
+                "timestamp": datetime.utcnow() - timedelta(minutes=randint(0, 720)),
+            })
+        self.events.add(events)
+        self.events.flush()
         print(f"✅ Simulated {num_events} user events.")
 
 
-    def compute_trending_feed(self, lat: float, lon: float, limit: int = 10):
-        """
-        Compute location-aware trending feed with realistic user-event weighting.
-        Factors considered:
-        - Engagement volume (views, clicks, shares)
-        - Recency of interactions
-        - Geographical proximity (boosts local relevance)
-        """
 
-        with get_session() as s:
-            articles = s.exec(select(Article)).all()
-            events = s.exec(select(UserEvent)).all()
-
-            if not articles or not events:
-                print("⚠️ Insufficient data to compute trending feed.")
-                return {"count": 0, "articles": []}
-
-            event_map = {}
-            for e in events:
-                stats = event_map.setdefault(
-                    e.article_id, {"count": 0, "recent_score": 0.0, "distance_score": 0.0}
-                )
-
-                # Engagement weight by type
-                weight = {"view": 1, "click": 2, "share": 3}.get(e.event_type, 1)
-                stats["count"] += weight
-
-                # Recency decay — newer interactions count more
-                age_hours = max(1, (datetime.utcnow() - e.timestamp).total_seconds() / 3600)
-                stats["recent_score"] += 1 / age_hours
-
-                # Proximity bonus — sharp decay after ~2000 km
-                distance = haversine(lat, lon, e.latitude, e.longitude)
-                proximity_factor = max(0.0, 1 - min(distance / 2000, 1))
-                stats["distance_score"] += proximity_factor * 10
-
-            # --- Normalization across all articles ---
-            def safe_max(v):
-                return max(v) if v else 1
-
-            max_count = safe_max([s["count"] for s in event_map.values()])
-            max_recent = safe_max([s["recent_score"] for s in event_map.values()])
-            max_distance = safe_max([s["distance_score"] for s in event_map.values()])
-
-            # --- Compute composite trending score ---
-            trending = []
-            for art in articles:
-                stats = event_map.get(art.id)
-                if not stats:
-                    continue
-                score = (
-                    (stats["count"] / max_count) * 0.4 +
-                    (stats["recent_score"] / max_recent) * 0.2 +
-                    (stats["distance_score"] / max_distance) * 0.4
-                )
-                trending.append((art, score))
-
-            # --- Rank and enrich ---
-            trending.sort(key=lambda x: x[1], reverse=True)
-            top = trending[:limit]
-
-            print(f"🔥 Trending Feed Generated ({len(top)} results):")
-            for art, score in top:
-                print(f"  - {art.title[:60]}... → score={round(score, 3)}")
-
-            # Reuse enrich() + attach score
-            enriched = self._enrich([a for a, _ in top])
-            for i, (_, score) in enumerate(top):
-                enriched[i]["trending_score"] = round(score, 3)
-
-            return {"count": len(enriched), "articles": enriched}
-        
-    def filter_based_on_nearby_location_and_recency_subset(
-        self,
-        query: str,
-        loc_name: str,
-        base_articles: List[dict],
-        radius_km: float = 500,
-        limit: int = 5,
-    ) -> List[dict]:
-        """
-        Re-rank a base set of already filtered articles by proximity + recency.
-        `base_articles` is a list of dicts (the enriched articles) to re-score.
-        """
-
-        coords = self.geo.geocode(loc_name)
-        if coords is None:
-            # fallback to just return the base list (or rank_search over base)
-            return base_articles[:limit]
+    def compute_trending_feed(self, lat: float, lon: float, limit: int = 10, summaries=True, fields=None, after=None):
+        """Location-aware trending feed; see `trending_candidates`. `next` is the keyset of the next page."""
+        top, nxt = self.trending_page(lat, lon, limit, after)
+        return self._trending_response(top, self.render(top, summaries, fields), nxt)
 
-        loc_lat, loc_lon = coords
+    async def acompute_trending_feed(self, lat: float, lon: float, limit: int = 10, summaries=True, fields=None, after=None):
+        top, nxt = await self.atrending_page(lat, lon, limit, after)
+        return self._trending_response(top, await self.arender(top, summaries, fields), nxt)
 
-        scored = []
-        for a in base_articles:
-            # We have enriched dict, so fields are direct
-            title = a.get("title", "")
-            desc = a.get("description", "")
-            tm = text_match_score(query, title, desc)
-            rs = a.get("relevance_score", 0) or 0
-            base_score = (0.6 * tm + 0.4 * rs)
-            # apply recency boost
-            # You may need to convert publication_date string → datetime if needed,
-            # or better store publication_date as datetime earlier
-            # For simplicity, assume your a["publication_date"] is datetime or parse it
-            # If it is string, parse to datetime
-            # Here we skip recency in this subset version for brevity, or reuse recency_boost
-            base_score *= recency_boost(
-                datetime.fromisoformat(a["publication_date"])
-                if isinstance(a.get("publication_date"), str)
-                else a.get("publication_date")
-            )
+    @staticmethod
+    def _trending_response(top: List[Candidate], enriched: List[dict], nxt: Optional[dict] = None):
+        if not top:
+            print("⚠️ Insufficient data to compute trending feed.")
+            return {"count": 0, "articles": [], "next": None}
 
-            dist = None
-            lat = a.get("latitude")
-            lon = a.get("longitude")
-            if lat is not None and lon is not None:
-                try:
-                    dist = haversine(loc_lat, loc_lon, lat, lon)
-                except Exception:
-                    dist = None
-
-            if dist is not None:
-                if dist <= radius_km:
-                    final = base_score + (1 / (1 + dist)) * 0.5
-                else:
-                    final = base_score * 0.5
-            else:
-                final = base_score
+        print(f"🔥 Trending Feed Generated ({len(top)} results):")
+        for c, item in zip(top, enriched):
+            print(f"  - {item.get('title', c.id)[:60]}... → score={round(c.score, 3)}")
 
-            scored.append((a, final))
+        return {"count": len(enriched), "articles": enriched, "next": nxt}
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        top = [a for a, _ in scored[:limit]]
-        return top
+    @staticmethod
+    def _rerank_candidates(coords, candidates: List[Candidate], radius_km: float = 500, limit: int = 5) -> List[Candidate]:
+        """
+        Proximity re-ranking of search candidates. Their `score` already is the
+        text-match / relevance / recency blend, so no text or dates are re-read.
+        Not geocoded → the first `limit` candidates, unchanged.
+        """
+        if coords is None:
+            return candidates[:limit]
+        if not candidates:
+            return []
+        order, dist = NewsService._nearby_order(
+            np.array([c.score for c in candidates], dtype=np.float64),
+            [c.latitude for c in candidates],
+            [c.longitude for c in candidates],
+            coords, radius_km, limit,
+        )
+        return [
+            candidates[i]._replace(extra={
+                **(candidates[i].extra or {}),
+                "distance_km": None if np.isnan(dist[i]) else round(float(dist[i]), 3),
+            })
+            for i in order
+        ]
+
+    @staticmethod
+    def _nearby_order(base_score: np.ndarray, lats, lons, coords, radius_km: float, limit: int):
+        """
+        Proximity + recency re-ranking: (top `limit` indices, distances).
+        Inside `radius_km` an article gains 0.5 / (1 + distance); outside it
+        its score is halved; without coordinates it keeps its score.
+        """
+        loc_lat, loc_lon = coords
+        # one vectorized distance pass; articles without coordinates get NaN
+        dist = haversine_many(loc_lat, loc_lon, np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64))
+        has_dist = ~np.isnan(dist)
+
+        final = np.where(
+            has_dist,
+            np.where(dist <= radius_km, base_score + (1 / (1 + dist)) * 0.5, base_score * 0.5),
+            base_score,
+        )
+        return np.argsort(-final, kind="stable")[:limit], dist
+
+    async def asmart_query(self, user_query: str, extract_intent, summaries: bool = True, fields=None) -> dict:
+        """
+        The /query pipeline as a concurrent plan:
+        - search only needs the raw query, so it runs while the intent is extracted
+        - geocoding starts as soon as the intent names a location
+        - category / source / nearby filtering works on `Candidate` records and
+          only the final survivors are rendered (and summarized)
+        """
+        search = asyncio.create_task(self.asearch_candidates(user_query))
+        try:
+            intent_info = await extract_intent(user_query)
+        except BaseException:
+            search.cancel()
+            raise
+        intents = intent_info.get("intent", [])
+        entities = intent_info.get("entities", [])
+        location = intent_info.get("location")
+        source = intent_info.get("source")
+
+        logging.info(f"User Query: {user_query}")
+        logging.info(f"Detected Intent(s): {intents}")
+        logging.info(f"Detected Entities: {entities}")
+        logging.info(f"Detected Location: {location}")
+        logging.info(f"Detected Source: {source}")
+
+        geocode = None
+        if "nearby" in intents and location:
+            geocode = asyncio.create_task(self.geo.ageocode(location))
+
+        logic_used = []
+        # Step 1: start with search
+        try:
+            base = await search
+        except BaseException:
+            if geocode is not None:
+                geocode.cancel()
+            raise
+        logic_used.append("Search")
+
+        # Step 2: filter by category if present
+        category = entities[0] if entities else None
+        if "category" in intents and category:
+            names = await self.acategory_names([c.id for c in base]) if base else {}
+            base = [c for c in base if any(category.lower() == n.lower() for n in names.get(c.id, []))]
+            logic_used.append(f"Category({category})")
+
+        # Step 3: filter by source if present (liberal filter)
+        source = next((e for e in entities if "news" in e.lower() or "times" in e.lower()), None)
+        if "source" in intents and source:
+            filtered_by_source = [c for c in base if c.source_name and source.lower() in c.source_name.lower()]
+            if filtered_by_source:
+                base = filtered_by_source
+                logic_used.append(f"Source({source})")
+            else:
+                # if no match by source, skip this filtering
+                logic_used.append(f"Source({source}) filter skipped (no match)")
+
+        # Step 4: if location asked, re-rank by nearby + recency using subset
+        if geocode is not None:
+            base = self._rerank_candidates(await geocode, base)
+            logic_used.append(f"Nearby({location})")
+
+        # Step 5: render what is left
+        articles = await self.arender(base, summaries, fields)
+
+        logic_str = " + ".join(logic_used)
+        logging.info(f"✅ Retrieval Logic Used: {logic_str}")
+
+        return {
+            "query": user_query,
+            "intent": intents,
+            "logic_used": logic_str,
+            "count": len(articles),
+            "articles": articles
+        }
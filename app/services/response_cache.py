@@ -0,0 +1,215 @@
+# app/services/response_cache.py
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from app.database import data_version
+
+
+class SQLiteResponseStore:
+    """
+    Shared local backend: a small SQLite file that every worker process on
+    the host reads and writes, so one worker's rendered response serves the
+    others. Oldest rows beyond `max_rows` are evicted.
+    """
+
+    def __init__(self, path: str, max_rows: int = 20000):
+        self.max_rows = max_rows
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache "
+            "(key TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            row = self._conn.execute("SELECT etag, body FROM response_cache WHERE key = ?", (key,)).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def put(self, key: str, etag: str, body: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, etag, body, created_at) VALUES (?, ?, ?, ?)",
+                (key, etag, body, time.time()),
+            )
+            self._writes += 1
+            if self._writes % 200 == 0:
+                self._conn.execute(
+                    "DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+                )
+
+
+class ResponseCache:
+    """
+    Rendered JSON responses of the read endpoints, keyed by
+    (path, normalized params, data version).
+
+    The data version is a counter in `app_state` that ingest bumps after each
+    commit (`bump_data_version`); it is re-read at most every
+    `RESPONSE_CACHE_VERSION_CHECK_S` seconds, and entries of older versions
+    simply stop matching. Responses with summaries still pending are not
+    cached. Every response carries a content ETag, so a client sending
+    If-None-Match gets a 304 without the body.
+
+    With `version_source` (the article snapshot's `aversion`) the key uses
+    the version of the snapshot rankings actually run on, so a response
+    computed from the previous snapshot is never stored under the new version.
+
+    RESPONSE_CACHE_BACKEND=sqlite adds a shared on-disk tier
+    (`RESPONSE_CACHE_PATH`) behind the in-process LRU, for multi-worker
+    deployments on one host. RESPONSE_CACHE_SIZE=0 disables caching.
+    """
+
+    def __init__(
+        self,
+        memory_size: Optional[int] = None,
+        backend: Optional[str] = None,
+        version_check_s: Optional[float] = None,
+        version_source: Optional[Callable[[], Awaitable[int]]] = None,
+    ):
+        self.memory_size = memory_size if memory_size is not None else int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+        self.latlon_decimals = int(os.getenv("RESPONSE_CACHE_LATLON_DECIMALS", "3"))
+        self.version_check_s = version_check_s if version_check_s is not None else float(os.getenv("RESPONSE_CACHE_VERSION_CHECK_S", "2"))
+        backend = backend or os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+        self.store = None
+        if backend == "sqlite" and self.memory_size:
+            self.store = SQLiteResponseStore(
+                os.getenv("RESPONSE_CACHE_PATH", "./response_cache.db"),
+                max_rows=int(os.getenv("RESPONSE_CACHE_MAX_ROWS", "20000")),
+            )
+
+        self._lru: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._version_checked = 0.0
+        self._version_source = version_source
+        self._counters = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "not_modified": 0, "uncacheable": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_size > 0
+
+    async def aversion(self) -> int:
+        if self._version_source is not None:
+            self._version = await self._version_source()
+            return self._version
+        now = time.monotonic()
+        if now - self._version_checked >= self.version_check_s:
+            self._version = await asyncio.to_thread(data_version)
+            self._version_checked = now
+        return self._version
+
+    def quantize(self, deg: float) -> float:
+        """Coordinates rounded to `RESPONSE_CACHE_LATLON_DECIMALS` (3 ≈ 110 m), so nearby requests share entries."""
+        return round(deg, self.latlon_decimals)
+
+    @staticmethod
+    def make_key(path: str, params: dict, version: int) -> str:
+        payload = json.dumps([path, sorted(params.items()), version], default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def encode(content) -> Tuple[str, bytes]:
+        """(etag, body) with the same JSON encoding FastAPI's JSONResponse uses."""
+        body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        return '"' + hashlib.sha1(body).hexdigest() + '"', body
+
+    @staticmethod
+    def cacheable(content) -> bool:
+        """False while any article still waits for its summary."""
+        for a in content.get("articles") or []:
+            if a.get("summary_pending") or ("llm_summary" in a and a["llm_summary"] is None):
+                return False
+        return True
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, key: str, entry: Tuple[str, bytes]):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_size:
+                self._lru.popitem(last=False)
+
+    async def serve(
+        self,
+        path: str,
+        params: dict,
+        compute: Callable[[], Awaitable[dict]],
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[int, str, Optional[bytes], str]:
+        """
+        (status, etag, body, cache) for a request: 304 with no body when
+        `if_none_match` matches, else 200 with the cached or freshly computed
+        body. `cache` is "hit", "miss" or "bypass".
+        """
+        entry, cache = None, "miss"
+        if self.enabled:
+            key = self.make_key(path, params, await self.aversion())
+            with self._lock:
+                entry = self._lru.get(key)
+                if entry is not None:
+                    self._lru.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+            if entry is None and self.store is not None:
+                entry = await asyncio.to_thread(self.store.get, key)
+                if entry is not None:
+                    self._count("shared_hits")
+                    self._remember(key, entry)
+            if entry is not None:
+                cache = "hit"
+
+        if entry is None:
+            content = await compute()
+            entry = self.encode(content)
+            if not self.enabled:
+                cache = "bypass"
+            elif self.cacheable(content):
+                self._count("misses")
+                self._remember(key, entry)
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.put, key, *entry)
+            else:
+                self._count("uncacheable")
+                cache = "bypass"
+
+        etag, body = entry
+        if if_none_match and (
+            if_none_match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        ):
+            self._count("not_modified")
+            return 304, etag, None, cache
+        return 200, etag, body, cache
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._version_checked = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["memory_entries"] = len(self._lru)
+        counters["data_version"] = self._version
+        counters["backend"] = "sqlite" if self.store is not None else "memory"
+        hits = counters["memory_hits"] + counters["shared_hits"]
+        lookups = hits + counters["misses"] + counters["uncacheable"]
+        counters["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return counters
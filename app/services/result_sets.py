@@ -0,0 +1,66 @@
+# app/services/result_sets.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+class RankedResultSets:
+    """
+    Short-lived ranked candidate lists of the computed rankings (search,
+    nearby, trending), so the pages after the first are slices of the list
+    the first page was cut from instead of a new ranking.
+
+    A set is (candidates, size ranked for, complete). It lives
+    `RESULT_SET_TTL_S` seconds (default 300); at most `RESULT_SET_CACHE_SIZE`
+    sets are kept (LRU). Sets longer than `RESULT_SET_MAX` candidates are not
+    kept: pages that deep rank again each time. A page whose set has expired
+    recomputes the ranking and continues after the cursor's article.
+    """
+
+    def __init__(self, size: Optional[int] = None, ttl_s: Optional[float] = None, max_results: Optional[int] = None):
+        self.size = size if size is not None else int(os.getenv("RESULT_SET_CACHE_SIZE", "256"))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("RESULT_SET_TTL_S", "300"))
+        self.max_results = max_results or int(os.getenv("RESULT_SET_MAX", "1000"))
+        self._lru: "OrderedDict[str, Tuple[float, Tuple[list, int, bool]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stored": 0}
+
+    def pool(self, limit: int) -> int:
+        """How many candidates the first page ranks: 20 pages' worth, at least 100 (grown on demand)."""
+        return min(max(limit * 20, 100), self.max_results)
+
+    @staticmethod
+    def make_key(kind: str, **params) -> str:
+        payload = json.dumps([kind, sorted(params.items())], default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[list, int, bool]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None or now - entry[0] > self.ttl_s:
+                self._lru.pop(key, None)
+                self._counters["misses"] += 1
+                return None
+            self._lru.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[1]
+
+    def put(self, key: str, ranked: List, size: int, complete: bool):
+        if self.size <= 0 or len(ranked) > self.max_results:
+            return
+        with self._lock:
+            self._lru[key] = (time.monotonic(), (ranked, size, complete))
+            self._lru.move_to_end(key)
+            self._counters["stored"] += 1
+            while len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "sets": len(self._lru), "ttl_s": self.ttl_s, "max_results": self.max_results}
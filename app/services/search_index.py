@@ -0,0 +1,249 @@
+# app/services/search_index.py
+
+import asyncio
+import os
+import sys
+import time
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import select, func
+from app.database import engine, async_engine, get_session, data_version
+from app.models import Article
+from app.utils.text_utils import tokenize, text_match_score
+
+TITLE_HIT = 1
+DESCRIPTION_HIT = 2
+
+
+class FTS5SearchIndex:
+    """
+    Candidate retrieval through the SQLite FTS5 table `article_fts`
+    (created and kept in sync by triggers in `app.database`).
+    BM25 weights title matches over description matches.
+    """
+
+    TITLE_WEIGHT = 2.0
+    DESCRIPTION_WEIGHT = 1.0
+
+    def _statement(self, query: str, k: int):
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return None
+        # quoted terms: query words are never parsed as FTS operators
+        match = " OR ".join(f'"{t}"' for t in tokens)
+        sql = text(
+            "SELECT a.id, a.title, a.description FROM article_fts "
+            "JOIN article a ON a.rowid = article_fts.rowid "
+            "WHERE article_fts MATCH :match "
+            "ORDER BY bm25(article_fts, :tw, :dw) "
+            "LIMIT :k"
+        ).bindparams(match=match, tw=self.TITLE_WEIGHT, dw=self.DESCRIPTION_WEIGHT, k=k)
+        return sql
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (article_id, text_match_score) pairs, best BM25 first."""
+        sql = self._statement(query, k)
+        if sql is None:
+            return []
+        with engine.connect() as conn:
+            rows = conn.execute(sql).all()
+        return [(r[0], text_match_score(query, r[1], r[2])) for r in rows]
+
+    async def asearch(self, query: str, k: int) -> List[Tuple[str, float]]:
+        sql = self._statement(query, k)
+        if sql is None:
+            return []
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(sql)).all()
+        return [(r[0], text_match_score(query, r[1], r[2])) for r in rows]
+
+    def rebuild(self):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO article_fts(article_fts) VALUES ('rebuild')"))
+
+    def stats(self) -> dict:
+        with engine.connect() as conn:
+            docs = conn.execute(text("SELECT COUNT(*) FROM article_fts")).scalar()
+        return {"backend": "fts5", "articles": docs}
+
+
+class InvertedSearchIndex:
+    """
+    In-process inverted index with precomputed token sets.
+
+    Each token maps to a compact posting list: an `array('I')` of article
+    ordinals (ascending) and a parallel `array('B')` of flags (title and/or
+    description hit). Scoring a query only touches the postings of its tokens,
+    with the same weights as `text_match_score` (2 per title hit, 1 per
+    description hit), so no article text is re-tokenized per request.
+
+    The index is built once and then refreshed incrementally from rows whose
+    `updated_at` moved past the last refresh; a re-ingested article gets a
+    new ordinal and the old one is tombstoned until the next full rebuild.
+    When the data version moved, the stored ids are compared with the
+    index's and deleted articles are tombstoned the same way.
+    """
+
+    def __init__(self, refresh_interval: Optional[float] = None, tombstone_ratio: float = 0.25):
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None
+            else float(os.getenv("SEARCH_INDEX_REFRESH_S", "30"))
+        )
+        self.tombstone_ratio = tombstone_ratio
+        self._lock = threading.RLock()
+        self._reset()
+        self._built = False
+        self._last_check = 0.0
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._ordinal: Dict[str, int] = {}
+        self._alive = bytearray()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._watermark: Optional[datetime] = None
+        self._version: Optional[int] = None
+        self._built_at: Optional[float] = None
+
+    def _add(self, article_id: str, title: Optional[str], description: Optional[str]):
+        old = self._ordinal.get(article_id)
+        if old is not None:
+            self._alive[old] = 0
+        ordinal = len(self._ids)
+        self._ids.append(article_id)
+        self._ordinal[article_id] = ordinal
+        self._alive.append(1)
+
+        flags: Dict[str, int] = {}
+        for tok in tokenize(title or ""):
+            flags[tok] = flags.get(tok, 0) | TITLE_HIT
+        for tok in tokenize(description or ""):
+            flags[tok] = flags.get(tok, 0) | DESCRIPTION_HIT
+        for tok, f in flags.items():
+            posting = self._postings.get(tok)
+            if posting is None:
+                posting = self._postings[tok] = (array("I"), array("B"))
+            posting[0].append(ordinal)
+            posting[1].append(f)
+
+    def rebuild(self):
+        """Full rebuild from the database (also drops tombstones)."""
+        version = data_version()
+        with get_session() as s:
+            rows = s.exec(
+                select(Article.id, Article.title, Article.description, Article.updated_at)
+            ).all()
+        with self._lock:
+            self._reset()
+            for article_id, title, description, _ in rows:
+                self._add(article_id, title, description)
+            stamps = [r[3] for r in rows if r[3] is not None]
+            self._watermark = max(stamps) if stamps else None
+            self._version = version
+            self._built = True
+            self._built_at = time.time()
+            self._last_check = time.monotonic()
+
+    def refresh(self) -> int:
+        """Apply articles inserted/updated/deleted since the last build or refresh."""
+        if not self._built:
+            self.rebuild()
+            return len(self._ids)
+        version = data_version()
+        with get_session() as s:
+            stmt = select(Article.id, Article.title, Article.description, Article.updated_at)
+            if self._watermark is not None:
+                # >= : rows sharing the watermark timestamp may have committed later
+                stmt = stmt.where(Article.updated_at >= self._watermark)
+            else:
+                stmt = stmt.where(Article.updated_at.is_not(None))
+            rows = s.exec(stmt).all()
+            total = s.exec(select(func.count()).select_from(Article)).one()
+            # a batch may delete and insert articles alike, so counts can't tell; ids can
+            present = None
+            if version != self._version or total < len(self._ordinal):
+                present = set(s.exec(select(Article.id)).all())
+
+        with self._lock:
+            self._last_check = time.monotonic()
+            deleted = [a for a in self._ordinal if a not in present] if present is not None else []
+            for article_id in deleted:
+                self._alive[self._ordinal.pop(article_id)] = 0
+            changed = [r for r in rows if r[0] not in self._ordinal or r[3] != self._watermark]
+            for article_id, title, description, _ in changed:
+                self._add(article_id, title, description)
+            if rows:
+                self._watermark = max(r[3] for r in rows)
+            self._version = version
+            dead = len(self._ids) - len(self._ordinal)
+            if dead and dead > self.tombstone_ratio * len(self._ids):
+                self.rebuild()
+        return len(changed) + len(deleted)
+
+    def _refresh_due(self) -> bool:
+        return not self._built or time.monotonic() - self._last_check > self.refresh_interval
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (article_id, text_match_score) pairs, best match first."""
+        if self._refresh_due():
+            self.refresh()
+
+        scores: Dict[int, int] = {}
+        with self._lock:
+            alive = self._alive
+            for tok in set(tokenize(query)):
+                posting = self._postings.get(tok)
+                if posting is None:
+                    continue
+                for ordinal, f in zip(*posting):
+                    if alive[ordinal]:
+                        scores[ordinal] = scores.get(ordinal, 0) + (2 if f & TITLE_HIT else 0) + (1 if f & DESCRIPTION_HIT else 0)
+            ids = self._ids
+            top = sorted(scores.items(), key=lambda t: t[1], reverse=True)[:k]
+            return [(ids[o], float(sc)) for o, sc in top]
+
+    async def asearch(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Scoring is in-memory; only a due refresh (a DB read) is moved off the event loop."""
+        if self._refresh_due():
+            await asyncio.to_thread(self.refresh)
+        return self.search(query, k)
+
+    def stats(self) -> dict:
+        with self._lock:
+            posting_bytes = sum(
+                o.buffer_info()[1] * o.itemsize + f.buffer_info()[1] * f.itemsize
+                for o, f in self._postings.values()
+            )
+            dict_bytes = sys.getsizeof(self._postings) + sum(sys.getsizeof(t) for t in self._postings)
+            id_bytes = sys.getsizeof(self._ids) + sys.getsizeof(self._ordinal) + sum(sys.getsizeof(i) for i in self._ids)
+            return {
+                "backend": "memory",
+                "articles": len(self._ordinal),
+                "tombstones": len(self._ids) - len(self._ordinal),
+                "tokens": len(self._postings),
+                "postings": sum(len(o) for o, _ in self._postings.values()),
+                "memory_bytes": posting_bytes + dict_bytes + id_bytes + len(self._alive),
+                "built_at": self._built_at,
+                "watermark": self._watermark.isoformat() if self._watermark else None,
+            }
+
+
+def build_search_index():
+    """
+    SEARCH_BACKEND=fts5|memory. Defaults to FTS5 when the backend is SQLite
+    and the table exists, otherwise to the in-memory index (built eagerly).
+    """
+    backend = os.getenv("SEARCH_BACKEND")
+    if backend != "memory" and engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            has_fts = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_fts'")
+            ).first()
+        if has_fts:
+            return FTS5SearchIndex()
+    index = InvertedSearchIndex()
+    index.rebuild()
+    return index
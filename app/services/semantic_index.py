@@ -0,0 +1,363 @@
+# app/services/semantic_index.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import select
+from app.database import engine, get_session
+from app.models import Article
+from app.utils.text_embedding import HashedLSA
+
+
+def default_index_dir() -> str:
+    """`SEMANTIC_INDEX_DIR`, else `<db name>.semantic/` next to a SQLite database."""
+    configured = os.getenv("SEMANTIC_INDEX_DIR")
+    if configured:
+        return configured
+    if engine.dialect.name == "sqlite" and engine.url.database:
+        return os.path.splitext(os.path.abspath(engine.url.database))[0] + ".semantic"
+    return os.path.abspath("semantic_index")
+
+
+def article_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), chunk):
+        out[i:i + chunk] = np.argmax(np.asarray(vectors[i:i + chunk]) @ centroids.T, axis=1)
+    return out
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iters: int = 10, sample: int = 100_000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) the vectors."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    pick = np.sort(rng.choice(n, min(n, sample), replace=False))
+    x = np.asarray(vectors[pick], dtype=np.float32)
+    if nlist <= 1:
+        c = x.mean(axis=0, keepdims=True)
+        return c / max(float(np.linalg.norm(c)), 1e-12)
+    c = x[rng.choice(len(x), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = nearest_centroid(x, c)
+        sums = np.zeros_like(c)
+        np.add.at(sums, assign, x)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        if empty.any():
+            sums[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+        c = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return c.astype(np.float32)
+
+
+class SemanticIndex:
+    """
+    Embedding retrieval for `/search` and the smart query: articles are
+    embedded with `HashedLSA` (hashed TF-IDF + LSA, CPU only) at ingest and
+    searched through an IVF index.
+
+    Files live in `SEMANTIC_INDEX_DIR` (default `news.semantic/` next to
+    news.db): the model, the float32 vector matrix (`.npy`, memory-mapped
+    when served), the article ids and the IVF centroids / inverted lists.
+    `manifest.json` names the current generation and is replaced atomically,
+    so ingest can write a new generation while the API keeps serving the old
+    one; the API picks up a new manifest within `SEARCH_INDEX_REFRESH_S`.
+
+    IVF: vectors are clustered with spherical k-means into about 4·√N lists
+    and a query only scans the `SEMANTIC_NPROBE` lists with the closest
+    centroids. Below `SEMANTIC_IVF_MIN` articles there is a single list,
+    i.e. exact search.
+    """
+
+    def __init__(self, directory: Optional[str] = None, nprobe: Optional[int] = None, refresh_interval: Optional[float] = None):
+        self.directory = directory or default_index_dir()
+        self.nprobe = nprobe or int(os.getenv("SEMANTIC_NPROBE", "8"))
+        self.ivf_min = int(os.getenv("SEMANTIC_IVF_MIN", "4096"))
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None
+            else float(os.getenv("SEARCH_INDEX_REFRESH_S", "30"))
+        )
+        self._state: Optional[dict] = None
+        self._manifest_mtime: Optional[int] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    # --- serving --------------------------------------------------------------
+
+    def reload(self) -> bool:
+        """Load the current generation if the manifest changed. True when an index is available."""
+        self._last_check = time.monotonic()
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            self._state = None
+            return False
+        if mtime != self._manifest_mtime:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            state = self._load(manifest)
+            with self._lock:
+                self._state, self._manifest_mtime = state, mtime
+        return True
+
+    def _load(self, manifest: dict) -> dict:
+        path = lambda name: os.path.join(self.directory, manifest[name])
+        with np.load(path("ivf")) as z:
+            centroids, offsets, order = z["centroids"], z["offsets"], z["order"]
+        return {
+            "manifest": manifest,
+            "model": HashedLSA.load(path("model")),
+            "vectors": np.load(path("vectors"), mmap_mode="r"),
+            "ids": np.load(path("ids")),
+            "centroids": centroids,
+            "offsets": offsets,
+            "order": order,
+        }
+
+    def _reload_due(self) -> bool:
+        return time.monotonic() - self._last_check > self.refresh_interval
+
+    def available(self) -> bool:
+        if self._reload_due():
+            self.reload()
+        return self._state is not None
+
+    def search(self, query: str, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top-k (article_id, cosine similarity) pairs, most similar first."""
+        if self._reload_due():
+            self.reload()
+        state = self._state
+        return self._search(state, query, k, nprobe) if state is not None else []
+
+    async def asearch(self, query: str, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        if self._reload_due():
+            await asyncio.to_thread(self.reload)
+        state = self._state
+        if state is None:
+            return []
+        # page faults on the memory-mapped vectors are disk reads: keep them off the event loop
+        return await asyncio.to_thread(self._search, state, query, k, nprobe)
+
+    def _search(self, state: dict, query: str, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        q = state["model"].transform([query])[0]
+        if not q.any():
+            return []
+        centroids, offsets, order = state["centroids"], state["offsets"], state["order"]
+        nprobe = min(nprobe or self.nprobe, len(centroids))
+        if nprobe >= len(centroids):
+            cand = order
+        else:
+            probe = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe]
+            cand = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+        return self._top(state, cand, q, k)
+
+    @staticmethod
+    def _top(state: dict, cand: np.ndarray, q: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if not len(cand):
+            return []
+        vectors = state["vectors"]
+        if len(cand) == len(vectors):
+            # exhaustive (cand is a permutation of all rows): stream the matrix instead of gathering it
+            full = np.concatenate([np.asarray(vectors[i:i + 65536]) @ q for i in range(0, len(vectors), 65536)])
+            sims = full[cand]
+        else:
+            sims = np.asarray(vectors[cand]) @ q
+        top = np.argpartition(-sims, min(k, len(sims)) - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        ids = state["ids"]
+        return [(str(ids[cand[i]]), float(sims[i])) for i in top]
+
+    def exact_search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Brute force over every vector (the recall baseline for benchmarks)."""
+        if self._state is None:
+            self.reload()
+        state = self._state
+        if state is None:
+            return []
+        q = state["model"].transform([query])[0]
+        return self._top(state, np.arange(len(state["ids"])), q, k) if q.any() else []
+
+    def stats(self) -> dict:
+        self.available()
+        state = self._state
+        if state is None:
+            return {"backend": "semantic", "available": False, "directory": self.directory}
+        m = state["manifest"]
+        return {
+            "backend": "semantic",
+            "available": True,
+            "directory": self.directory,
+            "generation": m["generation"],
+            "articles": len(state["ids"]),
+            "dims": int(state["vectors"].shape[1]),
+            "lists": len(state["centroids"]),
+            "nprobe": min(self.nprobe, len(state["centroids"])),
+            "vector_bytes": int(state["vectors"].nbytes),
+            "built_at": m["built_at"],
+        }
+
+    # --- building (ingest side) ---------------------------------------------
+
+    def _nlist(self, n: int) -> int:
+        return 1 if n < self.ivf_min else int(min(4096, 4 * np.sqrt(n)))
+
+    @staticmethod
+    def _texts_by_id(ids: List[str]) -> Dict[str, str]:
+        out = {}
+        with get_session() as s:
+            for i in range(0, len(ids), 500):
+                for a_id, title, description in s.exec(
+                    select(Article.id, Article.title, Article.description).where(Article.id.in_(ids[i:i + 500]))
+                ):
+                    out[a_id] = article_text(title, description)
+        return out
+
+    @staticmethod
+    def _scan_articles(batch_size: int) -> Iterable[List[Tuple[str, str]]]:
+        """(id, text) batches over the whole table, keyset-paginated by id."""
+        last_id = ""
+        while True:
+            with get_session() as s:
+                rows = s.exec(
+                    select(Article.id, Article.title, Article.description)
+                    .where(Article.id > last_id).order_by(Article.id).limit(batch_size)
+                ).all()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [(r[0], article_text(r[1], r[2])) for r in rows]
+
+    def build(self, dims: Optional[int] = None, fit_sample: Optional[int] = None, batch_size: int = 5000, scan=None) -> dict:
+        """
+        Fit a new model on (a sample of) all articles and embed every article.
+        `scan(batch_size)` yields lists of (id, text); defaults to the article table.
+        """
+        scan = scan or self._scan_articles
+        dims = dims or int(os.getenv("SEMANTIC_DIMS", "128"))
+        fit_sample = fit_sample or int(os.getenv("SEMANTIC_FIT_SAMPLE", "50000"))
+        rng = np.random.default_rng(0)
+
+        # pass 1: ids + a reservoir sample of texts for fitting
+        ids, sample = [], []
+        for batch in scan(batch_size):
+            for a_id, text in batch:
+                ids.append(a_id)
+                if len(sample) < fit_sample:
+                    sample.append(text)
+                else:
+                    j = int(rng.integers(0, len(ids)))
+                    if j < fit_sample:
+                        sample[j] = text
+        if not ids:
+            return {"articles": 0}
+        model = HashedLSA.fit(sample, dims=dims)
+        del sample
+
+        # pass 2: embed straight into the new memory-mapped matrix
+        gen = self._generation()
+        os.makedirs(self.directory, exist_ok=True)
+        vectors = np.lib.format.open_memmap(
+            os.path.join(self.directory, f"vectors-{gen}.npy"), mode="w+", dtype=np.float32, shape=(len(ids), model.dims)
+        )
+        row = 0
+        for batch in scan(batch_size):
+            batch = batch[:len(ids) - row]  # rows inserted since pass 1 wait for the next update
+            vectors[row:row + len(batch)] = model.transform([t for _, t in batch])
+            row += len(batch)
+            if row >= len(ids):
+                break
+        vectors.flush()
+        return self._publish(gen, model, ids, vectors, train=True)
+
+    def update(self, inserted: Iterable[str] = (), updated: Iterable[str] = (), deleted: Iterable[str] = ()) -> dict:
+        """
+        Apply an ingest change set with the current model: drop deleted and
+        updated rows, embed inserted and updated ones. Builds from scratch
+        when there is no index yet.
+        """
+        if not self.reload():
+            return self.build()
+        changed = list(dict.fromkeys([*inserted, *updated]))
+        dropped = set(deleted) | set(changed)
+        if not changed and not dropped:
+            return self.stats()
+        state = self._state
+        model = state["model"]
+        old_ids = state["ids"]
+        keep = np.flatnonzero(~np.isin(old_ids, np.array(sorted(dropped), dtype=old_ids.dtype))) if dropped else np.arange(len(old_ids))
+        texts = self._texts_by_id(changed)
+        new_ids = [i for i in changed if i in texts]
+
+        gen = self._generation()
+        vectors = np.lib.format.open_memmap(
+            os.path.join(self.directory, f"vectors-{gen}.npy"), mode="w+", dtype=np.float32,
+            shape=(len(keep) + len(new_ids), model.dims),
+        )
+        for i in range(0, len(keep), 65536):
+            rows = keep[i:i + 65536]
+            vectors[i:i + len(rows)] = state["vectors"][rows]
+        for i in range(0, len(new_ids), 5000):
+            chunk = new_ids[i:i + 5000]
+            vectors[len(keep) + i:len(keep) + i + len(chunk)] = model.transform([texts[a] for a in chunk])
+        vectors.flush()
+        ids = [str(x) for x in old_ids[keep]] + new_ids
+        # centroids stay valid while the corpus hasn't grown much since they were trained
+        trained_on = state["manifest"].get("trained_on", 0)
+        nlist = len(state["centroids"])
+        retrain = self._nlist(len(ids)) != nlist and (nlist == 1 or not trained_on / 2 <= len(ids) <= 2 * trained_on)
+        return self._publish(gen, model, ids, vectors, train=retrain, centroids=None if retrain else state["centroids"],
+                             model_file=state["manifest"]["model"], trained_on=trained_on)
+
+    def _generation(self) -> str:
+        return datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+
+    def _publish(self, gen: str, model: HashedLSA, ids: List[str], vectors: np.ndarray, train: bool,
+                 centroids: Optional[np.ndarray] = None, model_file: Optional[str] = None, trained_on: int = 0) -> dict:
+        if not len(ids):
+            centroids = np.zeros((1, model.dims), dtype=np.float32)
+        elif train or centroids is None:
+            centroids = train_centroids(vectors, self._nlist(len(ids)))
+            trained_on = len(ids)
+        assign = nearest_centroid(vectors, centroids)
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1)).astype(np.int64)
+
+        if model_file is None:
+            model_file = f"model-{gen}.npz"
+            model.save(os.path.join(self.directory, model_file))
+        np.save(os.path.join(self.directory, f"ids-{gen}.npy"), np.array(ids))
+        with open(os.path.join(self.directory, f"ivf-{gen}.npz"), "wb") as f:
+            np.savez(f, centroids=centroids, offsets=offsets, order=order)
+        manifest = {
+            "generation": gen,
+            "model": model_file,
+            "vectors": f"vectors-{gen}.npy",
+            "ids": f"ids-{gen}.npy",
+            "ivf": f"ivf-{gen}.npz",
+            "trained_on": trained_on,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+        # older generations: readers that still map them keep their (unlinked) files
+        current = set(manifest.values())
+        for name in os.listdir(self.directory):
+            if name != "manifest.json" and name not in current and name.split("-")[0] in ("model", "vectors", "ids", "ivf"):
+                os.remove(os.path.join(self.directory, name))
+        self._manifest_mtime = None
+        self.reload()
+        return self.stats()
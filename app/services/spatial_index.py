@@ -0,0 +1,114 @@
+# app/services/spatial_index.py
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from sqlalchemy import or_, and_
+from sqlmodel import select
+from app.database import get_session, get_async_session
+from app.models import Article
+from app.services.article_snapshot import IdView
+from app.utils import geohash
+from app.utils.vector_kernels import Coordinates
+
+
+class GeohashSpatialIndex:
+    """
+    Radius / k-nearest lookups over `Article.geohash`.
+
+    A query picks the finest geohash precision whose 3x3 cell neighbourhood
+    covers the search radius, turns those cells into prefix range scans on the
+    indexed `geohash` column, and only computes exact (vectorized) haversine
+    distances for the rows that come back. Works the same on SQLite and Postgres.
+
+    With an article snapshot the same prefix ranges are binary searches over
+    its geohash-sorted rows instead of queries.
+    """
+
+    def __init__(self, snapshots=None):
+        self.snapshots = snapshots
+
+    @staticmethod
+    def _cells(lat: float, lon: float, precision: int) -> Optional[List[str]]:
+        return geohash.neighbors(geohash.encode(lat, lon, precision)) if precision > 0 else None
+
+    @staticmethod
+    def _snapshot_points(snap, lat: float, lon: float, precision: int) -> Coordinates:
+        rows = snap.geohash_candidates(GeohashSpatialIndex._cells(lat, lon, precision))
+        return Coordinates.from_arrays(IdView(snap.ids, rows), snap.latitude[rows], snap.longitude[rows])
+
+    def _candidates_stmt(self, lat: float, lon: float, precision: int):
+        stmt = select(Article.id, Article.latitude, Article.longitude)
+        cells = self._cells(lat, lon, precision)
+        if cells is not None:
+            stmt = stmt.where(or_(*[
+                and_(Article.geohash >= cell, Article.geohash < cell + geohash.PREFIX_END)
+                for cell in cells
+            ]))
+        else:
+            stmt = stmt.where(Article.geohash.is_not(None))
+        return stmt
+
+    def _candidates(self, lat: float, lon: float, precision: int) -> Coordinates:
+        snap = self.snapshots.current() if self.snapshots is not None else None
+        if snap is not None:
+            return self._snapshot_points(snap, lat, lon, precision)
+        with get_session() as s:
+            return Coordinates.from_rows(s.exec(self._candidates_stmt(lat, lon, precision)).all())
+
+    async def _acandidates(self, lat: float, lon: float, precision: int) -> Coordinates:
+        snap = await self.snapshots.acurrent() if self.snapshots is not None else None
+        if snap is not None:
+            return self._snapshot_points(snap, lat, lon, precision)
+        async with get_async_session() as s:
+            return Coordinates.from_rows((await s.exec(self._candidates_stmt(lat, lon, precision))).all())
+
+    @staticmethod
+    def _inside(points: Coordinates, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        dist = points.distances_to(lat, lon)
+        inside = np.flatnonzero(dist <= radius_km)
+        order = inside[np.argsort(dist[inside], kind="stable")]
+        return [(points.ids[i], float(dist[i])) for i in order]
+
+    @staticmethod
+    def _k_nearest(points: Coordinates, lat: float, lon: float, k: int, precision: int) -> Optional[List[Tuple[str, float]]]:
+        """The k nearest of `points`, or None if the cell neighbourhood must be widened."""
+        if len(points) < k and precision > 0:
+            return None
+        dist = points.distances_to(lat, lon)
+        hits = [(points.ids[i], float(dist[i])) for i in np.argsort(dist, kind="stable")[:k]]
+        if precision == 0 or hits and hits[-1][1] <= geohash.covered_radius_km(precision, lat):
+            return hits
+        return None
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(article_id, distance_km) for articles within `radius_km`, nearest first."""
+        precision = geohash.precision_for_radius(radius_km, lat)
+        return self._inside(self._candidates(lat, lon, precision), lat, lon, radius_km)
+
+    async def awithin(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        precision = geohash.precision_for_radius(radius_km, lat)
+        return self._inside(await self._acandidates(lat, lon, precision), lat, lon, radius_km)
+
+    def nearest(self, lat: float, lon: float, k: int, max_precision: int = 6) -> List[Tuple[str, float]]:
+        """
+        The k nearest articles regardless of distance. Widens the cell
+        neighbourhood until the k-th hit is provably inside it.
+        """
+        if k <= 0:
+            return []
+        for precision in range(max_precision, -1, -1):
+            hits = self._k_nearest(self._candidates(lat, lon, precision), lat, lon, k, precision)
+            if hits is not None:
+                return hits
+        return []
+
+    async def anearest(self, lat: float, lon: float, k: int, max_precision: int = 6) -> List[Tuple[str, float]]:
+        if k <= 0:
+            return []
+        for precision in range(max_precision, -1, -1):
+            hits = self._k_nearest(await self._acandidates(lat, lon, precision), lat, lon, k, precision)
+            if hits is not None:
+                return hits
+        return []
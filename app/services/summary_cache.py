@@ -0,0 +1,186 @@
+# app/services/summary_cache.py
+
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlmodel import select, delete, func, update
+from app.database import get_session
+from app.models import LLMSummary
+
+
+class SummaryCache:
+    """
+    Two-tier cache for LLM summaries:
+    - an in-process LRU in front (no DB round-trip for warm keys)
+    - the persistent `llm_summary` table behind it (survives restarts)
+
+    Entries are content-addressed (see `make_key`), so they never need to be
+    invalidated; eviction only bounds size and, optionally, age. Memory hits
+    refresh their row's `last_used_at` in batches, at most every
+    `SUMMARY_CACHE_TOUCH_S` seconds and before each eviction, so the summaries
+    read most stay in the table.
+    """
+
+    def __init__(
+        self,
+        memory_size: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        ttl_hours: Optional[float] = None,
+        touch_s: Optional[float] = None,
+    ):
+        self.memory_size = memory_size or int(os.getenv("SUMMARY_CACHE_MEMORY_SIZE", "2048"))
+        self.max_rows = max_rows or int(os.getenv("SUMMARY_CACHE_MAX_ROWS", "50000"))
+        # 0 / unset → entries never expire (content-addressed keys cannot go stale)
+        ttl = ttl_hours if ttl_hours is not None else float(os.getenv("SUMMARY_CACHE_TTL_HOURS", "0"))
+        self.ttl = timedelta(hours=ttl) if ttl > 0 else None
+        self.touch_s = touch_s if touch_s is not None else float(os.getenv("SUMMARY_CACHE_TOUCH_S", "60"))
+
+        self._lru: "OrderedDict[str, tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._touched: set = set()  # memory hits whose row's last_used_at is behind
+        self._last_touch = time.monotonic()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(model: str, template: str, title: str, description: Optional[str]) -> str:
+        payload = json.dumps([model, template, title or "", description or ""], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: datetime) -> bool:
+        return self.ttl is not None and datetime.utcnow() - created_at > self.ttl
+
+    def _remember(self, key: str, summary: str, created_at: datetime):
+        with self._lock:
+            self._lru[key] = (summary, created_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_size:
+                self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up several keys at once; memory first, then one DB query for the rest."""
+        found: Dict[str, str] = {}
+        pending = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                hit = self._lru.get(key)
+                if hit and not self._expired(hit[1]):
+                    self._lru.move_to_end(key)
+                    self._touched.add(key)
+                    found[key] = hit[0]
+                    self._counters["memory_hits"] += 1
+                else:
+                    self._lru.pop(key, None)
+                    pending.append(key)
+            touch_due = bool(self._touched) and time.monotonic() - self._last_touch >= self.touch_s
+        if touch_due:
+            self.touch()
+
+        if not pending:
+            return found
+
+        now = datetime.utcnow()
+        with get_session() as s:
+            rows = s.exec(select(LLMSummary).where(LLMSummary.key.in_(pending))).all()
+            fresh = [r for r in rows if not self._expired(r.created_at)]
+            for r in fresh:
+                r.last_used_at = now
+                s.add(r)
+            if fresh:
+                s.commit()
+            for r in fresh:
+                found[r.key] = r.summary
+                self._remember(r.key, r.summary, r.created_at)
+
+        with self._lock:
+            self._counters["db_hits"] += len(fresh)
+            self._counters["misses"] += len(pending) - len(fresh)
+        return found
+
+    def touch(self) -> int:
+        """Write the pending memory hits' `last_used_at` (one UPDATE per 500 keys)."""
+        with self._lock:
+            keys, self._touched = list(self._touched), set()
+            self._last_touch = time.monotonic()
+        if not keys:
+            return 0
+        now = datetime.utcnow()
+        try:
+            with get_session() as s:
+                for i in range(0, len(keys), 500):
+                    s.exec(update(LLMSummary).where(LLMSummary.key.in_(keys[i:i + 500])).values(last_used_at=now))
+                s.commit()
+        except Exception as e:
+            # only the eviction order depends on it; retry with the next batch
+            print(f"[SummaryCache ERROR] touch: {e}")
+            with self._lock:
+                self._touched.update(keys)
+            return 0
+        return len(keys)
+
+    def existing(self, keys: Iterable[str]) -> set:
+        """Keys already stored in the DB tier (no counters, no LRU promotion)."""
+        keys = list(dict.fromkeys(keys))
+        present = set()
+        with get_session() as s:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                present.update(s.exec(select(LLMSummary.key).where(LLMSummary.key.in_(chunk))).all())
+        return present
+
+    def put(self, key: str, model: str, summary: str):
+        now = datetime.utcnow()
+        with get_session() as s:
+            s.merge(LLMSummary(key=key, model=model, summary=summary, created_at=now, last_used_at=now))
+            s.commit()
+        self._remember(key, summary, now)
+
+        with self._lock:
+            self._counters["writes"] += 1
+            self._writes_since_evict += 1
+            run_eviction = self._writes_since_evict >= 100
+            if run_eviction:
+                self._writes_since_evict = 0
+        self._touched: set = set()  # memory hits whose row's last_used_at is behind
+        self._last_touch = time.monotonic()
+        if run_eviction:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired rows, then the least-recently-used rows above `max_rows`."""
+        self.touch()
+        removed = 0
+        with get_session() as s:
+            if self.ttl is not None:
+                cutoff = datetime.utcnow() - self.ttl
+                removed += s.exec(delete(LLMSummary).where(LLMSummary.created_at < cutoff)).rowcount or 0
+
+            total = s.exec(select(func.count()).select_from(LLMSummary)).one()
+            excess = total - self.max_rows
+            if excess > 0:
+                stale = s.exec(
+                    select(LLMSummary.key).order_by(LLMSummary.last_used_at).limit(excess)
+                ).all()
+                removed += s.exec(delete(LLMSummary).where(LLMSummary.key.in_(stale))).rowcount or 0
+            s.commit()
+
+        with self._lock:
+            self._counters["evictions"] += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["memory_entries"] = len(self._lru)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        counters["hit_rate"] = round((counters["memory_hits"] + counters["db_hits"]) / lookups, 3) if lookups else 0.0
+        return counters
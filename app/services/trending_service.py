@@ -0,0 +1,362 @@
+# app/services/trending_service.py
+
+import os
+import time
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import tuple_
+from sqlmodel import select, delete, func
+from app.database import get_session, upsert
+from app.models import Article, UserEvent, UserEventHourly, ArticleTrend, ArticleCellEngagement, AppState
+from app.utils import geohash
+from app.utils.vector_kernels import haversine_many, proximity_factor, safe_normalize
+
+EVENT_WEIGHTS = {"view": 1, "click": 2, "share": 3}
+CELL_PRECISION = 4          # ~39 km x 20 km cells for the proximity term
+EPOCH_KEY = "trending_epoch"
+MAX_EPOCH_HALF_LIVES = 256  # rebase before 2**x gets anywhere near float overflow
+
+
+@lru_cache(maxsize=65536)
+def _cell_center(cell: str) -> Tuple[float, float]:
+    return geohash.decode(cell)
+
+
+def _epoch_seconds(dt: datetime) -> float:
+    if not dt.tzinfo:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class TrendingService:
+    """
+    Streaming trending engine.
+
+    Events are folded into small rollup tables as they arrive, each one an O(1)
+    additive update:
+    - `article_trend`: weighted engagement count and an exponentially decayed
+      recency score per article
+    - `article_cell_engagement`: events per (article, geohash cell)
+
+    A trending query reads only those aggregates, never the raw event log.
+    On top of that, `feed` serves callers from per-region top-K lists that are
+    refreshed periodically and shared by everyone in the same area.
+    """
+
+    def __init__(self, half_life_hours: Optional[float] = None, snapshots=None):
+        self.snapshots = snapshots  # article snapshot store: existence checks without a query
+        self.half_life_hours = half_life_hours or float(os.getenv("TRENDING_HALF_LIFE_HOURS", "3"))
+        self.region_precision = int(os.getenv("TRENDING_REGION_PRECISION", "3"))
+        self.region_top_k = int(os.getenv("TRENDING_REGION_TOP_K", "50"))
+        self.region_ttl = float(os.getenv("TRENDING_REGION_TTL_S", "60"))
+        self._lock = threading.Lock()
+        self._checked_backfill = False
+        self._regions: Dict[str, Tuple[float, List[Tuple[str, float]]]] = {}
+        self._region_lock = threading.Lock()
+
+    # --- decay bookkeeping --------------------------------------------------
+
+    def _half_lives(self, seconds: float) -> float:
+        return seconds / 3600 / self.half_life_hours
+
+    def _epoch(self, s, now: float) -> float:
+        """Current decay epoch, rebasing every rollup when it drifts too far back."""
+        state = s.get(AppState, EPOCH_KEY)
+        if state is None:
+            s.add(AppState(key=EPOCH_KEY, value=repr(now)))
+            s.flush()
+            return now
+        epoch = float(state.value)
+        if self._half_lives(now - epoch) > MAX_EPOCH_HALF_LIVES:
+            factor = 2.0 ** -self._half_lives(now - epoch)
+            s.exec(ArticleTrend.__table__.update().values(decayed_score=ArticleTrend.decayed_score * factor))
+            state.value = repr(now)
+            s.add(state)
+            s.flush()
+            epoch = now
+        return epoch
+
+    # --- ingestion ------------------------------------------------------------
+
+    def record(self, events: Iterable, session=None) -> int:
+        """
+        Fold events (UserEvent rows or dicts with the same fields) into the
+        rollups. Events may arrive in any order; every update is an increment.
+        With `session` the upserts join the caller's transaction (which the
+        caller commits), so they land together with the raw events or not at all.
+        """
+        per_article = {}
+        per_cell = {}
+        stamps = {}
+        for e in events:
+            get = e.get if isinstance(e, dict) else lambda k, _e=e: getattr(_e, k)
+            article_id = get("article_id")
+            weight = EVENT_WEIGHTS.get(get("event_type"), 1)
+            ts = get("timestamp") or datetime.utcnow()
+            a = per_article.setdefault(article_id, [0, 0.0, [], []])
+            a[0] += 1
+            a[1] += weight
+            a[2].append(_epoch_seconds(ts))
+            a[3].append(1.0)
+            prev = stamps.get(article_id)
+            stamps[article_id] = ts if prev is None or ts > prev else prev
+            cell = geohash.encode(get("latitude"), get("longitude"), CELL_PRECISION)
+            c = per_cell.setdefault((article_id, cell), [0, 0.0])
+            c[0] += 1
+            c[1] += weight
+        return self._apply(per_article, per_cell, stamps, session)
+
+    def record_hourly(self, rows: Iterable[UserEventHourly]) -> int:
+        """Fold compacted hourly aggregates into the rollups (see `app.retention`)."""
+        per_article = {}
+        per_cell = {}
+        stamps = {}
+        for r in rows:
+            a = per_article.setdefault(r.article_id, [0, 0.0, [], []])
+            a[0] += r.event_count
+            a[1] += r.weighted_count
+            a[2].append(_epoch_seconds(r.hour))
+            a[3].append(r.decay_sum)
+            ts = r.last_event_at or r.hour
+            prev = stamps.get(r.article_id)
+            stamps[r.article_id] = ts if prev is None or ts > prev else prev
+            c = per_cell.setdefault((r.article_id, r.cell), [0, 0.0])
+            c[0] += r.event_count
+            c[1] += r.weighted_count
+        return self._apply(per_article, per_cell, stamps)
+
+    def _apply(self, per_article: Dict, per_cell: Dict, stamps: Dict, session=None) -> int:
+        """
+        Upsert increments. `per_article` maps article_id to
+        [events, weighted, timestamps (epoch s), multipliers]: the decayed
+        contribution is Σ multiplier · 2^((timestamp − epoch) / half-life).
+        Commits unless it runs in the caller's `session`.
+        """
+        if not per_article:
+            return 0
+
+        with self._lock, (nullcontext(session) if session is not None else get_session()) as s:
+            epoch = self._epoch(s, datetime.now(timezone.utc).timestamp())
+            trend_rows = [
+                {
+                    "article_id": article_id,
+                    "event_count": n,
+                    "weighted_count": w,
+                    "decayed_score": float(np.dot(mult, np.exp2((np.array(ts) - epoch) / 3600 / self.half_life_hours))),
+                    "last_event_at": stamps[article_id],
+                }
+                for article_id, (n, w, ts, mult) in per_article.items()
+            ]
+            cell_rows = [
+                {"article_id": article_id, "cell": cell, "event_count": n, "weighted_count": w}
+                for (article_id, cell), (n, w) in per_cell.items()
+            ]
+            for i in range(0, len(trend_rows), 500):
+                stmt = upsert(ArticleTrend).values(trend_rows[i:i + 500])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["article_id"],
+                    set_={
+                        "event_count": ArticleTrend.event_count + stmt.excluded.event_count,
+                        "weighted_count": ArticleTrend.weighted_count + stmt.excluded.weighted_count,
+                        "decayed_score": ArticleTrend.decayed_score + stmt.excluded.decayed_score,
+                        "last_event_at": func.coalesce(
+                            func.max(ArticleTrend.last_event_at, stmt.excluded.last_event_at)
+                            if s.get_bind().dialect.name == "sqlite"
+                            else func.greatest(ArticleTrend.last_event_at, stmt.excluded.last_event_at),
+                            stmt.excluded.last_event_at,
+                        ),
+                    },
+                )
+                s.exec(stmt)
+            for i in range(0, len(cell_rows), 500):
+                stmt = upsert(ArticleCellEngagement).values(cell_rows[i:i + 500])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["article_id", "cell"],
+                    set_={
+                        "event_count": ArticleCellEngagement.event_count + stmt.excluded.event_count,
+                        "weighted_count": ArticleCellEngagement.weighted_count + stmt.excluded.weighted_count,
+                    },
+                )
+                s.exec(stmt)
+            if session is None:
+                s.commit()
+        return sum(a[0] for a in per_article.values())
+
+    def rebuild(self, batch_size: int = 50000) -> int:
+        """Recompute all rollups from the compacted hourly history plus the raw event log."""
+        with self._lock, get_session() as s:
+            s.exec(delete(ArticleTrend))
+            s.exec(delete(ArticleCellEngagement))
+            s.exec(delete(AppState).where(AppState.key == EPOCH_KEY))
+            s.commit()
+        total = 0
+        last_key = None
+        while True:
+            stmt = select(UserEventHourly).order_by(
+                UserEventHourly.article_id, UserEventHourly.hour, UserEventHourly.cell
+            ).limit(batch_size)
+            if last_key is not None:
+                stmt = stmt.where(tuple_(
+                    UserEventHourly.article_id, UserEventHourly.hour, UserEventHourly.cell
+                ) > last_key)
+            with get_session() as s:
+                batch = s.exec(stmt).all()
+            if not batch:
+                break
+            last_key = (batch[-1].article_id, batch[-1].hour, batch[-1].cell)
+            total += self.record_hourly(batch)
+        last_id = ""
+        while True:
+            with get_session() as s:
+                batch = s.exec(
+                    select(UserEvent).where(UserEvent.id > last_id).order_by(UserEvent.id).limit(batch_size)
+                ).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            total += self.record(batch)
+        self._checked_backfill = True
+        return total
+
+    def _ensure_backfilled(self):
+        """Databases with events from before the rollups existed get one rebuild."""
+        if self._checked_backfill:
+            return
+        with get_session() as s:
+            has_rollups = s.exec(select(ArticleTrend.article_id).limit(1)).first() is not None
+            has_events = (
+                s.exec(select(UserEvent.id).limit(1)).first() is not None
+                or s.exec(select(UserEventHourly.article_id).limit(1)).first() is not None
+            )
+        self._checked_backfill = True
+        if has_events and not has_rollups:
+            print("🧱 Building trending rollups from existing events ...")
+            self.rebuild()
+
+    # --- queries --------------------------------------------------------------
+
+    def scores_at(self, points: Sequence[Tuple[float, float]]) -> Tuple[List[str], np.ndarray]:
+        """
+        (article_ids, scores) for every article with engagement, as seen from
+        each of `points` (one row of `scores` per point):
+        0.4 · engagement + 0.2 · decayed recency + 0.4 · proximity,
+        each term normalized by its maximum across articles.
+        The rollups are read once however many points are scored.
+        """
+        self._ensure_backfilled()
+        with get_session() as s:
+            trends = s.exec(
+                select(ArticleTrend.article_id, ArticleTrend.weighted_count, ArticleTrend.decayed_score)
+            ).all()
+            cells = s.exec(
+                select(ArticleCellEngagement.article_id, ArticleCellEngagement.cell, ArticleCellEngagement.event_count)
+            ).all()
+        if not trends:
+            return [], np.zeros((len(points), 0))
+
+        ids = [t[0] for t in trends]
+        position = {article_id: i for i, article_id in enumerate(ids)}
+        count = np.array([t[1] for t in trends], dtype=np.float64)
+        # the current value is decayed_score · 2^-(now − epoch)/half-life; that
+        # factor is shared by every article and cancels out in the normalization
+        recent = np.array([t[2] for t in trends], dtype=np.float64)
+        base = safe_normalize(count) * 0.4 + safe_normalize(recent) * 0.2
+
+        if cells:
+            centers = np.array([_cell_center(c[1]) for c in cells], dtype=np.float64)
+            owner = np.array([position.get(c[0], -1) for c in cells])
+            events = np.array([c[2] for c in cells], dtype=np.float64)
+            known = owner >= 0
+        rows = []
+        for lat, lon in points:
+            distance = np.zeros(len(ids))
+            if cells:
+                proximity = proximity_factor(haversine_many(lat, lon, centers[:, 0], centers[:, 1]))
+                distance = np.bincount(owner[known], weights=(proximity * 10 * events)[known], minlength=len(ids))
+            rows.append(base + safe_normalize(distance) * 0.4)
+        return ids, np.vstack(rows)
+
+    def scores(self, lat: float, lon: float) -> Tuple[List[str], np.ndarray]:
+        ids, matrix = self.scores_at([(lat, lon)])
+        return ids, matrix[0]
+
+    def _rank(self, ids: List[str], scores: np.ndarray, limit: int) -> List[Tuple[str, float]]:
+        """Best `limit` (article_id, score) pairs, skipping articles no longer in the DB."""
+        if not ids:
+            return []
+        order = np.argsort(-scores, kind="stable")
+        window = order[: max(limit * 4, limit + 20)]
+        while True:
+            existing = self._existing([ids[i] for i in window])
+            top = [(ids[i], float(scores[i])) for i in window if ids[i] in existing][:limit]
+            if len(top) == limit or len(window) == len(order):
+                return top
+            window = order
+
+    def _existing(self, ids: List[str]) -> set:
+        snap = self.snapshots.current() if self.snapshots is not None else None
+        if snap is not None:
+            return snap.contains(ids)
+        with get_session() as s:
+            return set(s.exec(select(Article.id).where(Article.id.in_(ids))).all())
+
+    def top(self, lat: float, lon: float, limit: int = 10) -> List[Tuple[str, float]]:
+        """Exact trending for one location (scores every article with engagement)."""
+        ids, scores = self.scores(lat, lon)
+        return self._rank(ids, scores, limit)
+
+    # --- per-region top-K -------------------------------------------------------
+
+    def region_top(self, regions: Sequence[str]) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Top-K lists for geohash regions, scored from each region's center.
+        Lists are shared by every caller in or next to the region and are
+        recomputed (all stale ones in a single pass) after `region_ttl` seconds.
+        """
+        now = time.monotonic()
+        with self._region_lock:
+            result = {r: self._regions[r][1] for r in regions
+                      if r in self._regions and now - self._regions[r][0] < self.region_ttl}
+        stale = [r for r in dict.fromkeys(regions) if r not in result]
+        if stale:
+            ids, matrix = self.scores_at([_cell_center(r) for r in stale])
+            with self._region_lock:
+                for r, row in zip(stale, matrix):
+                    ranked = self._rank(ids, row, self.region_top_k)
+                    self._regions[r] = (now, ranked)
+                    result[r] = ranked
+        return result
+
+    def feed(self, lat: float, lon: float, limit: int = 10, exhaustive: bool = False) -> List[Tuple[str, float]]:
+        """
+        Trending for a caller, merged from the precomputed top-K of the caller's
+        region and its 8 neighbours. Each region's scores are weighted by
+        1 / (1 + distance to the region center / region size).
+        With `exhaustive` the same blend is computed over every article with
+        engagement rather than the top-K lists (for pages past the lists' end).
+        """
+        region = geohash.encode(lat, lon, self.region_precision)
+        regions = geohash.neighbors(region)
+        cell_km, _ = geohash.cell_size_km(self.region_precision, lat)
+
+        centers = np.array([_cell_center(r) for r in regions], dtype=np.float64)
+        weights = 1 / (1 + haversine_many(lat, lon, centers[:, 0], centers[:, 1]) / cell_km)
+        if exhaustive:
+            ids, matrix = self.scores_at([tuple(c) for c in centers.tolist()])
+            if not ids:
+                return []
+            return self._rank(ids, weights @ matrix / (float(weights.sum()) or 1.0), limit)
+
+        lists = self.region_top(regions)
+        merged: Dict[str, float] = {}
+        for r, w in zip(regions, weights.tolist()):
+            for article_id, score in lists.get(r, []):
+                merged[article_id] = merged.get(article_id, 0.0) + w * score
+        total = float(weights.sum()) or 1.0
+        ranked = sorted(merged.items(), key=lambda t: t[1], reverse=True)[:limit]
+        return [(article_id, score / total) for article_id, score in ranked]
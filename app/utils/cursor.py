@@ -0,0 +1,52 @@
+"""
+Opaque page cursors: the keyset of the last returned article (score / date
+and id) as URL-safe base64 JSON, tagged with a hash of the request's ranking
+parameters so a cursor can't be replayed against a different query.
+"""
+import base64
+import hashlib
+import json
+import math
+from datetime import datetime
+from typing import Optional
+
+
+def scope_hash(scope: str) -> str:
+    return hashlib.sha1(scope.encode("utf-8")).hexdigest()[:12]
+
+
+def _check_keyset(state: dict):
+    """The keyset fields hold what the rankings parse: an ISO date, a finite number, an offset."""
+    d, s, o = state.get("d"), state.get("s"), state.get("o")
+    if d is not None:
+        try:
+            datetime.fromisoformat(d)
+        except (TypeError, ValueError):
+            raise ValueError("malformed cursor date")
+    if s is not None and (isinstance(s, bool) or not isinstance(s, (int, float)) or not math.isfinite(s)):
+        raise ValueError("malformed cursor score")
+    if o is not None and (isinstance(o, bool) or not isinstance(o, int) or o < 0):
+        raise ValueError("malformed cursor offset")
+
+
+def encode_cursor(state: Optional[dict], scope: str) -> Optional[str]:
+    if state is None:
+        return None
+    payload = json.dumps({**state, "q": scope_hash(scope)}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str], scope: str) -> Optional[dict]:
+    """The keyset state in `token`; ValueError if it is malformed or belongs to another query."""
+    if not token:
+        return None
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("malformed cursor")
+    if not isinstance(state, dict) or not isinstance(state.get("i"), str):
+        raise ValueError("malformed cursor")
+    _check_keyset(state)
+    if state.pop("q", None) != scope_hash(scope):
+        raise ValueError("cursor belongs to a different query")
+    return state
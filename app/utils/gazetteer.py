@@ -0,0 +1,487 @@
+"""
+Small bundled gazetteer: common Indian cities and states plus major world
+cities and countries, so the usual smart-query locations resolve without a
+geocoding API call. Keys are normalized place names (`normalize_query`),
+values (latitude, longitude) of the city center / country centroid.
+`WITHIN` lists the states / countries a place may be qualified with.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+PLACES = {
+    # --- Indian cities ---
+    "delhi": (28.6139, 77.2090),
+    "new delhi": (28.6139, 77.2090),
+    "mumbai": (19.0760, 72.8777),
+    "kolkata": (22.5726, 88.3639),
+    "chennai": (13.0827, 80.2707),
+    "bengaluru": (12.9716, 77.5946),
+    "hyderabad": (17.3850, 78.4867),
+    "ahmedabad": (23.0225, 72.5714),
+    "pune": (18.5204, 73.8567),
+    "surat": (21.1702, 72.8311),
+    "jaipur": (26.9124, 75.7873),
+    "lucknow": (26.8467, 80.9462),
+    "kanpur": (26.4499, 80.3319),
+    "nagpur": (21.1458, 79.0882),
+    "indore": (22.7196, 75.8577),
+    "thane": (19.2183, 72.9781),
+    "navi mumbai": (19.0330, 73.0297),
+    "bhopal": (23.2599, 77.4126),
+    "visakhapatnam": (17.6868, 83.2185),
+    "patna": (25.5941, 85.1376),
+    "vadodara": (22.3072, 73.1812),
+    "ghaziabad": (28.6692, 77.4538),
+    "noida": (28.5355, 77.3910),
+    "gurugram": (28.4595, 77.0266),
+    "faridabad": (28.4089, 77.3178),
+    "ludhiana": (30.9010, 75.8573),
+    "agra": (27.1767, 78.0081),
+    "nashik": (19.9975, 73.7898),
+    "meerut": (28.9845, 77.7064),
+    "rajkot": (22.3039, 70.8022),
+    "varanasi": (25.3176, 82.9739),
+    "srinagar": (34.0837, 74.7973),
+    "aurangabad": (19.8762, 75.3433),
+    "dhanbad": (23.7957, 86.4304),
+    "amritsar": (31.6340, 74.8723),
+    "prayagraj": (25.4358, 81.8463),
+    "ranchi": (23.3441, 85.3096),
+    "howrah": (22.5958, 88.2636),
+    "coimbatore": (11.0168, 76.9558),
+    "jabalpur": (23.1815, 79.9864),
+    "gwalior": (26.2183, 78.1828),
+    "vijayawada": (16.5062, 80.6480),
+    "jodhpur": (26.2389, 73.0243),
+    "madurai": (9.9252, 78.1198),
+    "raipur": (21.2514, 81.6296),
+    "kota": (25.2138, 75.8648),
+    "guwahati": (26.1445, 91.7362),
+    "chandigarh": (30.7333, 76.7794),
+    "mohali": (30.7046, 76.7179),
+    "thiruvananthapuram": (8.5241, 76.9366),
+    "kochi": (9.9312, 76.2673),
+    "kozhikode": (11.2588, 75.7804),
+    "thrissur": (10.5276, 76.2144),
+    "mysuru": (12.2958, 76.6394),
+    "mangaluru": (12.9141, 74.8560),
+    "hubballi": (15.3647, 75.1240),
+    "belagavi": (15.8497, 74.4977),
+    "bhubaneswar": (20.2961, 85.8245),
+    "cuttack": (20.4625, 85.8830),
+    "dehradun": (30.3165, 78.0322),
+    "haridwar": (29.9457, 78.1642),
+    "rishikesh": (30.0869, 78.2676),
+    "shimla": (31.1048, 77.1734),
+    "manali": (32.2432, 77.1892),
+    "dharamshala": (32.2190, 76.3234),
+    "jammu": (32.7266, 74.8570),
+    "leh": (34.1526, 77.5771),
+    "pahalgam": (34.0161, 75.3150),
+    "udaipur": (24.5854, 73.7125),
+    "ajmer": (26.4499, 74.6399),
+    "bikaner": (28.0229, 73.3119),
+    "panaji": (15.4909, 73.8278),
+    "imphal": (24.8170, 93.9368),
+    "shillong": (25.5788, 91.8933),
+    "aizawl": (23.7271, 92.7176),
+    "agartala": (23.8315, 91.2868),
+    "kohima": (25.6751, 94.1086),
+    "itanagar": (27.0844, 93.6053),
+    "gangtok": (27.3389, 88.6065),
+    "darjeeling": (27.0410, 88.2663),
+    "siliguri": (26.7271, 88.3953),
+    "durgapur": (23.5204, 87.3119),
+    "asansol": (23.6739, 86.9524),
+    "puducherry": (11.9416, 79.8083),
+    "port blair": (11.6234, 92.7265),
+    "tirupati": (13.6288, 79.4192),
+    "guntur": (16.3067, 80.4365),
+    "nellore": (14.4426, 79.9865),
+    "kurnool": (15.8281, 78.0373),
+    "warangal": (17.9689, 79.5941),
+    "salem": (11.6643, 78.1460),
+    "tiruchirappalli": (10.7905, 78.7047),
+    "kanyakumari": (8.0883, 77.5385),
+    "ooty": (11.4102, 76.6950),
+    "solapur": (17.6599, 75.9064),
+    "kolhapur": (16.7050, 74.2433),
+    "sangli": (16.8524, 74.5815),
+    "jalandhar": (31.3260, 75.5762),
+    "patiala": (30.3398, 76.3869),
+    "bathinda": (30.2110, 74.9455),
+    "pathankot": (32.2643, 75.6421),
+    "karnal": (29.6857, 76.9905),
+    "panipat": (29.3909, 76.9635),
+    "rohtak": (28.8955, 76.6066),
+    "hisar": (29.1492, 75.7217),
+    "sonipat": (28.9931, 77.0151),
+    "ayodhya": (26.7922, 82.1998),
+    "gorakhpur": (26.7606, 83.3732),
+    "bareilly": (28.3670, 79.4304),
+    "aligarh": (27.8974, 78.0880),
+    "moradabad": (28.8386, 78.7733),
+    "mathura": (27.4924, 77.6737),
+    "jhansi": (25.4484, 78.5685),
+    "ujjain": (23.1765, 75.7885),
+    "gaya": (24.7914, 85.0002),
+    "bhagalpur": (25.2425, 86.9842),
+    "muzaffarpur": (26.1209, 85.3647),
+    "jamshedpur": (22.8046, 86.2029),
+    "bilaspur": (22.0797, 82.1409),
+    "bhilai": (21.1938, 81.3509),
+    "rourkela": (22.2604, 84.8536),
+    "sambalpur": (21.4669, 83.9812),
+    "dibrugarh": (27.4728, 94.9120),
+    "jorhat": (26.7509, 94.2037),
+    "silchar": (24.8333, 92.7789),
+    "gandhinagar": (23.2156, 72.6369),
+    "bhavnagar": (21.7645, 72.1519),
+    "jamnagar": (22.4707, 70.0577),
+    "junagadh": (21.5222, 70.4579),
+    "bhuj": (23.2420, 69.6669),
+    "dwarka": (22.2394, 68.9678),
+    # --- Indian states / union territories ---
+    "andhra pradesh": (15.9129, 79.7400),
+    "arunachal pradesh": (28.2180, 94.7278),
+    "assam": (26.2006, 92.9376),
+    "bihar": (25.0961, 85.3131),
+    "chhattisgarh": (21.2787, 81.8661),
+    "goa": (15.2993, 74.1240),
+    "gujarat": (22.2587, 71.1924),
+    "haryana": (29.0588, 76.0856),
+    "himachal pradesh": (31.1048, 77.1734),
+    "jharkhand": (23.6102, 85.2799),
+    "karnataka": (15.3173, 75.7139),
+    "kerala": (10.8505, 76.2711),
+    "madhya pradesh": (22.9734, 78.6569),
+    "maharashtra": (19.7515, 75.7139),
+    "manipur": (24.6637, 93.9063),
+    "meghalaya": (25.4670, 91.3662),
+    "mizoram": (23.1645, 92.9376),
+    "nagaland": (26.1584, 94.5624),
+    "odisha": (20.9517, 85.0985),
+    "punjab": (31.1471, 75.3412),
+    "rajasthan": (27.0238, 74.2179),
+    "sikkim": (27.5330, 88.5122),
+    "tamil nadu": (11.1271, 78.6569),
+    "telangana": (18.1124, 79.0193),
+    "tripura": (23.9408, 91.9882),
+    "uttar pradesh": (26.8467, 80.9462),
+    "uttarakhand": (30.0668, 79.0193),
+    "west bengal": (22.9868, 87.8550),
+    "jammu and kashmir": (33.7782, 76.5762),
+    "kashmir": (34.0837, 74.7973),
+    "ladakh": (34.2268, 77.5619),
+    # --- countries ---
+    "india": (20.5937, 78.9629),
+    "pakistan": (30.3753, 69.3451),
+    "bangladesh": (23.6850, 90.3563),
+    "nepal": (28.3949, 84.1240),
+    "sri lanka": (7.8731, 80.7718),
+    "bhutan": (27.5142, 90.4336),
+    "maldives": (3.2028, 73.2207),
+    "afghanistan": (33.9391, 67.7100),
+    "myanmar": (21.9162, 95.9560),
+    "china": (35.8617, 104.1954),
+    "taiwan": (23.6978, 120.9605),
+    "japan": (36.2048, 138.2529),
+    "south korea": (35.9078, 127.7669),
+    "north korea": (40.3399, 127.5101),
+    "russia": (61.5240, 105.3188),
+    "ukraine": (48.3794, 31.1656),
+    "israel": (31.0461, 34.8516),
+    "palestine": (31.9522, 35.2332),
+    "gaza": (31.3547, 34.3088),
+    "iran": (32.4279, 53.6880),
+    "iraq": (33.2232, 43.6793),
+    "syria": (34.8021, 38.9968),
+    "lebanon": (33.8547, 35.8623),
+    "jordan": (30.5852, 36.2384),
+    "yemen": (15.5527, 48.5164),
+    "saudi arabia": (23.8859, 45.0792),
+    "united arab emirates": (23.4241, 53.8478),
+    "qatar": (25.3548, 51.1839),
+    "kuwait": (29.3117, 47.4818),
+    "bahrain": (26.0667, 50.5577),
+    "oman": (21.4735, 55.9754),
+    "turkey": (38.9637, 35.2433),
+    "egypt": (26.8206, 30.8025),
+    "united states": (37.0902, -95.7129),
+    "canada": (56.1304, -106.3468),
+    "mexico": (23.6345, -102.5528),
+    "brazil": (-14.2350, -51.9253),
+    "argentina": (-38.4161, -63.6167),
+    "united kingdom": (55.3781, -3.4360),
+    "england": (52.3555, -1.1743),
+    "ireland": (53.4129, -8.2439),
+    "france": (46.2276, 2.2137),
+    "germany": (51.1657, 10.4515),
+    "italy": (41.8719, 12.5674),
+    "spain": (40.4637, -3.7492),
+    "portugal": (39.3999, -8.2245),
+    "netherlands": (52.1326, 5.2913),
+    "belgium": (50.5039, 4.4699),
+    "switzerland": (46.8182, 8.2275),
+    "austria": (47.5162, 14.5501),
+    "greece": (39.0742, 21.8243),
+    "poland": (51.9194, 19.1451),
+    "sweden": (60.1282, 18.6435),
+    "norway": (60.4720, 8.4689),
+    "australia": (-25.2744, 133.7751),
+    "new zealand": (-40.9006, 174.8860),
+    "south africa": (-30.5595, 22.9375),
+    "nigeria": (9.0820, 8.6753),
+    "kenya": (-0.0236, 37.9062),
+    "indonesia": (-0.7893, 113.9213),
+    "singapore": (1.3521, 103.8198),
+    "malaysia": (4.2105, 101.9758),
+    "thailand": (15.8700, 100.9925),
+    "vietnam": (14.0583, 108.2772),
+    "philippines": (12.8797, 121.7740),
+    # --- world cities ---
+    "london": (51.5074, -0.1278),
+    "paris": (48.8566, 2.3522),
+    "berlin": (52.5200, 13.4050),
+    "rome": (41.9028, 12.4964),
+    "madrid": (40.4168, -3.7038),
+    "brussels": (50.8503, 4.3517),
+    "geneva": (46.2044, 6.1432),
+    "davos": (46.8027, 9.8360),
+    "moscow": (55.7558, 37.6173),
+    "kyiv": (50.4501, 30.5234),
+    "new york": (40.7128, -74.0060),
+    "washington": (38.9072, -77.0369),
+    "los angeles": (34.0522, -118.2437),
+    "san francisco": (37.7749, -122.4194),
+    "chicago": (41.8781, -87.6298),
+    "toronto": (43.6532, -79.3832),
+    "ottawa": (45.4215, -75.6972),
+    "mexico city": (19.4326, -99.1332),
+    "sao paulo": (-23.5505, -46.6333),
+    "são paulo": (-23.5505, -46.6333),
+    "rio de janeiro": (-22.9068, -43.1729),
+    "tokyo": (35.6762, 139.6503),
+    "seoul": (37.5665, 126.9780),
+    "beijing": (39.9042, 116.4074),
+    "shanghai": (31.2304, 121.4737),
+    "hong kong": (22.3193, 114.1694),
+    "taipei": (25.0330, 121.5654),
+    "bangkok": (13.7563, 100.5018),
+    "jakarta": (-6.2088, 106.8456),
+    "kuala lumpur": (3.1390, 101.6869),
+    "manila": (14.5995, 120.9842),
+    "hanoi": (21.0278, 105.8342),
+    "sydney": (-33.8688, 151.2093),
+    "melbourne": (-37.8136, 144.9631),
+    "canberra": (-35.2809, 149.1300),
+    "wellington": (-41.2865, 174.7762),
+    "dubai": (25.2048, 55.2708),
+    "abu dhabi": (24.4539, 54.3773),
+    "riyadh": (24.7136, 46.6753),
+    "doha": (25.2854, 51.5310),
+    "tehran": (35.6892, 51.3890),
+    "jerusalem": (31.7683, 35.2137),
+    "tel aviv": (32.0853, 34.7818),
+    "istanbul": (41.0082, 28.9784),
+    "cairo": (30.0444, 31.2357),
+    "nairobi": (-1.2921, 36.8219),
+    "johannesburg": (-26.2041, 28.0473),
+    "karachi": (24.8607, 67.0011),
+    "lahore": (31.5204, 74.3587),
+    "islamabad": (33.6844, 73.0479),
+    "dhaka": (23.8103, 90.4125),
+    "kathmandu": (27.7172, 85.3240),
+    "colombo": (6.9271, 79.8612),
+    "kabul": (34.5553, 69.2075),
+}
+
+# former / alternative names and abbreviations → key in PLACES
+ALIASES = {
+    "delhi ncr": "delhi",
+    "ncr": "delhi",
+    "bombay": "mumbai",
+    "calcutta": "kolkata",
+    "madras": "chennai",
+    "bangalore": "bengaluru",
+    "mysore": "mysuru",
+    "mangalore": "mangaluru",
+    "hubli": "hubballi",
+    "belgaum": "belagavi",
+    "trivandrum": "thiruvananthapuram",
+    "cochin": "kochi",
+    "calicut": "kozhikode",
+    "trichy": "tiruchirappalli",
+    "allahabad": "prayagraj",
+    "gurgaon": "gurugram",
+    "poona": "pune",
+    "baroda": "vadodara",
+    "benares": "varanasi",
+    "banaras": "varanasi",
+    "vizag": "visakhapatnam",
+    "simla": "shimla",
+    "pondicherry": "puducherry",
+    "orissa": "odisha",
+    "up": "uttar pradesh",
+    "mp": "madhya pradesh",
+    "tn": "tamil nadu",
+    "j k": "jammu and kashmir",
+    "jammu kashmir": "jammu and kashmir",
+    "burma": "myanmar",
+    "usa": "united states",
+    "us": "united states",
+    "u s": "united states",
+    "u s a": "united states",
+    "america": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "u k": "united kingdom",
+    "britain": "united kingdom",
+    "great britain": "united kingdom",
+    "uae": "united arab emirates",
+    "emirates": "united arab emirates",
+    "holland": "netherlands",
+    "korea": "south korea",
+    "kiev": "kyiv",
+    "nyc": "new york",
+    "new york city": "new york",
+    "washington dc": "washington",
+    "washington d c": "washington",
+    "gaza strip": "gaza",
+}
+
+# state / union territory → its bundled cities
+_INDIAN_STATE_CITIES = {
+    "andhra pradesh": ("visakhapatnam", "vijayawada", "tirupati", "guntur", "nellore", "kurnool"),
+    "arunachal pradesh": ("itanagar",),
+    "assam": ("guwahati", "dibrugarh", "jorhat", "silchar"),
+    "bihar": ("patna", "gaya", "bhagalpur", "muzaffarpur"),
+    "chhattisgarh": ("raipur", "bilaspur", "bhilai"),
+    "delhi": ("new delhi",),
+    "goa": ("panaji",),
+    "gujarat": ("ahmedabad", "surat", "vadodara", "rajkot", "gandhinagar", "bhavnagar", "jamnagar",
+                "junagadh", "bhuj", "dwarka"),
+    "haryana": ("gurugram", "faridabad", "chandigarh", "karnal", "panipat", "rohtak", "hisar", "sonipat"),
+    "himachal pradesh": ("shimla", "manali", "dharamshala"),
+    "jammu and kashmir": ("srinagar", "jammu", "pahalgam"),
+    "jharkhand": ("dhanbad", "ranchi", "jamshedpur"),
+    "karnataka": ("bengaluru", "mysuru", "mangaluru", "hubballi", "belagavi"),
+    "kashmir": ("srinagar", "pahalgam"),
+    "kerala": ("thiruvananthapuram", "kochi", "kozhikode", "thrissur"),
+    "ladakh": ("leh",),
+    "madhya pradesh": ("indore", "bhopal", "jabalpur", "gwalior", "ujjain"),
+    "maharashtra": ("mumbai", "pune", "nagpur", "thane", "navi mumbai", "nashik", "aurangabad", "solapur",
+                    "kolhapur", "sangli"),
+    "manipur": ("imphal",),
+    "meghalaya": ("shillong",),
+    "mizoram": ("aizawl",),
+    "nagaland": ("kohima",),
+    "odisha": ("bhubaneswar", "cuttack", "rourkela", "sambalpur"),
+    "punjab": ("ludhiana", "amritsar", "chandigarh", "mohali", "jalandhar", "patiala", "bathinda", "pathankot"),
+    "rajasthan": ("jaipur", "jodhpur", "kota", "udaipur", "ajmer", "bikaner"),
+    "sikkim": ("gangtok",),
+    "tamil nadu": ("chennai", "coimbatore", "madurai", "salem", "tiruchirappalli", "kanyakumari", "ooty"),
+    "telangana": ("hyderabad", "warangal"),
+    "tripura": ("agartala",),
+    "uttar pradesh": ("lucknow", "kanpur", "ghaziabad", "noida", "agra", "meerut", "varanasi", "prayagraj",
+                      "ayodhya", "gorakhpur", "bareilly", "aligarh", "moradabad", "mathura", "jhansi"),
+    "uttarakhand": ("dehradun", "haridwar", "rishikesh"),
+    "west bengal": ("kolkata", "howrah", "darjeeling", "siliguri", "durgapur", "asansol"),
+}
+
+# world city (or region) → the regions and country it lies in
+_WORLD_CITY_REGIONS = {
+    "england": ("united kingdom",),
+    "gaza": ("palestine",),
+    "london": ("england", "united kingdom"),
+    "paris": ("france",),
+    "berlin": ("germany",),
+    "rome": ("italy",),
+    "madrid": ("spain",),
+    "brussels": ("belgium",),
+    "geneva": ("switzerland",),
+    "davos": ("switzerland",),
+    "moscow": ("russia",),
+    "kyiv": ("ukraine",),
+    "new york": ("new york", "ny", "united states"),
+    "washington": ("dc", "d c", "district of columbia", "united states"),
+    "los angeles": ("california", "ca", "united states"),
+    "san francisco": ("california", "ca", "united states"),
+    "chicago": ("illinois", "il", "united states"),
+    "toronto": ("ontario", "canada"),
+    "ottawa": ("ontario", "canada"),
+    "mexico city": ("mexico",),
+    "sao paulo": ("brazil",),
+    "são paulo": ("brazil",),
+    "rio de janeiro": ("brazil",),
+    "tokyo": ("japan",),
+    "seoul": ("south korea",),
+    "beijing": ("china",),
+    "shanghai": ("china",),
+    "hong kong": ("china",),
+    "taipei": ("taiwan",),
+    "bangkok": ("thailand",),
+    "jakarta": ("indonesia",),
+    "kuala lumpur": ("malaysia",),
+    "manila": ("philippines",),
+    "hanoi": ("vietnam",),
+    "sydney": ("new south wales", "nsw", "australia"),
+    "melbourne": ("victoria", "australia"),
+    "canberra": ("australia",),
+    "wellington": ("new zealand",),
+    "dubai": ("united arab emirates",),
+    "abu dhabi": ("united arab emirates",),
+    "riyadh": ("saudi arabia",),
+    "doha": ("qatar",),
+    "tehran": ("iran",),
+    "jerusalem": ("israel",),
+    "tel aviv": ("israel",),
+    "istanbul": ("turkey",),
+    "cairo": ("egypt",),
+    "nairobi": ("kenya",),
+    "johannesburg": ("south africa",),
+    "karachi": ("pakistan",),
+    "lahore": ("pakistan",),
+    "islamabad": ("pakistan",),
+    "dhaka": ("bangladesh",),
+    "kathmandu": ("nepal",),
+    "colombo": ("sri lanka",),
+    "kabul": ("afghanistan",),
+}
+
+def _regions() -> Dict[str, frozenset]:
+    within: Dict[str, set] = {}
+    for state, cities in _INDIAN_STATE_CITIES.items():
+        for city in cities:
+            within.setdefault(city, {"india"}).add(state)
+    for place in ("delhi", "puducherry", "port blair"):
+        within.setdefault(place, {"india"})
+    for state in _INDIAN_STATE_CITIES:
+        if state in PLACES:
+            within.setdefault(state, {"india"})
+    for city, regions in _WORLD_CITY_REGIONS.items():
+        within[city] = set(regions)
+    return {place: frozenset(regions) for place, regions in within.items()}
+
+# place → the states / regions / countries that may qualify it ("Mumbai, Maharashtra")
+WITHIN = _regions()
+
+
+def lookup(place: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) for a normalized place name, or None if it isn't bundled."""
+    return PLACES.get(ALIASES.get(place, place))
+
+
+def lookup_qualified(parts: Sequence[str]) -> Optional[Tuple[float, float]]:
+    """
+    (lat, lon) for normalized "place, qualifier, ..." parts when every
+    qualifier is a region or country the bundled place lies in: "Paris,
+    France" resolves, "Paris, Texas" doesn't (it is left to the geocoder).
+    """
+    parts = [p for p in parts if p]
+    if len(parts) < 2:
+        return None
+    place = ALIASES.get(parts[0], parts[0])
+    within = WITHIN.get(place, frozenset())
+    if place in PLACES and all(ALIASES.get(q, q) in within for q in parts[1:]):
+        return PLACES[place]
+    return None
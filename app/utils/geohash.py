@@ -0,0 +1,121 @@
+from math import cos, radians
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# every geohash starting with `prefix` sorts in [prefix, prefix + PREFIX_END)
+PREFIX_END = "{"
+KM_PER_DEGREE = 111.32
+
+
+def encode(lat: float, lon: float, precision: int = 8) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def decode_bbox(gh: str) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for ch in gh:
+        val = BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (val >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def decode(gh: str) -> Tuple[float, float]:
+    """Center (lat, lon) of a geohash cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = decode_bbox(gh)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def cell_degrees(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a cell at `precision`."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def cell_size_km(precision: int, lat: float) -> Tuple[float, float]:
+    """(height, width) in km of a cell at `precision`, width measured at `lat`."""
+    h, w = cell_degrees(precision)
+    return h * KM_PER_DEGREE, w * KM_PER_DEGREE * max(cos(radians(min(abs(lat), 89.9))), 0.0)
+
+
+def neighbors(gh: str) -> List[str]:
+    """The cell itself plus its (up to) 8 neighbours, deduplicated."""
+    precision = len(gh)
+    h, w = cell_degrees(precision)
+    lat, lon = decode(gh)
+    cells = []
+    for dlat in (-h, 0.0, h):
+        nlat = lat + dlat
+        if nlat < -90 or nlat > 90:
+            continue
+        for dlon in (-w, 0.0, w):
+            nlon = (lon + dlon + 180.0) % 360.0 - 180.0
+            cell = encode(nlat, nlon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def covered_radius_km(precision: int, lat: float) -> float:
+    """
+    Radius (km) around any point that is guaranteed to lie inside the 3x3
+    block of cells centered on that point's cell: one cell in every direction.
+    The width is taken at the high-latitude edge of that radius.
+    """
+    h_km, _ = cell_size_km(precision, lat)
+    edge_lat = min(abs(lat) + h_km / KM_PER_DEGREE, 90.0)
+    _, w_km = cell_size_km(precision, edge_lat)
+    return min(h_km, w_km)
+
+
+def precision_for_radius(radius_km: float, lat: float, max_precision: int = 8) -> int:
+    """Finest precision whose 3x3 neighbourhood covers `radius_km`; 0 if none does."""
+    for precision in range(max_precision, 0, -1):
+        if covered_radius_km(precision, lat) >= radius_km:
+            return precision
+    return 0
+
+
+def article_geohash(lat: Optional[float], lon: Optional[float], precision: int = 8) -> Optional[str]:
+    # same rule the ranking code has always used: 0 / missing coords mean "no location"
+    if not lat or not lon:
+        return None
+    return encode(lat, lon, precision)
@@ -0,0 +1,74 @@
+"""
+Streaming reader for files holding one big JSON array (plain or .gz).
+Elements are decoded one at a time from a rolling buffer, so memory stays
+proportional to the largest element, not the file.
+"""
+import gzip
+import json
+from typing import Any, Iterator
+
+CHUNK_CHARS = 1 << 20
+_WS = " \t\n\r"
+
+
+def open_text(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8")
+
+
+def iter_json_array(path: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[Any]:
+    """Yield the elements of the top-level JSON array in `path`."""
+    decoder = json.JSONDecoder()
+    with open_text(path) as f:
+        buf, pos, eof = "", 0, False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WS:
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"File {path} does not contain a JSON array")
+        pos += 1
+        skip_ws()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+
+        while True:
+            skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise ValueError(f"Truncated or invalid JSON in {path}")
+                # a number cut by the chunk boundary ("2.5" of "2.5e3") must be re-read
+                if (end == len(buf) or buf[end] not in _WS + ",]") and not eof and fill():
+                    continue
+                break
+            pos = end
+            yield value
+
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"Truncated JSON array in {path}")
+            if buf[pos] == "]":
+                return
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' at element boundary in {path}")
+            pos += 1
@@ -0,0 +1,145 @@
+"""
+CPU-only text embeddings: hashed TF-IDF projected to a few hundred
+dimensions with LSA (truncated SVD), in plain NumPy.
+
+Tokens are hashed into `HASH_DIM` buckets (stable crc32, no vocabulary to
+store), weighted with sublinear TF × IDF and L2-normalized. The SVD is a
+randomized range finder over the sparse matrix, so fitting never densifies
+it. Words that co-occur across articles ("ev", "tesla", "electric") end up
+close in the reduced space even when a query and an article share no token.
+"""
+import zlib
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.text_utils import tokenize
+
+HASH_DIM = 1 << 15
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does for from had has have
+he her his how i if in into is it its just more most new no not of on one or our out over said says she
+so than that the their them then there these they this to up was we were what when which who will with
+would you your
+""".split())
+
+
+def terms(text: str) -> List[str]:
+    """Tokens without stopwords, with a light plural fold ("results" → "result")."""
+    out = []
+    for tok in tokenize(text or ""):
+        if tok in STOPWORDS or len(tok) < 2:
+            continue
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        out.append(tok)
+    return out
+
+
+class HashedCSR:
+    """Minimal CSR matrix (rows = documents, columns = hash buckets)."""
+
+    __slots__ = ("n_rows", "indptr", "indices", "data", "rows")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        self.n_rows = len(indptr) - 1
+        self.indptr, self.indices, self.data = indptr, indices, data
+        self.rows = np.repeat(np.arange(self.n_rows), np.diff(indptr))
+
+    def dot(self, m: np.ndarray, chunk_rows: int = 4096) -> np.ndarray:
+        """self @ m for a dense (HASH_DIM, k) matrix."""
+        out = np.zeros((self.n_rows, m.shape[1]), dtype=np.float64)
+        for r0 in range(0, self.n_rows, chunk_rows):
+            r1 = min(r0 + chunk_rows, self.n_rows)
+            lo, hi = self.indptr[r0], self.indptr[r1]
+            if lo == hi:
+                continue
+            contrib = self.data[lo:hi, None] * m[self.indices[lo:hi]]
+            # segments of the non-empty rows (empty rows stay zero)
+            nonempty = np.diff(self.indptr[r0:r1 + 1]) > 0
+            starts = self.indptr[r0:r1][nonempty] - lo
+            out[r0:r1][nonempty] = np.add.reduceat(contrib, starts, axis=0)
+        return out
+
+    def tdot(self, m: np.ndarray) -> np.ndarray:
+        """self.T @ m for a dense (n_rows, k) matrix."""
+        out = np.empty((HASH_DIM, m.shape[1]), dtype=np.float64)
+        for j in range(m.shape[1]):
+            out[:, j] = np.bincount(self.indices, weights=self.data * m[self.rows, j], minlength=HASH_DIM)
+        return out
+
+
+def hash_counts(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(indptr, bucket indices, term counts) for each text."""
+    indptr, indices, counts = [0], [], []
+    for text in texts:
+        row = {}
+        for tok in terms(text):
+            b = zlib.crc32(tok.encode("utf-8")) & (HASH_DIM - 1)
+            row[b] = row.get(b, 0) + 1
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(counts, dtype=np.float64),
+    )
+
+
+class HashedLSA:
+    """Fitted embedding model: IDF weights per bucket and the SVD projection."""
+
+    def __init__(self, idf: np.ndarray, components: np.ndarray):
+        self.idf = idf.astype(np.float32)
+        self.components = components.astype(np.float32)  # (HASH_DIM, dims)
+
+    @property
+    def dims(self) -> int:
+        return self.components.shape[1]
+
+    @staticmethod
+    def _tfidf(counted: Tuple[np.ndarray, np.ndarray, np.ndarray], idf: np.ndarray) -> HashedCSR:
+        indptr, indices, counts = counted
+        data = (1 + np.log(counts)) * idf[indices]
+        x = HashedCSR(indptr, indices, data)
+        norms = np.sqrt(np.bincount(x.rows, weights=data * data, minlength=x.n_rows))
+        x.data = data / np.where(norms > 0, norms, 1)[x.rows]
+        return x
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], dims: int = 128, power_iters: int = 2, seed: int = 0) -> "HashedLSA":
+        n = len(texts)
+        counted = hash_counts(texts)
+        # document frequency: buckets are unique within a row of hash_counts
+        df = np.bincount(counted[1], minlength=HASH_DIM)
+        idf = np.log((1 + n) / (1 + df)) + 1
+        x = cls._tfidf(counted, idf)
+
+        k = max(1, min(dims + 10, n))
+        rng = np.random.default_rng(seed)
+        q, _ = np.linalg.qr(x.dot(rng.standard_normal((HASH_DIM, k))))
+        for _ in range(power_iters):
+            z, _ = np.linalg.qr(x.tdot(q))
+            q, _ = np.linalg.qr(x.dot(z))
+        b = x.tdot(q).T  # (k, HASH_DIM)
+        _, _, vt = np.linalg.svd(b, full_matrices=False)
+        return cls(idf, vt[:dims].T)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dims) float32, rows L2-normalized (zero rows for empty texts)."""
+        if not len(texts):
+            return np.zeros((0, self.dims), dtype=np.float32)
+        v = self._tfidf(hash_counts(texts), self.idf.astype(np.float64)).dot(self.components)
+        norms = np.linalg.norm(v, axis=1, keepdims=True)
+        return (v / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(f, idf=self.idf, components=self.components)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLSA":
+        with np.load(path) as z:
+            return cls(z["idf"], z["components"])
@@ -1,9 +1,14 @@
 import re
+import unicodedata
 from datetime import datetime, timezone
 
 def tokenize(text: str):
     return re.findall(r"[A-Za-z0-9_]+", text.lower())
 
+def normalize_query(text: str) -> str:
+    """Case, whitespace and punctuation folded: "  Tech-News, Delhi!" → "tech news delhi"."""
+    return " ".join(re.findall(r"[^\W_]+", unicodedata.normalize("NFKC", text or "").casefold()))
+
 def text_match_score(query: str, title: str, description: str | None) -> float:
     q_tokens = set(tokenize(query))
     t_tokens = set(tokenize(title))
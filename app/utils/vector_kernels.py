@@ -0,0 +1,95 @@
+"""
+Vectorized versions of the scalar geo / scoring helpers, for ranking over many
+rows at once. Each kernel mirrors a scalar function and agrees with it within
+floating-point tolerance:
+
+    haversine_many      ↔ geo_utils.haversine
+    recency_boost_many  ↔ text_utils.recency_boost
+    proximity_factor    ↔ the trending feed's 2000 km proximity decay
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+SECONDS_PER_DAY = 86400.0
+
+
+class Coordinates:
+    """Contiguous float64 latitude/longitude arrays plus the ids they belong to."""
+
+    __slots__ = ("ids", "lat", "lon")
+
+    def __init__(self, ids: Sequence, lat: Iterable[float], lon: Iterable[float]):
+        self.ids = list(ids)
+        self.lat = np.ascontiguousarray(np.fromiter(lat, dtype=np.float64, count=len(self.ids)))
+        self.lon = np.ascontiguousarray(np.fromiter(lon, dtype=np.float64, count=len(self.ids)))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "Coordinates":
+        """Build from (id, lat, lon) rows."""
+        return cls([r[0] for r in rows], (r[1] for r in rows), (r[2] for r in rows))
+
+    @classmethod
+    def from_arrays(cls, ids: Sequence, lat: np.ndarray, lon: np.ndarray) -> "Coordinates":
+        """Wrap existing arrays; `ids` only needs len() and indexing."""
+        points = cls.__new__(cls)
+        points.ids = ids
+        points.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        points.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        return points
+
+    def __len__(self):
+        return len(self.ids)
+
+    def distances_to(self, lat: float, lon: float) -> np.ndarray:
+        return haversine_many(lat, lon, self.lat, self.lon)
+
+
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance (km) from one point to many."""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons - lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def proximity_factor(distances_km: np.ndarray, scale_km: float = 2000.0) -> np.ndarray:
+    """1 at the caller's location, falling linearly to 0 at `scale_km` and beyond."""
+    return np.maximum(0.0, 1 - np.minimum(distances_km / scale_km, 1))
+
+
+def to_epoch_seconds(values: Iterable[Optional[datetime]]) -> np.ndarray:
+    """Naive datetimes are taken as UTC (as everywhere else); None becomes NaN."""
+    out = []
+    for dt in values:
+        if dt is None:
+            out.append(np.nan)
+        else:
+            if not dt.tzinfo:
+                dt = dt.replace(tzinfo=timezone.utc)
+            out.append(dt.timestamp())
+    return np.asarray(out, dtype=np.float64)
+
+
+def recency_boost_many(epochs: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+    """0.9 ** (whole days old / 3); NaN (no date) → 1, like `recency_boost(None)`."""
+    if now is None:
+        now = datetime.now(timezone.utc).timestamp()
+    days = np.floor((now - epochs) / SECONDS_PER_DAY)
+    boost = np.power(0.9, days / 3)
+    return np.where(np.isnan(epochs), 1.0, boost)
+
+
+def blend_scores(text_match: np.ndarray, relevance: np.ndarray, boost: np.ndarray) -> np.ndarray:
+    """The search blend: (0.6 * text match + 0.4 * relevance) * recency boost."""
+    return (0.6 * text_match + 0.4 * np.nan_to_num(relevance)) * boost
+
+
+def safe_normalize(values: np.ndarray) -> np.ndarray:
+    """values / max(values); a zero or empty max leaves values unscaled (divides by 1)."""
+    top = values.max() if values.size else 0
+    return values / (top if top else 1)
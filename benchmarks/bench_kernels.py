@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: scalar geo/scoring helpers vs. the NumPy kernels in
+app.utils.vector_kernels, at several point counts.
+Usage:
+    python -m benchmarks.bench_kernels                 # 10k, 100k, 1M points
+    python -m benchmarks.bench_kernels --sizes 10000 --json
+"""
+import argparse, json, time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.utils.geo_utils import haversine
+from app.utils.text_utils import recency_boost
+from app.utils.vector_kernels import (
+    haversine_many, proximity_factor, recency_boost_many, blend_scores,
+)
+
+ORIGIN = (28.6139, 77.2090)
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n: int, seed: int = 7) -> dict:
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(-60, 60, n)
+    lons = rng.uniform(-180, 180, n)
+    now = datetime.now(timezone.utc)
+    ages_s = rng.uniform(0, 60 * 86400, n)
+    epochs = now.timestamp() - ages_s
+    dates = [now - timedelta(seconds=float(a)) for a in ages_s]
+    tm = rng.integers(0, 6, n).astype(np.float64)
+    rel = rng.uniform(0, 1, n)
+    lat_list, lon_list, tm_list, rel_list = lats.tolist(), lons.tolist(), tm.tolist(), rel.tolist()
+
+    def scalar(stop: int = n):
+        out = []
+        for la, lo, t, r, d in zip(lat_list[:stop], lon_list[:stop], tm_list[:stop], rel_list[:stop], dates[:stop]):
+            dist = haversine(ORIGIN[0], ORIGIN[1], la, lo)
+            prox = max(0.0, 1 - min(dist / 2000, 1))
+            out.append((0.6 * t + 0.4 * r) * recency_boost(d) + prox)
+        return out
+
+    def vectorized():
+        dist = haversine_many(ORIGIN[0], ORIGIN[1], lats, lons)
+        return blend_scores(tm, rel, recency_boost_many(epochs, now.timestamp())) + proximity_factor(dist)
+
+    # agreement check on a sample before timing
+    sample = min(n, 2000)
+    max_err = float(np.max(np.abs(vectorized()[:sample] - np.array(scalar(sample)))))
+
+    t_scalar = _time(scalar, repeat=1 if n >= 1_000_000 else 3)
+    t_vector = _time(vectorized)
+    return {
+        "points": n,
+        "scalar_s": round(t_scalar, 4),
+        "vectorized_s": round(t_vector, 4),
+        "speedup": round(t_scalar / t_vector, 1) if t_vector else None,
+        "max_abs_error": max_err,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scalar vs vectorized geo/scoring kernels")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = ap.parse_args()
+
+    results = [run(n) for n in args.sizes]
+    if args.json:
+        print(json.dumps({"benchmark": "kernels", "results": results}, indent=2))
+        return
+    print(f"{'points':>10} {'scalar s':>10} {'numpy s':>10} {'speedup':>8} {'max err':>10}")
+    for r in results:
+        print(f"{r['points']:>10} {r['scalar_s']:>10} {r['vectorized_s']:>10} {r['speedup']:>7}x {r['max_abs_error']:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Load test on synthetic data: for each corpus size it
+  - generates articles (topical titles, categories, sources, coordinates
+    around world cities, dates over 90 days, a few missing values) and user
+    events skewed towards popular articles, and loads them through the ingest
+    and trending paths into a fresh SQLite database (plus the article
+    snapshot and, unless --no-semantic, the semantic index)
+  - starts the app with the fake LLM and geocoder (latency set by
+    --llm-latency-ms / --geocoder-latency-ms)
+  - times every NewsService query method, sync and async, and every router
+    endpoint through an in-process ASGI client (no network, no server)
+and reports throughput, p50 / p95 / p99 latency and peak RSS per size.
+
+The corpus is built, and each size measured, in a separate process, so the
+app's module-level setup sees that run's database and peak RSS is per phase.
+Sync methods run one call at a time; async methods and endpoints run
+--concurrency calls at a time. The response cache is off unless
+--response-cache, so endpoint numbers measure the ranking, not the cache.
+POST /search-index/rebuild is left out (an admin operation, not a request path).
+
+Usage:
+    python -m benchmarks.bench_load                              # 10k / 100k articles
+    python -m benchmarks.bench_load --sizes 1000000 --data-dir /data/bench   # keep / reuse corpora
+    python -m benchmarks.bench_load --llm-latency-ms 200 --concurrency 32 --json > load.json
+"""
+import argparse, asyncio, json, os, shutil, subprocess, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+import numpy as np
+
+from app.utils.gazetteer import PLACES
+
+CATEGORIES = [
+    "Technology", "Business", "Sports", "Health", "Science",
+    "Entertainment", "Politics", "World", "Environment", "General",
+]
+SOURCES = [f"{a} {b}" for a in ("Daily", "Global", "Metro", "National", "Morning") for b in ("Times", "News", "Herald", "Post", "Wire")]
+CITIES = sorted(PLACES.items())[::4]
+WORDS_PER_CATEGORY = 200
+COMMON_WORDS = [f"common{w}" for w in range(500)]
+EVENT_TYPES = ["view", "click", "share"]
+
+
+def vocabulary(category: str):
+    return [f"{category.lower()}{w}" for w in range(WORDS_PER_CATEGORY)]
+
+
+def article_batches(n: int, seed: int, batch_size: int = 20000):
+    """Raw article records (the ingest JSON shape) in batches; ~2% miss a date or score, ~3% a location."""
+    rng = np.random.default_rng(seed)
+    vocab = [vocabulary(c) for c in CATEGORIES]
+    now = datetime.utcnow()
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        cats = rng.integers(0, len(CATEGORIES), (size, 2))
+        second = rng.random(size) < 0.3
+        sources = rng.integers(0, len(SOURCES), size)
+        cities = rng.integers(0, len(CITIES), size)
+        jitter = rng.normal(0, 0.5, (size, 2))
+        ages = rng.uniform(0, 90 * 86400, size)
+        scores = rng.uniform(0, 1, size)
+        missing = rng.random((size, 3))
+        batch = []
+        for j in range(size):
+            words = rng.choice(vocab[cats[j, 0]], 8)
+            title = " ".join(list(words[:6]) + list(rng.choice(COMMON_WORDS, 2)))
+            lat, lon = CITIES[cities[j]][1]
+            located = missing[j, 2] >= 0.03
+            batch.append({
+                "id": f"bench-{start + j:09d}",
+                "title": title,
+                "description": f"{title} {' '.join(words[6:])} {' '.join(rng.choice(COMMON_WORDS, 10))}",
+                "url": f"https://bench.example/{start + j}",
+                "publication_date": (now - timedelta(seconds=float(ages[j]))).isoformat() if missing[j, 0] >= 0.02 else None,
+                "source_name": SOURCES[sources[j]],
+                "category": [CATEGORIES[cats[j, 0]]] + ([CATEGORIES[cats[j, 1]]] if second[j] and cats[j, 1] != cats[j, 0] else []),
+                "relevance_score": round(float(scores[j]), 4) if missing[j, 1] >= 0.02 else None,
+                "latitude": round(lat + float(jitter[j, 0]), 5) if located else None,
+                "longitude": round(lon + float(jitter[j, 1]), 5) if located else None,
+            })
+        yield batch
+
+
+def event_batches(n_articles: int, n_events: int, seed: int, batch_size: int = 50000):
+    """UserEvent rows over the last 12 hours; article popularity is heavily skewed (cubic)."""
+    rng = np.random.default_rng(seed + 1)
+    now = datetime.utcnow()
+    for start in range(0, n_events, batch_size):
+        size = min(batch_size, n_events - start)
+        articles = (n_articles * rng.random(size) ** 3).astype(np.int64)
+        cities = rng.integers(0, len(CITIES), size)
+        jitter = rng.normal(0, 0.3, (size, 2))
+        ages = rng.uniform(0, 12 * 3600, size)
+        types = rng.choice(len(EVENT_TYPES), size, p=[0.7, 0.2, 0.1])
+        users = rng.integers(0, max(1000, n_events // 20), size)
+        yield [
+            {
+                "id": f"ev-{start + j:010d}",
+                "article_id": f"bench-{articles[j]:09d}",
+                "user_id": str(users[j]),
+                "event_type": EVENT_TYPES[types[j]],
+                "latitude": CITIES[cities[j]][1][0] + float(jitter[j, 0]),
+                "longitude": CITIES[cities[j]][1][1] + float(jitter[j, 1]),
+                "timestamp": now - timedelta(seconds=float(ages[j])),
+            }
+            for j in range(size)
+        ]
+
+
+def peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def rss_mb() -> float:
+    """Current RSS (Linux); the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20), 1)
+    except OSError:
+        return peak_rss_mb()
+
+
+def percentiles(samples, wall: float, errors: int = 0) -> dict:
+    ms = np.asarray(samples) * 1000 if samples else np.zeros(1)
+    return {
+        "calls": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / wall, 1) if wall else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def time_sync(fn, calls, warmup: int) -> dict:
+    """`calls`: list of (args, kwargs); the first `warmup` are not timed."""
+    for args, kwargs in calls[:warmup]:
+        fn(*args, **kwargs)
+    samples, errors = [], 0
+    started = time.perf_counter()
+    for args, kwargs in calls[warmup:]:
+        t0 = time.perf_counter()
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - t0)
+    return percentiles(samples, time.perf_counter() - started, errors)
+
+
+async def time_async(fn, calls, warmup: int, concurrency: int) -> dict:
+    """`fn` returns an awaitable; a result of False counts as an error (endpoints: non-2xx)."""
+    for args, kwargs in calls[:warmup]:
+        await fn(*args, **kwargs)
+    samples, errors = [], 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(args, kwargs):
+        nonlocal errors
+        async with gate:
+            t0 = time.perf_counter()
+            try:
+                ok = await fn(*args, **kwargs)
+            except Exception:
+                ok = False
+            if ok is False:
+                errors += 1
+            else:
+                samples.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(args, kwargs) for args, kwargs in calls[warmup:]))
+    return percentiles(samples, time.perf_counter() - started, errors)
+
+
+def corpus_env(directory: str, opts: dict) -> dict:
+    """Environment for the app of one run: its own database, snapshot and index directories."""
+    return {
+        "DB_URL": f"sqlite:///{os.path.join(directory, 'news.db')}",
+        "ARTICLE_SNAPSHOT_DIR": os.path.join(directory, "snapshot"),
+        "SEMANTIC_INDEX_DIR": os.path.join(directory, "semantic"),
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY_MS": str(opts["llm_latency_ms"]),
+        "GEOCODER_PROVIDER": "fake",
+        "FAKE_GEOCODER_LATENCY_MS": str(opts["geocoder_latency_ms"]),
+        "RESPONSE_CACHE_SIZE": os.getenv("RESPONSE_CACHE_SIZE", "1024") if opts["response_cache"] else "0",
+        "RESPONSE_CACHE_BACKEND": "memory",
+    }
+
+
+def build_corpus(env: dict, n: int, n_events: int, seed: int, semantic: bool) -> dict:
+    """Child process: load the synthetic corpus through the ingest / trending paths."""
+    os.environ.update(env)
+    from sqlalchemy import insert
+    from app.database import init_db, engine, bump_data_version
+    from app.ingest import normalize_batch, write_rows
+    from app.models import UserEvent
+    from app.services.article_snapshot import ArticleSnapshot, SnapshotStore
+    from app.services.trending_service import TrendingService
+
+    init_db()
+    timings = {}
+    started = time.perf_counter()
+    for batch in article_batches(n, seed):
+        rows, _ = normalize_batch(batch)
+        for r in rows:
+            r["source_file"] = "synthetic"
+        with engine.begin() as conn:
+            write_rows(conn, rows)
+    bump_data_version()
+    timings["articles_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    for batch in event_batches(n, n_events, seed):
+        with engine.begin() as conn:
+            for i in range(0, len(batch), 5000):
+                conn.execute(insert(UserEvent), batch[i:i + 5000])
+    TrendingService().rebuild()
+    timings["events_s"] = round(time.perf_counter() - started, 2)
+
+    started = time.perf_counter()
+    snap = ArticleSnapshot.from_db()
+    SnapshotStore().write(snap)
+    timings["snapshot_s"] = round(time.perf_counter() - started, 2)
+
+    if semantic:
+        from app.services.semantic_index import SemanticIndex
+
+        started = time.perf_counter()
+        SemanticIndex().build()
+        timings["semantic_s"] = round(time.perf_counter() - started, 2)
+
+    db_path = env["DB_URL"][len("sqlite:///"):]
+    return {
+        **timings,
+        "db_mb": round(os.path.getsize(db_path) / 1e6, 1),
+        "snapshot_mb": round(snap.nbytes() / 1e6, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def workload(n: int, requests: int, seed: int):
+    """Argument generators for the cases: each call draws fresh parameters."""
+    rng = np.random.default_rng(seed + 2)
+
+    def category():
+        return CATEGORIES[rng.integers(len(CATEGORIES))]
+
+    def words(k: int = 2):
+        return " ".join(rng.choice(vocabulary(category()), k))
+
+    def point(spread: float = 0.3):
+        lat, lon = CITIES[rng.integers(len(CITIES))][1]
+        return round(lat + float(rng.normal(0, spread)), 4), round(lon + float(rng.normal(0, spread)), 4)
+
+    def city():
+        return CITIES[rng.integers(len(CITIES))][0]
+
+    def event():
+        lat, lon = point()
+        return {
+            "article_id": f"bench-{int(n * rng.random() ** 3):09d}",
+            "user_id": str(rng.integers(0, 100000)),
+            "event_type": EVENT_TYPES[rng.integers(3)],
+            "latitude": lat,
+            "longitude": lon,
+        }
+
+    def calls(make):
+        return [make() for _ in range(requests)]
+
+    return category, words, point, city, event, calls, rng
+
+
+def service_cases(service, intent_service, n: int, requests: int, seed: int, semantic: bool):
+    """(name, fn, calls, is_async) for the NewsService query methods."""
+    category, words, point, city, _, calls, rng = workload(n, requests, seed)
+    limit = lambda: int(rng.choice([5, 10, 20]))
+    modes = ["lexical"] + (["semantic", "hybrid"] if semantic else [])
+
+    def sync(name, make):
+        return [(name, getattr(service, name), make, False)]
+
+    def pair(name, make):
+        return sync(name, make) + [("a" + name, getattr(service, "a" + name), make, True)]
+
+    cases = []
+    cases += pair("category_candidates", lambda: ((category(), limit()), {}))
+    cases += pair("source_candidates", lambda: ((SOURCES[rng.integers(len(SOURCES))], limit()), {}))
+    cases += pair("score_candidates", lambda: ((float(rng.uniform(0.3, 0.95)), limit()), {}))
+    for mode in modes:
+        cases += [(f"{c[0]}[{mode}]",) + c[1:] for c in pair("search_candidates", lambda mode=mode: ((words(), limit()), {"mode": mode}))]
+    cases += sync("nearby_candidates", lambda: (point() + (float(rng.choice([10, 50, 200])), limit()), {}))
+    cases += sync("trending_candidates", lambda: (point(), {"limit": limit()}))
+    cases += pair("category_names", lambda: (([f"bench-{i:09d}" for i in rng.integers(0, n, 20)],), {}))
+    # pages: what the router awaits before rendering
+    cases += pair("category_page", lambda: ((category(), limit()), {}))
+    cases += pair("source_page", lambda: ((SOURCES[rng.integers(len(SOURCES))], limit()), {}))
+    cases += pair("score_page", lambda: ((float(rng.uniform(0.3, 0.95)), limit()), {}))
+    cases += pair("search_page", lambda: ((words(), limit()), {}))
+    cases += pair("nearby_page", lambda: (point() + (50.0, limit()), {}))
+    cases += pair("trending_page", lambda: (point(), {"limit": limit()}))
+    cases += sync("rank_category", lambda: ((category(), limit()), {}))
+    cases += sync("rank_search", lambda: ((words(), limit()), {}))
+    cases += pair("compute_trending_feed", lambda: (point(), {"limit": limit()}))
+    sample = service.search_candidates(words(1), 100)
+    cases += pair("render", lambda: ((service.category_candidates(category(), limit()),), {}))
+    # the smart query's proximity re-ranking of its search candidates
+    cases += sync("_rerank_candidates", lambda: ((PLACES[city()], sample), {}))
+    cases.append(("asmart_query", service.asmart_query,
+                  lambda: ((f"{words()} news in {city()}", intent_service.aextract_intent), {}), True))
+    # argument lists are drawn up front so their cost isn't timed
+    return [(name, fn, calls(make), is_async) for name, fn, make, is_async in cases]
+
+
+def endpoint_cases(n: int, requests: int, seed: int, semantic: bool):
+    """(name, method, path, calls) for the router endpoints; calls are (params or body, headers)."""
+    category, words, point, city, event, calls, rng = workload(n, requests, seed + 10)
+    limit = lambda: int(rng.choice([5, 10, 20]))
+    get = lambda **params: ((params,), {})
+    cases = [
+        ("GET /category", "GET", "/api/news/category", lambda: get(category=category(), limit=limit())),
+        ("GET /category ndjson", "GET", "/api/news/category", lambda: ((({"category": category(), "limit": limit()}),), {"accept": "application/x-ndjson"})),
+        ("GET /source", "GET", "/api/news/source", lambda: get(source=SOURCES[rng.integers(len(SOURCES))], limit=limit())),
+        ("GET /score", "GET", "/api/news/score", lambda: get(threshold=round(float(rng.uniform(0.3, 0.95)), 3), limit=limit())),
+    ]
+    for mode in ["lexical"] + (["semantic", "hybrid"] if semantic else []):
+        cases.append((f"GET /search[{mode}]", "GET", "/api/news/search", lambda mode=mode: get(query=words(), mode=mode, limit=limit())))
+    cases += [
+        ("GET /nearby", "GET", "/api/news/nearby", lambda: get(**dict(zip(("lat", "lon"), point())), radius=50, limit=limit())),
+        ("GET /trending", "GET", "/api/news/trending", lambda: get(**dict(zip(("lat", "lon"), point())), limit=limit())),
+        ("POST /query", "POST", "/api/news/query", lambda: (({"query": f"{words()} news in {city()}"},), {})),
+        ("POST /events", "POST", "/api/news/events", lambda: ((event(),), {})),
+        ("POST /events/bulk", "POST", "/api/news/events/bulk", lambda: (([event() for _ in range(100)],), {})),
+        ("GET /events/stats", "GET", "/api/news/events/stats", lambda: get()),
+        ("GET /cache/stats", "GET", "/api/news/cache/stats", lambda: get()),
+        ("GET /search-index/stats", "GET", "/api/news/search-index/stats", lambda: get()),
+        ("GET /health", "GET", "/health", lambda: get()),
+    ]
+    return [(name, method, path, calls(make)) for name, method, path, make in cases]
+
+
+def measure(env: dict, n: int, opts: dict) -> dict:
+    """Child process: start the app on the corpus and time the service methods and endpoints."""
+    os.environ.update(env)
+    if not opts["verbose"]:
+        # the services report progress with print(); keep the benchmark output readable
+        sys.stdout = open(os.devnull, "w")
+    import logging
+    logging.disable(logging.INFO)
+
+    import httpx
+    started = time.perf_counter()
+    from app.main import app
+    from app.routes.news_router import service, intent_service
+    startup = {"startup_s": round(time.perf_counter() - started, 2), "rss_after_startup_mb": rss_mb()}
+
+    requests, warmup, concurrency = opts["requests"] + opts["warmup"], opts["warmup"], opts["concurrency"]
+    results = {"service": [], "endpoints": []}
+
+    # one event loop for everything: the async engine's pool and the HTTP clients belong to it
+    async def main():
+        for name, fn, calls, is_async in service_cases(service, intent_service, n, requests, opts["seed"], opts["semantic"]):
+            if is_async:
+                stats = await time_async(fn, calls, warmup, concurrency)
+            else:
+                stats = time_sync(fn, calls, warmup)
+            results["service"].append({"name": name, "mode": "async" if is_async else "sync", **stats})
+            print(f"  {name}: {stats['p50_ms']} ms p50", file=sys.stderr)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, method, path, calls in endpoint_cases(n, requests, opts["seed"], opts["semantic"]):
+                async def call(payload, accept="application/json"):
+                    if method == "GET":
+                        r = await client.get(path, params=payload, headers={"accept": accept})
+                    else:
+                        r = await client.post(path, json=payload)
+                    return r.is_success
+                stats = await time_async(call, calls, warmup, concurrency)
+                results["endpoints"].append({"name": name, **stats})
+                print(f"  {name}: {stats['p50_ms']} ms p50", file=sys.stderr)
+
+    asyncio.run(main())
+    service.events.close()
+    return {**startup, **results, "peak_rss_mb": peak_rss_mb()}
+
+
+def run(n: int, opts: dict) -> dict:
+    n_events = int(n * opts["events_per_article"])
+    spawn = get_context("spawn")
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = scratch
+        if opts["data_dir"]:
+            directory = os.path.join(opts["data_dir"], f"corpus-{n}-{n_events}-{opts['seed']}{'' if opts['semantic'] else '-nosem'}")
+            os.makedirs(directory, exist_ok=True)
+        env = corpus_env(directory, opts)
+        marker = os.path.join(directory, "corpus.json")
+        if os.path.exists(marker):
+            with open(marker) as f:
+                build = {**json.load(f), "reused": True}
+        else:
+            print(f"building {n} articles / {n_events} events in {directory}", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                build = pool.submit(build_corpus, env, n, n_events, opts["seed"], opts["semantic"]).result()
+            with open(marker, "w") as f:
+                json.dump(build, f)
+        if directory != scratch:
+            # requests write (events, cached summaries): measure on a copy so a kept corpus stays pristine
+            shutil.copytree(directory, os.path.join(scratch, "run"))
+            env = corpus_env(os.path.join(scratch, "run"), opts)
+        print(f"measuring {n} articles", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            measured = pool.submit(measure, env, n, opts).result()
+    return {"articles": n, "events": n_events, "build": build, **measured}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Service / API load test on synthetic corpora")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Article counts (10k–10M)")
+    ap.add_argument("--events-per-article", type=float, default=1.0)
+    ap.add_argument("--requests", type=int, default=200, help="Timed calls per method / endpoint")
+    ap.add_argument("--warmup", type=int, default=10, help="Untimed calls before each measurement")
+    ap.add_argument("--concurrency", type=int, default=8, help="In-flight calls for async methods and endpoints")
+    ap.add_argument("--llm-latency-ms", type=float, default=50, help="Latency of the fake LLM")
+    ap.add_argument("--geocoder-latency-ms", type=float, default=50, help="Latency of the fake geocoder")
+    ap.add_argument("--response-cache", action="store_true", help="Keep the HTTP response cache on")
+    ap.add_argument("--no-semantic", dest="semantic", action="store_false", help="Skip the semantic index and its search modes")
+    ap.add_argument("--data-dir", help="Keep corpora here and reuse them on later runs (default: temporary)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--verbose", action="store_true", help="Show the services' own output")
+    ap.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = ap.parse_args()
+
+    opts = {k: v for k, v in vars(args).items() if k not in ("sizes", "json")}
+    results = [run(n, opts) for n in args.sizes]
+    if args.json:
+        print(json.dumps({"benchmark": "load", "commit": git_commit(), "config": opts, "results": results}, indent=2))
+        return
+    for r in results:
+        b = r["build"]
+        print(f"{r['articles']} articles, {r['events']} events: db {b['db_mb']} MB, snapshot {b['snapshot_mb']} MB, "
+              f"built in {b['articles_s']}s + {b['events_s']}s events"
+              f"{' (reused)' if b.get('reused') else ''}; startup {r['startup_s']}s, "
+              f"RSS {r['rss_after_startup_mb']} MB after startup, peak {r['peak_rss_mb']} MB")
+        for section in ("service", "endpoints"):
+            for s in r[section]:
+                name = f"{s['name']} ({s['mode']})" if "mode" in s else s["name"]
+                print(f"  {name:<62} {s['throughput_rps']:>9} /s  p50 {s['p50_ms']:>9} ms  "
+                      f"p95 {s['p95_ms']:>9} ms  p99 {s['p99_ms']:>9} ms" + (f"  errors {s['errors']}" if s["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Semantic retrieval benchmark: builds a `SemanticIndex` over a synthetic
+topical corpus (no database needed) and reports
+  - build time and on-disk vector size
+  - query latency p50 / p99 for exact search and IVF at several nprobe
+  - recall@k of IVF against exact search
+  - topic precision@k: share of results from the query's topic, for queries
+    whose words are split across documents (token overlap alone can't score them)
+Usage:
+    python -m benchmarks.bench_semantic                   # 20k / 100k articles
+    python -m benchmarks.bench_semantic --sizes 50000 --nprobe 4 8 16 --json
+"""
+import argparse, json, tempfile, time
+
+import numpy as np
+
+from app.services.semantic_index import SemanticIndex
+
+TOPICS = 40
+WORDS_PER_TOPIC = 30
+DOC_WORDS = 25
+
+
+def corpus(n: int, seed: int = 11):
+    """(ids, texts, topic per doc, topic vocabularies) — each doc draws most words from one topic."""
+    rng = np.random.default_rng(seed)
+    vocab = [[f"t{t}w{w}" for w in range(WORDS_PER_TOPIC)] for t in range(TOPICS)]
+    noise = [f"noise{w}" for w in range(2000)]
+    topics = rng.integers(0, TOPICS, n)
+    texts = []
+    for t in topics:
+        # each doc only sees half of its topic's vocabulary
+        words = list(rng.choice(vocab[t][:WORDS_PER_TOPIC // 2] if rng.random() < 0.5 else vocab[t][WORDS_PER_TOPIC // 2:], 18))
+        words += list(rng.choice(noise, DOC_WORDS - 18))
+        texts.append(" ".join(words))
+    return [f"a{i}" for i in range(n)], texts, topics, vocab
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def run(n: int, nprobes, queries: int = 200, k: int = 10) -> dict:
+    ids, texts, topics, vocab = corpus(n)
+    topic_of = dict(zip(ids, topics))
+    rng = np.random.default_rng(3)
+    qtopics = rng.integers(0, TOPICS, queries)
+    # one word from each half of the topic vocabulary: no single document contains both
+    qtexts = [f"{vocab[t][rng.integers(0, WORDS_PER_TOPIC // 2)]} {vocab[t][rng.integers(WORDS_PER_TOPIC // 2, WORDS_PER_TOPIC)]}" for t in qtopics]
+
+    def scan(batch_size):
+        for i in range(0, n, batch_size):
+            yield list(zip(ids[i:i + batch_size], texts[i:i + batch_size]))
+
+    with tempfile.TemporaryDirectory() as d:
+        index = SemanticIndex(directory=d, refresh_interval=1e9)
+        t0 = time.perf_counter()
+        stats = index.build(scan=scan)
+        build_s = time.perf_counter() - t0
+
+        exact, lat = [], []
+        for q in qtexts:
+            t0 = time.perf_counter()
+            exact.append([i for i, _ in index.exact_search(q, k)])
+            lat.append(time.perf_counter() - t0)
+        result = {
+            "articles": n,
+            "lists": stats["lists"],
+            "build_s": round(build_s, 2),
+            "vector_mb": round(stats["vector_bytes"] / 1e6, 1),
+            "exact": {**percentiles(lat), "topic_precision": round(float(np.mean(
+                [np.mean([topic_of[i] == t for i in r]) if r else 0 for r, t in zip(exact, qtopics)])), 3)},
+            "ivf": [],
+        }
+        for nprobe in nprobes:
+            lat, recall = [], []
+            for q, truth in zip(qtexts, exact):
+                t0 = time.perf_counter()
+                got = [i for i, _ in index.search(q, k, nprobe=nprobe)]
+                lat.append(time.perf_counter() - t0)
+                recall.append(len(set(got) & set(truth)) / len(truth) if truth else 1.0)
+            result["ivf"].append({"nprobe": nprobe, **percentiles(lat), f"recall@{k}": round(float(np.mean(recall)), 3)})
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Semantic index latency / recall")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000])
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = ap.parse_args()
+
+    results = [run(n, args.nprobe, args.queries) for n in args.sizes]
+    if args.json:
+        print(json.dumps({"benchmark": "semantic", "results": results}, indent=2))
+        return
+    for r in results:
+        print(f"{r['articles']} articles, {r['lists']} lists, built in {r['build_s']}s, vectors {r['vector_mb']} MB")
+        e = r["exact"]
+        print(f"  {'exact':>10} p50 {e['p50_ms']:>8} ms  p99 {e['p99_ms']:>8} ms  topic precision {e['topic_precision']}")
+        for v in r["ivf"]:
+            print(f"  nprobe {v['nprobe']:>3} p50 {v['p50_ms']:>8} ms  p99 {v['p99_ms']:>8} ms  recall@10 {v['recall@10']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Shared fixtures. The app reads its configuration when its modules are
+imported, so the environment (a scratch database, fake LLM and geocoder)
+is set here, before anything from `app` is imported.
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+_TMP = tempfile.TemporaryDirectory(prefix="news-tests-")
+os.environ.update({
+    "DB_URL": f"sqlite:///{os.path.join(_TMP.name, 'news.db')}",
+    "ARTICLE_SNAPSHOT_DIR": os.path.join(_TMP.name, "snapshot"),
+    "SEMANTIC_INDEX_DIR": os.path.join(_TMP.name, "semantic"),
+    "RESPONSE_CACHE_PATH": os.path.join(_TMP.name, "response_cache.db"),
+    "LLM_PROVIDER": "fake",
+    "FAKE_LLM_LATENCY_MS": "1",
+    "GEOCODER_PROVIDER": "fake",
+    "FAKE_GEOCODER_LATENCY_MS": "1",
+})
+
+import pytest
+from sqlmodel import delete
+
+from app.database import init_db, engine, bump_data_version, get_session
+from app.ingest import normalize_batch, write_rows
+from app.models import UserEvent, UserEventHourly, ArticleTrend, ArticleCellEngagement, AppState
+
+init_db()
+
+N_ARTICLES = 260
+MARKET_ARTICLES = 220  # titles containing "market": more than one ranking pool for small limits
+CENTER = (19.07, 72.87)
+
+
+def corpus():
+    """Deterministic articles with tied scores and dates, some NULLs, all within ~150 km of CENTER."""
+    base = datetime(2025, 6, 1, 12, 0, 0)
+    records = []
+    for i in range(N_ARTICLES):
+        records.append({
+            "id": f"t-{i:03d}",
+            "title": f"market update {i}" if i < MARKET_ARTICLES else f"weather report {i}",
+            "description": f"article number {i}",
+            "url": f"https://example.test/{i}",
+            "publication_date": None if i % 17 == 0 else (base - timedelta(hours=i % 11)).isoformat(),
+            "source_name": ["Alpha", "Beta", "Gamma"][i % 3],
+            "category": ["Business" if i % 2 == 0 else "Tech"] + (["Business"] if i % 5 == 0 and i % 2 else []),
+            "relevance_score": None if i % 13 == 0 else round((i % 7) / 7, 2),
+            "latitude": 19.0 + (i % 20) * 0.05,
+            "longitude": 72.8 + (i // 20) * 0.05,
+        })
+    return records
+
+
+@pytest.fixture(scope="session", autouse=True)
+def articles():
+    rows, _ = normalize_batch(corpus())
+    for r in rows:
+        r["source_file"] = "tests"
+    with engine.begin() as conn:
+        write_rows(conn, rows)
+    bump_data_version()
+    return rows
+
+
+def _news_service(snapshot: bool):
+    from app.services.news_service import NewsService
+
+    previous = os.environ.get("ARTICLE_SNAPSHOT")
+    os.environ["ARTICLE_SNAPSHOT"] = "1" if snapshot else "0"
+    try:
+        return NewsService()
+    finally:
+        if previous is None:
+            del os.environ["ARTICLE_SNAPSHOT"]
+        else:
+            os.environ["ARTICLE_SNAPSHOT"] = previous
+
+
+@pytest.fixture(scope="session", params=["snapshot", "db"])
+def service(request, articles):
+    """A NewsService ranking off the article snapshot, and one querying the database."""
+    svc = _news_service(request.param == "snapshot")
+    yield svc
+    svc.events.close()
+
+
+@pytest.fixture
+def clean_events():
+    """Empty event log, hourly history and trending rollups."""
+    with get_session() as s:
+        for model in (UserEvent, UserEventHourly, ArticleTrend, ArticleCellEngagement):
+            s.exec(delete(model))
+        s.exec(delete(AppState).where(AppState.key == "trending_epoch"))
+        s.commit()
+    yield
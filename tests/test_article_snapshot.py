@@ -0,0 +1,68 @@
+import glob
+import os
+
+from sqlmodel import select
+
+from app.database import bump_data_version, data_version, get_session
+from app.models import Article
+from app.services.article_snapshot import ArticleSnapshot, SnapshotStore
+from app.services.news_service import CANDIDATE_COLUMNS
+
+
+def ids(snap, rows):
+    return [snap.ids[r].decode("utf-8") for r in rows]
+
+
+def test_written_snapshot_is_loaded_from_its_files(tmp_path):
+    built = ArticleSnapshot.from_db()
+    store = SnapshotStore(directory=str(tmp_path), check_s=0)
+    store.write(built)
+
+    loaded = store.refresh(force=True)
+    assert store.stats()["source"] == "file"
+    assert loaded.data_version == built.data_version
+    assert len(loaded) == len(built)
+    assert ids(loaded, loaded.in_category("business", 50)) == ids(built, built.in_category("Business", 50))
+    assert ids(loaded, loaded.above_score(0.3, 50)) == ids(built, built.above_score(0.3, 50))
+
+
+def test_arrays_removed_by_a_concurrent_write_keep_the_current_snapshot(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), check_s=0)
+    store.write(ArticleSnapshot.from_db())
+    current = store.refresh(force=True)
+
+    # a newer generation whose arrays a later write already removed
+    bump_data_version()
+    store.write(ArticleSnapshot.from_db())
+    os.remove(sorted(glob.glob(os.path.join(tmp_path, "*.npy")))[0])
+
+    assert store.refresh() is current
+
+    # the next write completes: the following check picks it up
+    newer = ArticleSnapshot.from_db()
+    store.write(newer)
+    assert store.refresh().data_version == newer.data_version
+    assert store.stats()["source"] == "file"
+
+
+def test_columns_hold_what_the_article_table_holds(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), check_s=0)
+    store.write(ArticleSnapshot.from_db())
+    snap = store.refresh(force=True)
+    with get_session() as s:
+        rows = [tuple(r) for r in s.exec(select(*CANDIDATE_COLUMNS).order_by(Article.id)).all()]
+        categories = {a.id: a.categories for a in s.exec(select(Article)).all()}
+
+    assert snap.records(range(len(snap))) == rows
+    assert snap.category_names_of(list(categories)) == categories
+    assert snap.contains(["t-001", "missing"]) == {"t-001"}
+
+
+def test_a_file_of_an_older_data_version_is_not_served(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), check_s=0)
+    store.write(ArticleSnapshot.from_db())
+    bump_data_version()
+
+    snap = store.refresh(force=True)
+    assert snap.data_version == data_version()
+    assert store.stats()["source"] == "db"
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_load import article_batches, event_batches
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def titles(records):
+    return [(r["id"], r["title"], r["category"], r["latitude"]) for r in records]
+
+
+def test_synthetic_corpus_is_deterministic_and_events_name_its_articles():
+    first = [r for batch in article_batches(50, seed=3, batch_size=20) for r in batch]
+    assert titles(first) == titles(r for batch in article_batches(50, seed=3, batch_size=20) for r in batch)
+    assert len({r["id"] for r in first}) == 50
+    events = [e for batch in event_batches(50, 200, seed=3) for e in batch]
+    assert len(events) == 200
+    assert {e["article_id"] for e in events} <= {r["id"] for r in first}
+
+
+def test_load_benchmark_runs_every_case_on_a_tiny_corpus(tmp_path):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_load", "--sizes", "300", "--requests", "2", "--warmup", "0",
+         "--concurrency", "2", "--llm-latency-ms", "0", "--geocoder-latency-ms", "0",
+         "--data-dir", str(tmp_path), "--json"],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert out.returncode == 0, out.stderr
+    report = json.loads(out.stdout)
+    assert report["benchmark"] == "load"
+    (result,) = report["results"]
+    assert result["articles"] == result["events"] == 300
+    assert {"articles_s", "events_s", "snapshot_s", "semantic_s"} <= set(result["build"])
+    assert result["peak_rss_mb"] > 0
+
+    cases = result["service"] + result["endpoints"]
+    failed = [c["name"] for c in cases if c["errors"] or c["calls"] != 2]
+    assert failed == []
+    assert all(c["p50_ms"] <= c["p95_ms"] <= c["p99_ms"] for c in cases)
+    names = {c["name"] for c in result["endpoints"]}
+    assert {"GET /category ndjson", "GET /health"} <= names
+    assert os.path.exists(tmp_path / "corpus-300-300-7" / "corpus.json")  # kept for the next run
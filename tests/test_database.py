@@ -0,0 +1,40 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app import database
+from app.utils.geohash import article_geohash
+
+LEGACY_ARTICLE = """
+CREATE TABLE article (
+    id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, description VARCHAR, url VARCHAR,
+    publication_date DATETIME, source_name VARCHAR, category_json VARCHAR,
+    relevance_score FLOAT, latitude FLOAT, longitude FLOAT
+)"""
+
+
+def test_legacy_database_is_migrated_in_place(tmp_path, monkeypatch):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        conn.execute(text(LEGACY_ARTICLE))
+        conn.execute(text(
+            "INSERT INTO article (id, title, description, category_json, latitude, longitude) VALUES "
+            "('old-1', 'Harbour news', 'ships', '[\"Business\", \"Tech\"]', 19.07, 72.87), "
+            "('old-2', 'No place', NULL, NULL, NULL, NULL)"
+        ))
+    monkeypatch.setattr(database, "engine", legacy)
+
+    for _ in range(2):  # idempotent
+        database.init_db()
+
+    columns = {c["name"] for c in inspect(legacy).get_columns("article")}
+    assert "category_json" not in columns
+    assert {"geohash", "content_hash", "source_file", "updated_at"} <= columns
+    with legacy.connect() as conn:
+        indexes = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        links = conn.execute(text("SELECT article_id, position, name FROM article_category ORDER BY position")).all()
+        geohashes = dict(conn.execute(text("SELECT id, geohash FROM article")).all())
+        matches = conn.execute(text("SELECT rowid FROM article_fts WHERE article_fts MATCH 'harbour'")).all()
+    assert {"ix_article_source_name_lower", "ix_article_category_name_lower", "ix_article_geohash"} <= indexes
+    assert [tuple(r) for r in links] == [("old-1", 0, "Business"), ("old-1", 1, "Tech")]
+    assert geohashes == {"old-1": article_geohash(19.07, 72.87), "old-2": None}
+    assert len(matches) == 1
+    legacy.dispose()
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlmodel import select, func
+
+from app.database import get_session
+from app.models import UserEvent, ArticleTrend
+from app.services.event_buffer import EventBuffer
+from app.services.trending_service import TrendingService
+
+pytestmark = pytest.mark.usefixtures("clean_events")
+
+
+class FlakyTrending(TrendingService):
+    """Rollups that fail the first `failures` times."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def record(self, events, session=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("rollup failed")
+        return super().record(events, session=session)
+
+
+def events(n: int):
+    return [
+        {"article_id": f"t-{i % 5:03d}", "user_id": str(i), "event_type": "click",
+         "latitude": 19.07, "longitude": 72.87, "timestamp": datetime.utcnow()}
+        for i in range(n)
+    ]
+
+
+def stored():
+    """(raw events, events counted by the rollups)"""
+    with get_session() as s:
+        raw = s.exec(select(func.count()).select_from(UserEvent)).one()
+        rolled = s.exec(select(func.coalesce(func.sum(ArticleTrend.event_count), 0))).one()
+    return raw, rolled
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_flush_writes_events_and_rollups():
+    buf = EventBuffer(TrendingService(), flush_interval=3600)
+    try:
+        buf.add(events(7))
+        assert buf.flush() == 7
+        assert stored() == (7, 7)
+        assert buf.stats()["pending"] == 0
+    finally:
+        buf.close()
+
+
+def test_failed_rollup_rolls_back_the_events_and_keeps_the_batch():
+    buf = EventBuffer(FlakyTrending(failures=1), flush_interval=3600)
+    try:
+        buf.add(events(4))
+        assert buf.flush() == 0
+        assert stored() == (0, 0)
+        assert buf.stats()["failed_flushes"] == 1
+        assert buf.stats()["pending"] == 4
+
+        # the retry writes the batch once, log and rollups together
+        assert buf.flush() == 4
+        assert stored() == (4, 4)
+    finally:
+        buf.close()
+
+
+def test_writer_thread_survives_failed_flushes():
+    buf = EventBuffer(FlakyTrending(failures=3), flush_interval=0.01)
+    try:
+        buf.add(events(6))
+        assert wait_for(lambda: buf.stats()["written"] == 6)
+        assert buf._thread.is_alive()
+        assert buf.stats()["failed_flushes"] == 3
+        assert stored() == (6, 6)
+    finally:
+        buf.close()
+
+
+def test_writer_thread_survives_unexpected_errors(monkeypatch):
+    buf = EventBuffer(TrendingService(), flush_interval=0.01)
+    try:
+        flush, calls = buf.flush, []
+
+        def broken_once():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("unexpected")
+            return flush()
+
+        monkeypatch.setattr(buf, "flush", broken_once)
+        buf.add(events(3))
+        assert wait_for(lambda: buf.stats()["written"] == 3)
+        assert buf._thread.is_alive()
+        assert buf.stats()["failed_flushes"] >= 1
+    finally:
+        buf.close()
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.fake_geocoder import FakeGeocoderTransport
+from app.services.geo_service import GeoService
+from app.utils import gazetteer
+
+PARIS_TEXAS = (33.6609, -95.5555)
+
+
+@pytest.fixture
+def geo():
+    transport = FakeGeocoderTransport(latency_s=0, places={"Paris, Texas": PARIS_TEXAS})
+    service = GeoService(transport=transport)
+    yield service
+    service.close()
+
+
+@pytest.mark.parametrize("place, expected", [
+    ("Mumbai, Maharashtra", "mumbai"),
+    ("Mumbai, Maharashtra, India", "mumbai"),
+    ("Bangalore, Karnataka", "bengaluru"),
+    ("Paris, France", "paris"),
+    ("New York, NY, USA", "new york"),
+    ("Chandigarh, Haryana", "chandigarh"),
+])
+def test_qualified_places_resolve_offline(geo, place, expected):
+    assert geo.geocode(place) == gazetteer.PLACES[expected]
+    assert geo.transport.calls == 0
+
+
+def test_qualifier_elsewhere_goes_to_the_geocoder(geo):
+    assert geo.geocode("Paris, Texas") == PARIS_TEXAS
+    assert geo.transport.calls == 1
+    assert asyncio.run(geo.ageocode("Paris, Texas")) == PARIS_TEXAS
+    assert geo.transport.calls == 1  # remembered
+
+
+def test_mismatched_qualifier_is_not_resolved_offline():
+    assert gazetteer.lookup_qualified(["mumbai", "gujarat"]) is None
+    assert gazetteer.lookup_qualified(["paris", "texas"]) is None
+    assert gazetteer.lookup_qualified(["paris"]) is None
+
+
+def test_every_bundled_city_knows_its_country():
+    cities = list(gazetteer.PLACES)[:list(gazetteer.PLACES).index("andhra pradesh")]
+    assert all("india" in gazetteer.WITHIN[c] for c in cities)
@@ -0,0 +1,160 @@
+import gzip
+import json
+import os
+
+import pytest
+from sqlmodel import select, delete
+
+from app.database import get_session, bump_data_version
+from app.ingest import ingest_files, summarize_articles
+from app.models import Article, ArticleCategory
+
+
+def record(i: int, title: str = None):
+    # far from the shared corpus, in a category of their own
+    return {
+        "id": f"ing-{i}", "title": title or f"ingested {i}", "description": f"ingested article {i}",
+        "url": f"https://example.test/ingest/{i}", "publication_date": "2025-05-01T08:00:00",
+        "source_name": "Delta", "category": ["Ingest"], "relevance_score": 0.5,
+        "latitude": -40.0, "longitude": -60.0,
+    }
+
+
+def write(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+
+def stored(path):
+    with get_session() as s:
+        return dict(s.exec(select(Article.id, Article.title).where(Article.source_file == str(path))).all())
+
+
+def remove_ingested():
+    with get_session() as s:
+        ids = s.exec(select(Article.id).where(Article.id.like("ing-%"))).all()
+        s.exec(delete(ArticleCategory).where(ArticleCategory.article_id.in_(ids)))
+        s.exec(delete(Article).where(Article.id.in_(ids)))
+        s.commit()
+    bump_data_version()
+
+
+def snapshot_rows():
+    """Every ingested article and its categories, without the bookkeeping columns."""
+    with get_session() as s:
+        articles = s.exec(select(Article).where(Article.id.like("ing-%")).order_by(Article.id)).all()
+        return [
+            {**a.model_dump(exclude={"source_file", "updated_at"}), "categories": a.categories}
+            for a in articles
+        ]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    yield tmp_path / "dump.json"
+    remove_ingested()
+
+
+def test_first_run_inserts_and_an_unchanged_file_is_skipped(dump):
+    write(dump, [record(i) for i in range(3)])
+    rows, files, changes = ingest_files([str(dump)], incremental=True)
+    assert (rows, files) == (3, 1)
+    assert changes.to_dict() == {
+        "inserted": ["ing-0", "ing-1", "ing-2"], "updated": [], "deleted": [], "unchanged": 0,
+        "files": {"ingested": [str(dump)], "skipped": []},
+    }
+
+    rows, files, changes = ingest_files([str(dump)], incremental=True)
+    assert (rows, files) == (0, 0)
+    assert not changes
+    assert changes.files_skipped == [str(dump)]
+
+
+def test_touched_file_with_the_same_content_is_skipped(dump):
+    write(dump, [record(i) for i in range(2)])
+    ingest_files([str(dump)], incremental=True)
+    st = os.stat(dump)
+    os.utime(dump, (st.st_atime, st.st_mtime + 60))
+
+    rows, _, changes = ingest_files([str(dump)], incremental=True)
+    assert rows == 0
+    assert changes.files_skipped == [str(dump)]
+
+
+def test_changed_file_reports_inserted_updated_and_deleted_ids(dump):
+    write(dump, [record(i) for i in range(3)])
+    ingest_files([str(dump)], incremental=True)
+
+    write(dump, [record(0), record(1, title="ingested 1, corrected"), record(3)])
+    rows, _, changes = ingest_files([str(dump)], incremental=True)
+    assert rows == 2  # the unchanged record is not rewritten
+    assert (changes.inserted, changes.updated, changes.deleted, changes.unchanged) == (
+        ["ing-3"], ["ing-1"], ["ing-2"], 1)
+    assert stored(dump) == {"ing-0": "ingested 0", "ing-1": "ingested 1, corrected", "ing-3": "ingested 3"}
+
+
+def test_full_run_rewrites_rows_and_keeps_missing_ones(dump):
+    write(dump, [record(i) for i in range(2)])
+    ingest_files([str(dump)], incremental=True)
+
+    write(dump, [record(0)])
+    rows, _, changes = ingest_files([str(dump)])
+    assert rows == 1
+    assert (changes.inserted, changes.updated, changes.deleted, changes.unchanged) == ([], [], [], 1)
+    assert set(stored(dump)) == {"ing-0", "ing-1"}
+
+
+def test_summaries_are_generated_for_the_change_set_only(dump, monkeypatch):
+    from app.services import llm_service
+
+    calls = []
+    real = llm_service.LLMService.summarize_many
+
+    def counting(self, items, deadline=None):
+        calls.extend(title for title, _ in items)
+        return real(self, items, deadline)
+
+    monkeypatch.setattr(llm_service.LLMService, "summarize_many", counting)
+    write(dump, [record(i) for i in range(2)])
+    ingest_files([str(dump)], incremental=True)
+    write(dump, [record(0), record(1, title="ingested 1, corrected"), record(2)])
+    _, _, changes = ingest_files([str(dump)], incremental=True)
+
+    generated, skipped = summarize_articles(changes.inserted + changes.updated)
+    assert (generated, skipped) == (2, 0)
+    assert sorted(calls) == ["ingested 1, corrected", "ingested 2"]
+    assert summarize_articles(changes.inserted + changes.updated) == (0, 2)
+
+
+def test_process_pool_writes_what_the_inline_pipeline_writes(dump):
+    records = [record(i) for i in range(57)]
+    records[10]["category"] = "Ingest, Extra"
+    records[20]["latitude"] = "not a number"  # bad record
+    records += [record(3, title="ingested 3, repeated"), {"title": "no id"}]
+    write(dump, records)
+
+    inline = ingest_files([str(dump)], batch_size=5, commit_rows=12)
+    rows = snapshot_rows()
+    remove_ingested()
+    parallel = ingest_files([str(dump)], batch_size=5, commit_rows=12, workers=2)
+
+    assert inline[:2] == parallel[:2] == (57, 1)
+    assert snapshot_rows() == rows
+    by_id = {r["id"]: r for r in rows}
+    assert len(by_id) == 56
+    assert by_id["ing-3"]["title"] == "ingested 3, repeated"  # last record wins
+    assert by_id["ing-10"]["categories"] == ["Ingest", "Extra"]
+
+
+def test_gzipped_dumps_are_streamed_like_plain_json(dump):
+    gz = dump.with_name("dump.json.gz")
+    with gzip.open(gz, "wt", encoding="utf-8") as f:
+        json.dump([record(i) for i in range(4)], f)
+    write(dump, [record(i) for i in range(4)])
+
+    rows, files, _ = ingest_files([str(gz)], batch_size=3, workers=2)
+    assert (rows, files) == (4, 1)
+    from_gz = snapshot_rows()
+    remove_ingested()
+    ingest_files([str(dump)])
+    assert snapshot_rows() == from_gz
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+from sqlmodel import delete
+
+from app.database import get_session
+from app.models import IntentCacheEntry
+from app.services.fake_llm import FakeResponse
+from app.services.intent_cache import IntentCache
+from app.services.intent_service import IntentService, FALLBACK_INTENT
+
+MUSK = {"intent": ["search"], "entities": ["Elon Musk"], "location": None}
+
+
+class CountingModel:
+    """Answers every prompt with `text` (or raises `error`), counting the calls."""
+
+    def __init__(self, text: str = json.dumps(MUSK), error: Exception = None):
+        self.text, self.error, self.calls = text, error, 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return FakeResponse(self.text)
+
+    async def generate_content_async(self, prompt):
+        return self.generate_content(prompt)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    with get_session() as s:
+        s.exec(delete(IntentCacheEntry))
+        s.commit()
+
+
+def intents(model, cache=None):
+    svc = IntentService(cache=cache)
+    svc.model = model
+    return svc
+
+
+def test_normalized_equal_queries_share_one_llm_call():
+    model = CountingModel()
+    svc = intents(model)
+    assert svc.extract_intent("Elon Musk news!") == MUSK
+    assert svc.extract_intent("  elon   MUSK, news") == MUSK
+    assert asyncio.run(svc.aextract_intent("ELON MUSK NEWS?")) == MUSK
+    assert model.calls == 1
+    assert svc.stats()["memory_hits"] == 2
+
+    # a new process finds it in the persistent tier
+    fresh = intents(model)
+    assert fresh.extract_intent("elon musk news") == MUSK
+    assert model.calls == 1
+    assert fresh.stats()["db_hits"] == 1
+
+
+def test_unparseable_answers_are_cached_as_negative_entries():
+    model = CountingModel(text="I am not JSON")
+    svc = intents(model)
+    for _ in range(3):
+        assert svc.extract_intent("Elon Musk news") == FALLBACK_INTENT
+    assert model.calls == 1
+    assert svc.stats()["negative_hits"] == 2
+
+
+def test_negative_entries_expire_on_their_own_ttl():
+    model = CountingModel(text="I am not JSON")
+    svc = intents(model, cache=IntentCache(negative_ttl_s=0))
+    svc.extract_intent("Elon Musk news")
+    svc.extract_intent("Elon Musk news")
+    assert model.calls == 2
+
+
+def test_transport_errors_are_not_cached():
+    model = CountingModel(error=RuntimeError("quota"))
+    svc = intents(model)
+    assert svc.extract_intent("Elon Musk news") == FALLBACK_INTENT
+    model.error = None
+    assert svc.extract_intent("Elon Musk news") == MUSK
+    assert model.calls == 2
+
+
+@pytest.mark.parametrize("query, intent, entities, source", [
+    ("latest BUSINESS news", ["category"], ["Business"], None),
+    ("news from beta", ["source"], ["Beta"], "Beta"),
+    ("show me tech stories by Gamma!", ["category", "source"], ["Tech", "Gamma"], "Gamma"),
+])
+def test_known_categories_and_sources_resolve_without_the_llm(query, intent, entities, source):
+    model = CountingModel()
+    svc = intents(model)
+    assert svc.extract_intent(query) == {"intent": intent, "entities": entities, "location": None, "source": source}
+    assert model.calls == 0
+    assert svc.stats()["rule_hits"] == 1
+
+
+@pytest.mark.parametrize("query", ["business news near Delhi", "tech and business", "beta testing"])
+def test_anything_else_goes_to_the_llm(query):
+    model = CountingModel()
+    intents(model).extract_intent(query)
+    assert model.calls == 1
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from app.services.fake_llm import FakeGenerativeModel
+from app.services.llm_service import LLMService, SUMMARY_FAILED
+
+
+def llm(latency_s=0.0, fail_every=0):
+    return LLMService(model=FakeGenerativeModel(latency_s=latency_s, fail_every=fail_every))
+
+
+def item():
+    """A (title, description) pair no other test has summarized."""
+    token = uuid.uuid4().hex
+    return f"title {token}", f"description {token}"
+
+
+def test_identical_requests_share_one_generation():
+    service, pair = llm(latency_s=0.2), item()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.summarize_many([pair] * 3)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert service.model.calls == 1
+    assert len({s for r in results for s in r}) == 1
+    assert service._inflight == {}
+
+
+def test_deadline_returns_pending_summaries_that_fill_the_cache_later():
+    service, pair = llm(latency_s=0.3), item()
+    started = time.monotonic()
+    assert service.summarize_many([pair], deadline=0.05) == [None]
+    assert time.monotonic() - started < 0.25
+
+    summary = service.summarize(*pair)  # joins the generation still in flight
+    assert summary.startswith("Fake summary")
+    assert service.summarize_many([pair], deadline=0.05) == [summary]
+    assert service.model.calls == 1
+
+
+def test_missing_descriptions_skip_the_model():
+    service = llm()
+    assert service.summarize_many([("Quiet day", None), ("Quiet night", "")]) == [
+        "Quiet day. No description available.", "Quiet night. No description available."]
+    assert service.model.calls == 0
+
+
+def test_failures_are_not_cached():
+    service, pair = llm(fail_every=1), item()
+    assert service.summarize(*pair) == SUMMARY_FAILED
+    service.model.fail_every = 0
+    assert service.summarize(*pair).startswith("Fake summary")
+    assert service.model.calls == 2
+
+
+def test_stream_yields_cached_summaries_first_and_pending_ones_at_the_deadline():
+    service = llm(latency_s=0.3)
+    cached, slow = item(), item()
+    service.summarize(*cached)
+
+    async def collect():
+        return [pair async for pair in service.astream_summaries([slow, cached, slow], deadline=0.05)]
+
+    got = asyncio.run(collect())
+    assert got[0][0] == 1 and got[0][1].startswith("Fake summary")
+    assert sorted(got[1:]) == [(0, None), (2, None)]
+
+
+def test_cache_write_failure_still_returns_the_summary(monkeypatch):
+    service, pair = llm(latency_s=0.05), item()
+
+    def locked(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(service.cache, "put", locked)
+    results = service.summarize_many([pair, pair])
+    assert results[0] == results[1]
+    assert results[0].startswith("Fake summary")
+    assert service.model.calls == 1
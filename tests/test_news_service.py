@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.news_service import Candidate
+from tests.conftest import corpus, CENTER
+
+RECORDS = corpus()
+
+
+def by_date(records):
+    """Newest first, undated last, ties by id."""
+    def key(r):
+        d = r["publication_date"]
+        return (d is None, -datetime.fromisoformat(d).timestamp() if d else 0, r["id"])
+    return [r["id"] for r in sorted(records, key=key)]
+
+
+def by_score(records):
+    return [r["id"] for r in sorted(records, key=lambda r: (r["relevance_score"] is None, -(r["relevance_score"] or 0), r["id"]))]
+
+
+def ids(candidates):
+    return [c.id for c in candidates]
+
+
+def test_category_filter_is_case_insensitive_and_sees_every_category(service):
+    expected = by_date(r for r in RECORDS if "Business" in r["category"])
+    assert ids(service.category_candidates("bUsInEsS", len(RECORDS))) == expected
+    assert ids(service.category_candidates("Sports", 10)) == []
+
+
+def test_source_filter(service):
+    expected = by_date(r for r in RECORDS if r["source_name"] == "Beta")
+    assert ids(service.source_candidates("BETA", len(RECORDS))) == expected
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.0])
+def test_score_filter(service, threshold):
+    # at or below 0 a missing score counts as 0, so unscored articles come last
+    expected = by_score(r for r in RECORDS if (r["relevance_score"] or 0) >= threshold)
+    assert ids(service.score_candidates(threshold, len(RECORDS))) == expected
+
+
+@pytest.fixture
+def llm_calls(service, monkeypatch):
+    """Texts the service asked the LLM to summarize."""
+    calls = []
+
+    def summarize_many(items, deadline=None):
+        calls.extend(items)
+        return [f"summary of {title}" for title, _ in items]
+
+    async def asummarize_many(items, deadline=None):
+        return summarize_many(items, deadline)
+
+    monkeypatch.setattr(service.llm, "summarize_many", summarize_many)
+    monkeypatch.setattr(service.llm, "asummarize_many", asummarize_many)
+    return calls
+
+
+def test_render_summarizes_only_the_final_candidates(service, llm_calls):
+    page = service.category_candidates("Tech", 3)
+    rendered = service.render(page)
+    by_id = {r["id"]: r for r in RECORDS}
+    assert [r["title"] for r in rendered] == [by_id[c.id]["title"] for c in page]
+    assert rendered[0]["llm_summary"] == f"summary of {rendered[0]['title']}"
+    assert rendered[0]["summary_pending"] is False
+    assert rendered[0]["category"] == by_id[page[0].id]["category"]
+    assert len(llm_calls) == 3
+
+
+def test_render_without_summaries_or_with_a_projection_skips_the_llm(service, llm_calls):
+    page = service.category_candidates("Tech", 3)
+    plain = service.render(page, summaries=False)
+    assert "llm_summary" not in plain[0] and "title" in plain[0]
+    assert service.render(page, fields=["title", "url"]) == [{"title": r["title"], "url": r["url"]} for r in plain]
+    assert asyncio.run(service.arender(page, summaries=False)) == plain
+    assert llm_calls == []
+
+    assert service.render(page, fields=["llm_summary"])[0] == {"llm_summary": f"summary of {plain[0]['title']}"}
+
+
+def test_render_keeps_ranking_extras_and_drops_deleted_articles(service, llm_calls):
+    page = service.nearby_candidates(*CENTER, radius=50, limit=2)
+    rendered = service.render(page[:1] + [Candidate(id="gone")] + page[1:], fields=["title", "distance_km"])
+    assert [r["distance_km"] for r in rendered] == [c.extra["distance_km"] for c in page]
+    assert len(rendered) == 2
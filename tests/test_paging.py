@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.result_sets import RankedResultSets
+from tests.conftest import N_ARTICLES, MARKET_ARTICLES, CENTER
+
+LIMIT = 3  # small pages: walks cross several ranking pools
+
+
+def walk(page, limit=LIMIT):
+    """Ids of every page, following the cursors to the end."""
+    ids, after = [], None
+    for _ in range(N_ARTICLES + 1):
+        candidates, after = page(limit=limit, after=after)
+        ids += [c.id for c in candidates]
+        if after is None:
+            return ids
+    raise AssertionError("cursor never ended")
+
+
+async def awalk(page, limit=LIMIT):
+    ids, after = [], None
+    for _ in range(N_ARTICLES + 1):
+        candidates, after = await page(limit=limit, after=after)
+        ids += [c.id for c in candidates]
+        if after is None:
+            return ids
+    raise AssertionError("cursor never ended")
+
+
+@pytest.fixture
+def result_sets(service):
+    """Swap the service's result sets for the test (fresh by default)."""
+    previous = service.result_sets
+
+    def use(**kwargs):
+        service.result_sets = RankedResultSets(**kwargs)
+        return service.result_sets
+
+    use()
+    yield use
+    service.result_sets = previous
+
+
+@pytest.mark.parametrize("kind, args, full", [
+    ("category", ("Business",), lambda s: s.category_candidates("Business", N_ARTICLES * 2)),
+    ("source", ("Beta",), lambda s: s.source_candidates("Beta", N_ARTICLES)),
+    ("score", (0.3,), lambda s: s.score_candidates(0.3, N_ARTICLES)),
+])
+def test_keyset_walk_matches_the_full_ordering(service, kind, args, full):
+    page = getattr(service, f"{kind}_page")
+    ids = walk(lambda **kw: page(*args, **kw))
+    assert ids == [c.id for c in full(service)]
+
+
+def test_search_walk_returns_every_hit(service, result_sets):
+    ids = walk(lambda **kw: service.search_page("market", **kw))
+    assert len(ids) == len(set(ids)) == MARKET_ARTICLES
+    assert ids[:LIMIT] == [c.id for c in service.search_candidates("market", LIMIT)]
+
+
+def test_nearby_walk_returns_everything_within_the_radius(service, result_sets):
+    lat, lon = CENTER
+    ids = walk(lambda **kw: service.nearby_page(lat, lon, 80.0, **kw))
+    assert ids == [i for i, _ in service.spatial_index.within(lat, lon, 80.0)]
+    assert service.result_sets.pool(LIMIT) < len(ids)
+
+
+def test_nearest_walk_reaches_every_article(service, result_sets):
+    ids = walk(lambda **kw: service.nearby_page(*CENTER, nearest=True, **kw), limit=40)
+    assert len(ids) == len(set(ids)) == N_ARTICLES
+
+
+@pytest.mark.parametrize("kwargs", [{"size": 0}, {"max_results": 50}], ids=["expired", "capped"])
+def test_walk_completes_without_kept_sets(service, result_sets, kwargs):
+    result_sets(**kwargs)
+    ids = walk(lambda **kw: service.search_page("market", **kw))
+    assert len(ids) == len(set(ids)) == MARKET_ARTICLES
+
+
+def test_trending_walk_returns_every_engaged_article(service, result_sets, clean_events, monkeypatch):
+    monkeypatch.setattr(service.trending, "region_ttl", 0)  # region lists from before these events
+    engaged = {f"t-{i:03d}" for i in range(0, N_ARTICLES, 2)}
+    service.events.add([
+        {"article_id": article_id, "user_id": "u", "event_type": "view",
+         "latitude": CENTER[0], "longitude": CENTER[1], "timestamp": datetime.utcnow()}
+        for article_id in sorted(engaged)
+    ])
+    service.events.flush()
+
+    ids = walk(lambda **kw: service.trending_page(*CENTER, **kw))
+    assert len(ids) == len(set(ids))
+    assert set(ids) == engaged
+
+
+def test_async_walk_matches_the_sync_walk(service, result_sets):
+    ids = asyncio.run(awalk(lambda **kw: service.asearch_page("market", **kw)))
+    assert ids == walk(lambda **kw: service.search_page("market", **kw))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select, func
+
+from app.database import get_session
+from app.models import UserEvent, UserEventHourly
+from app.retention import compact_events
+from app.services.event_buffer import EventBuffer
+from app.services.trending_service import TrendingService
+
+pytestmark = pytest.mark.usefixtures("clean_events")
+
+CALLERS = [(19.10, 72.90), (28.50, 77.10)]
+
+
+@pytest.fixture
+def trending(monkeypatch):
+    """Rollups over 240 events spread across the last 100 hours."""
+    # a long half-life, so the compacted events still weigh in the recency term
+    monkeypatch.setenv("TRENDING_HALF_LIFE_HOURS", "24")
+    trending = TrendingService()
+    now = datetime.utcnow()
+    buf = EventBuffer(trending, flush_interval=3600)
+    try:
+        buf.add([
+            {"article_id": f"t-{n % 12:03d}", "user_id": str(n), "event_type": ("view", "click", "share")[n % 3],
+             "latitude": (19.07, 28.61)[n % 2], "longitude": (72.87, 77.21)[n % 2],
+             "timestamp": now - timedelta(minutes=25 * n + n % 7)}
+            for n in range(240)
+        ])
+        buf.flush()
+    finally:
+        buf.close()
+    return trending
+
+
+def counts():
+    """(raw events, events in the hourly aggregates)"""
+    with get_session() as s:
+        raw = s.exec(select(func.count()).select_from(UserEvent)).one()
+        hourly = s.exec(select(func.coalesce(func.sum(UserEventHourly.event_count), 0))).one()
+    return raw, hourly
+
+
+def rankings(trending):
+    return {lat_lon: trending.top(*lat_lon, limit=12) for lat_lon in CALLERS}
+
+
+def assert_same(rankings, expected):
+    for lat_lon, top in expected.items():
+        assert [i for i, _ in rankings[lat_lon]] == [i for i, _ in top]
+        assert [s for _, s in rankings[lat_lon]] == pytest.approx([s for _, s in top])
+
+
+def test_compaction_moves_old_events_into_hourly_rows(trending):
+    result = compact_events(48)
+    cutoff = datetime.fromisoformat(result["cutoff"])
+    with get_session() as s:
+        oldest_raw = s.exec(select(func.min(UserEvent.timestamp))).one()
+        hours = s.exec(select(UserEventHourly.hour)).all()
+    raw, hourly = counts()
+
+    assert result["events_compacted"] == hourly > 0
+    assert raw + hourly == 240
+    assert oldest_raw >= cutoff
+    assert all(h < cutoff and h == h.replace(minute=0, second=0, microsecond=0) for h in hours)
+    # nothing left past the horizon: running it again is a no-op
+    assert compact_events(48)["events_compacted"] == 0
+    assert counts() == (raw, hourly)
+
+
+def test_trending_is_the_same_before_and_after_compaction(trending):
+    expected = rankings(trending)
+    compact_events(48)
+    assert_same(rankings(trending), expected)  # live rollups are untouched
+
+    # rebuilt from hourly aggregates plus the remaining raw events
+    trending.rebuild()
+    assert_same(rankings(trending), expected)
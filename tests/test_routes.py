@@ -0,0 +1,151 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import delete
+
+from app.database import engine, bump_data_version
+from app.ingest import normalize_batch, write_rows
+from app.main import app
+from app.models import Article, ArticleCategory
+from app.routes import news_router
+from app.utils.cursor import encode_cursor
+from app.utils.geo_utils import haversine
+
+
+@pytest.fixture(scope="module")
+def client(articles):
+    # the router's service was built on import, before the test corpus was written
+    news_router.service.snapshots.refresh(force=True)
+    return TestClient(app)
+
+
+def test_nearby_distances_are_measured_from_the_exact_point(client):
+    # 3 decimals of rounding would move the point by ~70 m
+    lat, lon = 19.07049, 72.87049
+    r = client.get("/api/news/nearby", params={"lat": lat, "lon": lon, "radius": 50, "limit": 20, "summaries": "false"})
+    assert r.status_code == 200
+    articles = r.json()["articles"]
+    assert articles
+    for a in articles:
+        assert a["distance_km"] == pytest.approx(haversine(lat, lon, a["latitude"], a["longitude"]), abs=2e-3)
+
+
+def test_etag_revalidation_returns_304(client):
+    params = {"category": "Business", "limit": 3, "summaries": "false"}
+    first = client.get("/api/news/category", params=params)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/api/news/category", params=params, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    other = client.get("/api/news/category", params=params, headers={"If-None-Match": '"stale"'})
+    assert other.status_code == 200
+    assert other.json() == first.json()
+
+
+def ingest(*records):
+    """Write and remove articles the way ingest does: commit, bump the data version."""
+    with engine.begin() as conn:
+        rows, _ = normalize_batch(list(records))
+        write_rows(conn, rows)
+    bump_data_version()
+    news_router.service.snapshots.refresh(force=True)  # don't wait for ARTICLE_SNAPSHOT_CHECK_S
+
+
+@pytest.fixture
+def breaking(client):
+    yield {"id": "r-breaking", "title": "breaking business", "publication_date": "2030-01-01T00:00:00",
+           "category": ["Business"]}
+    with engine.begin() as conn:
+        conn.execute(delete(ArticleCategory).where(ArticleCategory.article_id == "r-breaking"))
+        conn.execute(delete(Article).where(Article.id == "r-breaking"))
+    bump_data_version()
+    news_router.service.snapshots.refresh(force=True)
+
+
+def test_ingest_invalidates_cached_responses(client, breaking):
+    params = {"category": "business", "limit": 4, "summaries": "false"}
+    first = client.get("/api/news/category", params=params)
+    cached = client.get("/api/news/category", params={**params, "category": "BUSINESS"})
+    assert (first.headers["x-cache"], cached.headers["x-cache"]) == ("miss", "hit")
+    assert cached.headers["etag"] == first.headers["etag"]
+
+    ingest(breaking)
+    fresh = client.get("/api/news/category", params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert fresh.status_code == 200
+    assert fresh.headers["x-cache"] == "miss"
+    assert fresh.headers["etag"] != first.headers["etag"]
+    assert fresh.json()["articles"][0]["title"] == "breaking business"
+
+
+def test_nearby_cursor_is_scoped_to_the_query(client):
+    params = {"lat": 19.07049, "lon": 72.87049, "radius": 80, "limit": 5, "summaries": "false"}
+    cursor = client.get("/api/news/nearby", params=params).json()["next_cursor"]
+    assert cursor
+
+    # the same point to 3 decimals shares the scope; another point does not
+    same = client.get("/api/news/nearby", params={**params, "lat": 19.0701, "cursor": cursor})
+    assert same.status_code == 200
+    other = client.get("/api/news/nearby", params={**params, "lat": 19.2, "cursor": cursor})
+    assert other.status_code == 400
+
+
+@pytest.mark.parametrize("path, params, scope, state", [
+    ("/api/news/category", {"category": "Business"}, "category:business", {"d": "notadate", "i": "t-001"}),
+    ("/api/news/category", {"category": "Business"}, "category:business", {"d": 5, "i": "t-001"}),
+    ("/api/news/score", {"threshold": 0.3}, "score:0.3", {"s": "abc", "i": "t-001"}),
+    ("/api/news/score", {"threshold": 0.3}, "score:0.3", {"s": float("nan"), "i": "t-001"}),
+    ("/api/news/search", {"query": "market"}, "search:lexical:market", {"s": 1.0, "i": "t-001", "o": "zz"}),
+    ("/api/news/search", {"query": "market"}, "search:lexical:market", {"s": 1.0, "i": "t-001", "o": -4}),
+], ids=["date-text", "date-number", "score-text", "score-nan", "offset-text", "offset-negative"])
+def test_forged_keyset_fields_are_rejected(client, path, params, scope, state):
+    # the scope hash is not a secret: a client can build a cursor that passes it
+    r = client.get(path, params={**params, "summaries": "false", "cursor": encode_cursor(state, scope)})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Invalid cursor")
+
+
+def ndjson(r):
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+def sse(r):
+    """(event name, data) per message"""
+    messages = []
+    for block in r.text.split("\n\n"):
+        if block:
+            event, data = block.split("\n")
+            messages.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return messages
+
+
+def test_ndjson_streams_articles_then_summaries_then_the_end(client):
+    params = {"category": "Tech", "limit": 3}
+    page = client.get("/api/news/category", params={**params, "summaries": "false"}).json()
+    r = client.get("/api/news/category", params=params, headers={"Accept": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert "x-cache" not in r.headers
+
+    events = ndjson(r)
+    assert [e["type"] for e in events] == ["article"] * 3 + ["summary"] * 3 + ["end"]
+    assert [e["article"] for e in events[:3]] == page["articles"]
+    assert [e["index"] for e in events[:3]] == [0, 1, 2]
+    assert sorted(e["index"] for e in events[3:6]) == [0, 1, 2]
+    assert all(e["llm_summary"] and e["summary_pending"] is False for e in events[3:6])
+    assert events[-1] == {"type": "end", "count": 3, "next_cursor": page["next_cursor"]}
+
+
+def test_sse_without_summaries_has_no_summary_events(client):
+    params = {"lat": 19.07, "lon": 72.87, "radius": 50, "limit": 4, "summaries": "false"}
+    page = client.get("/api/news/nearby", params=params).json()
+    r = client.get("/api/news/nearby", params=params, headers={"Accept": "text/event-stream"})
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    messages = sse(r)
+    assert [name for name, _ in messages] == ["article"] * 4 + ["end"]
+    assert [data["article"] for _, data in messages[:4]] == page["articles"]
+    assert messages[-1][1] == {"type": "end", "count": 4, "next_cursor": page["next_cursor"]}
@@ -0,0 +1,79 @@
+import pytest
+from sqlmodel import delete
+
+from app.database import engine, bump_data_version
+from app.ingest import normalize_batch, write_rows
+from app.models import Article, ArticleCategory
+from app.services.search_index import InvertedSearchIndex, FTS5SearchIndex
+from app.utils.text_utils import text_match_score
+from tests.conftest import corpus
+
+
+def rows(*ids):
+    records = [{"id": i, "title": f"zebra crossing {i}", "description": "striped", "category": ["Zoo"]} for i in ids]
+    out, _ = normalize_batch(records)
+    return out
+
+
+def remove(conn, *ids):
+    conn.execute(delete(ArticleCategory).where(ArticleCategory.article_id.in_(ids)))
+    conn.execute(delete(Article).where(Article.id.in_(ids)))
+
+
+@pytest.fixture
+def zebras():
+    with engine.begin() as conn:
+        write_rows(conn, rows("z-1", "z-2"))
+    bump_data_version()
+    yield
+    with engine.begin() as conn:
+        remove(conn, "z-1", "z-2", "z-3")
+    bump_data_version()
+
+
+def found(index):
+    return {article_id for article_id, _ in index.search("zebra", 10)}
+
+
+def test_memory_index_drops_articles_deleted_in_the_same_batch_as_inserts(zebras):
+    index = InvertedSearchIndex(refresh_interval=0)
+    index.rebuild()
+    assert found(index) == {"z-1", "z-2"}
+
+    # one batch: the article count doesn't change
+    with engine.begin() as conn:
+        remove(conn, "z-1")
+        write_rows(conn, rows("z-3"))
+    bump_data_version()
+
+    assert found(index) == {"z-2", "z-3"}
+    assert index.stats()["tombstones"] == 1
+
+
+def test_fts5_triggers_follow_inserts_updates_and_deletes(zebras):
+    index = FTS5SearchIndex()
+    assert found(index) == {"z-1", "z-2"}
+
+    retitled = rows("z-2")
+    retitled[0]["title"] = "plain crossing"
+    with engine.begin() as conn:
+        remove(conn, "z-1")
+        write_rows(conn, retitled + rows("z-3"))
+
+    assert found(index) == {"z-3"}
+    assert {a for a, _ in index.search("plain", 10)} == {"z-2"}
+
+
+@pytest.mark.parametrize("query", ["market", "report 233", "weather article", "market 7 number"])
+def test_memory_index_scores_like_text_match_score(query):
+    index = InvertedSearchIndex(refresh_interval=3600)
+    index.rebuild()
+    expected = {r["id"]: text_match_score(query, r["title"], r["description"]) for r in corpus()}
+    expected = {k: v for k, v in expected.items() if v}
+
+    hits = index.search(query, 1000)
+    assert dict(hits) == expected
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+    # FTS5 retrieves the same articles (scored with text_match_score too)
+    assert dict(FTS5SearchIndex().search(query, 1000)) == expected
@@ -0,0 +1,100 @@
+import pytest
+from sqlmodel import delete
+
+from app.database import engine
+from app.ingest import normalize_batch, write_rows
+from app.models import Article, ArticleCategory
+from app.services.semantic_index import SemanticIndex
+from tests.conftest import MARKET_ARTICLES
+
+DOCS = {
+    "s-1": "cricket match at the stadium, the bowler took five wickets",
+    "s-2": "cricket bowler injured before the stadium final",
+    "s-3": "bowler and batsman shine at a packed stadium",
+    "s-4": "stadium crowd cheers the batsman and the wickets",
+    "f-1": "stock market rally as shares and bonds climb",
+    "f-2": "bonds slide while stock investors sell shares",
+    "f-3": "investors buy shares after the market rally",
+    "f-4": "central bank bonds and investors",
+    "w-1": "monsoon rain floods the coast, storm warning",
+    "w-2": "storm brings heavy rain and flood alerts",
+    "w-3": "coast braces for monsoon storm and flood",
+    "w-4": "heavy rain warning for the coast",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SemanticIndex(str(tmp_path / "semantic"), refresh_interval=0)
+
+
+@pytest.fixture
+def add_extra():
+    """Writes an article (after the index was built)."""
+    def add():
+        rows, _ = normalize_batch([{"id": "sem-1", "title": "weather report extra", "description": "late arrival"}])
+        with engine.begin() as conn:
+            write_rows(conn, rows)
+        return "sem-1"
+    yield add
+    with engine.begin() as conn:
+        conn.execute(delete(ArticleCategory).where(ArticleCategory.article_id == "sem-1"))
+        conn.execute(delete(Article).where(Article.id == "sem-1"))
+
+
+def ids(hits):
+    return [article_id for article_id, _ in hits]
+
+
+def ids_of(candidates):
+    return [c.id for c in candidates]
+
+
+@pytest.mark.parametrize("query, topic", [("cricket", "s"), ("stock", "f"), ("monsoon", "w")])
+def test_articles_on_the_topic_match_without_sharing_the_word(index, query, topic):
+    index.build(dims=3, scan=lambda batch_size: iter([list(DOCS.items())]))
+    hits = index.search(query, 4)
+    assert sorted(ids(hits)) == [f"{topic}-{n}" for n in range(1, 5)]
+    assert min(sim for _, sim in hits) > 0.9
+
+
+def test_probing_every_list_is_the_exact_search(index):
+    index.ivf_min = 10
+    stats = index.build(dims=16)
+    assert stats["articles"] == 260 and stats["lists"] > 1
+    for query in ("weather report", "market update 17", "article number"):
+        probed, exact = index.search(query, 10, nprobe=stats["lists"]), index.exact_search(query, 10)
+        # equal similarities may come in either order
+        assert [sim for _, sim in probed] == pytest.approx([sim for _, sim in exact])
+
+
+def test_update_applies_an_ingest_change_set(index, add_extra):
+    index.build(dims=16)
+    extra = add_extra()
+    assert extra not in ids(index.search("weather report extra", 300))
+
+    stats = index.update(inserted=[extra], deleted=["t-233"])
+    assert stats["articles"] == 260
+    found = ids(index.search("weather report extra", 300))
+    assert extra in found and "t-233" not in found
+    assert index.update() == index.stats()  # empty change set: same generation
+
+
+@pytest.mark.parametrize("mode", ["semantic", "hybrid"])
+def test_search_modes_use_the_semantic_index(service, index, monkeypatch, mode):
+    index.build(dims=16)
+    monkeypatch.setattr(service, "semantic_index", index)
+    results = service.search_candidates("weather", 10, mode=mode)
+    assert len(results) == 10
+    assert all(int(c.id[2:]) >= MARKET_ARTICLES for c in results)  # only the "weather report" articles
+    if mode == "hybrid":
+        # token matches still lead
+        lexical = service.search_candidates("weather 233", 10, mode="lexical")
+        assert ids_of(service.search_candidates("weather 233", 10, mode=mode)) == ids_of(lexical)
+
+
+def test_without_an_index_every_mode_is_lexical(service, index, monkeypatch):
+    monkeypatch.setattr(service, "semantic_index", index)  # nothing built in this directory
+    assert not index.available()
+    lexical = service.search_candidates("weather 233", 5, mode="lexical")
+    assert service.search_candidates("weather 233", 5, mode="semantic") == lexical
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from app.utils.geo_utils import haversine
+from tests.conftest import corpus
+
+POINTS = [(19.123, 72.911), (19.87, 73.41), (18.2, 72.1), (28.61, 77.21)]
+
+
+def brute_force(lat, lon):
+    """(id, distance) of every article, nearest first."""
+    hits = [(r["id"], haversine(lat, lon, r["latitude"], r["longitude"])) for r in corpus()]
+    return sorted(hits, key=lambda h: h[1])
+
+
+@pytest.mark.parametrize("lat, lon", POINTS)
+@pytest.mark.parametrize("radius", [3.0, 12.0, 60.0])
+def test_within_matches_brute_force(service, lat, lon, radius):
+    expected = [h for h in brute_force(lat, lon) if h[1] <= radius]
+    hits = service.spatial_index.within(lat, lon, radius)
+    assert [i for i, _ in hits] == [i for i, _ in expected]
+    assert [d for _, d in hits] == pytest.approx([d for _, d in expected], abs=1e-6)
+    assert asyncio.run(service.spatial_index.awithin(lat, lon, radius)) == hits
+
+
+@pytest.mark.parametrize("lat, lon", POINTS)
+@pytest.mark.parametrize("k", [1, 7, 300])
+def test_nearest_matches_brute_force(service, lat, lon, k):
+    expected = brute_force(lat, lon)[:k]
+    hits = service.spatial_index.nearest(lat, lon, k)
+    assert [i for i, _ in hits] == [i for i, _ in expected]
+    assert asyncio.run(service.spatial_index.anearest(lat, lon, k)) == hits
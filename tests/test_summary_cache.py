@@ -0,0 +1,47 @@
+import pytest
+from sqlmodel import select, delete
+
+from app.database import get_session
+from app.models import LLMSummary
+from app.services.summary_cache import SummaryCache
+
+
+@pytest.fixture
+def empty_table():
+    with get_session() as s:
+        s.exec(delete(LLMSummary))
+        s.commit()
+
+
+def keys_stored():
+    with get_session() as s:
+        return set(s.exec(select(LLMSummary.key)).all())
+
+
+def test_memory_hits_keep_their_rows_from_eviction(empty_table):
+    cache = SummaryCache(memory_size=10, max_rows=2, touch_s=3600)
+    for key in ("read", "cold", "new"):
+        cache.put(key, "fake", f"summary {key}")
+
+    # served from memory: no DB round-trip, but the row must not look cold
+    assert cache.get("read") == "summary read"
+    assert cache.stats()["memory_hits"] == 1
+
+    assert cache.evict() == 1
+    assert keys_stored() == {"read", "new"}
+
+
+def test_memory_hits_are_written_in_batches(empty_table):
+    cache = SummaryCache(memory_size=10, touch_s=3600)
+    cache.put("a", "fake", "summary a")
+    with get_session() as s:
+        written = s.get(LLMSummary, "a").last_used_at
+
+    cache.get_many(["a", "a"])
+    with get_session() as s:
+        assert s.get(LLMSummary, "a").last_used_at == written  # not yet due
+
+    assert cache.touch() == 1
+    with get_session() as s:
+        assert s.get(LLMSummary, "a").last_used_at > written
+    assert cache.touch() == 0
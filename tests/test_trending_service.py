@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.event_buffer import EventBuffer
+from app.services.trending_service import TrendingService
+
+pytestmark = pytest.mark.usefixtures("clean_events")
+
+PLACES = [(19.07, 72.87), (18.52, 73.86), (28.61, 77.21)]
+CALLERS = [(19.10, 72.90), (18.60, 73.80), (28.50, 77.10), (22.0, 75.0)]
+
+
+def engage(trending: TrendingService):
+    """Distinct counts, ages and places per article, so no two scores tie."""
+    now = datetime.utcnow()
+    buf = EventBuffer(trending, flush_interval=3600)
+    try:
+        buf.add([
+            {"article_id": f"t-{i:03d}", "user_id": str(n), "event_type": ("view", "click", "share")[n % 3],
+             "latitude": PLACES[i % 3][0], "longitude": PLACES[i % 3][1],
+             "timestamp": now - timedelta(minutes=7 * i + n)}
+            for i in range(30) for n in range(i % 7 + 1)
+        ])
+        buf.flush()
+    finally:
+        buf.close()
+
+
+@pytest.mark.parametrize("lat, lon", CALLERS)
+def test_feed_from_region_lists_matches_the_exhaustive_blend(lat, lon):
+    trending = TrendingService()  # top-K of 50 holds all 30 engaged articles
+    engage(trending)
+    feed = trending.feed(lat, lon, limit=30)
+    exhaustive = trending.feed(lat, lon, limit=30, exhaustive=True)
+    assert len(exhaustive) == 30
+    assert [i for i, _ in feed] == [i for i, _ in exhaustive]
+    assert [s for _, s in feed] == pytest.approx([s for _, s in exhaustive])
+
+
+def test_nearby_callers_share_the_region_lists(monkeypatch):
+    trending = TrendingService()
+    engage(trending)
+    calls = []
+    scores_at = trending.scores_at
+    monkeypatch.setattr(trending, "scores_at", lambda points: calls.append(len(points)) or scores_at(points))
+
+    first = trending.feed(19.10, 72.90)
+    assert trending.feed(19.11, 72.91) != []
+    assert calls == [9]  # one pass over the caller's region and its 8 neighbours
+    assert trending.feed(19.10, 72.90) == first
+
+
+def test_rebuild_reproduces_the_incremental_rollups():
+    trending = TrendingService()
+    engage(trending)
+    before = {lat_lon: trending.top(*lat_lon, limit=30) for lat_lon in CALLERS}
+    trending.rebuild()
+    for lat_lon, top in before.items():
+        after = trending.top(*lat_lon, limit=30)
+        assert [i for i, _ in after] == [i for i, _ in top]
+        assert [s for _, s in after] == pytest.approx([s for _, s in top])
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.utils.geo_utils import haversine
+from app.utils.text_utils import recency_boost
+from app.utils.vector_kernels import (
+    Coordinates, haversine_many, proximity_factor, to_epoch_seconds, recency_boost_many, blend_scores, safe_normalize,
+)
+
+
+def test_haversine_many_agrees_with_the_scalar_haversine():
+    rng = np.random.default_rng(7)
+    lats, lons = rng.uniform(-89, 89, 500), rng.uniform(-180, 180, 500)
+    expected = [haversine(19.07, 72.87, a, b) for a, b in zip(lats, lons)]
+    assert haversine_many(19.07, 72.87, lats, lons) == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_missing_coordinates_give_nan_distances():
+    points = Coordinates.from_rows([("a", 19.0, 72.0), ("b", None, None)])
+    dist = points.distances_to(19.0, 72.0)
+    assert dist[0] == pytest.approx(0.0)
+    assert np.isnan(dist[1])
+
+
+def test_recency_boost_many_agrees_with_recency_boost():
+    now = datetime.now(timezone.utc)
+    dates = [now - timedelta(hours=h) for h in (0, 5, 30, 80, 24 * 40)] + [None]
+    expected = [recency_boost(d) for d in dates]
+    assert recency_boost_many(to_epoch_seconds(dates), now.timestamp()) == pytest.approx(expected, rel=1e-9)
+
+
+def test_naive_datetimes_are_utc():
+    naive, aware = datetime(2025, 6, 1, 12), datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+    assert to_epoch_seconds([naive])[0] == aware.timestamp()
+
+
+def test_blend_and_normalize():
+    blended = blend_scores(np.array([2.0, 0.0]), np.array([0.5, np.nan]), np.array([1.0, 0.5]))
+    assert blended == pytest.approx([(0.6 * 2 + 0.4 * 0.5), 0.0])
+    assert safe_normalize(np.array([1.0, 4.0])) == pytest.approx([0.25, 1.0])
+    assert safe_normalize(np.zeros(2)).tolist() == [0.0, 0.0]
+    assert proximity_factor(np.array([0.0, 1000.0, 5000.0])) == pytest.approx([1.0, 0.5, 0.0])